@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Run Benchmark
+
+This script runs the BCP Calculator benchmark suite with the fake provider and
+saves the results as JSON, optionally comparing them with a previous run.
+"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+from src.bcp.logger import setup_logger
+from src.benchmarks.benchmark import Benchmark, compare_results, load_stories, save_results
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the BCP calculation pipeline with a fake LLM provider."
+    )
+    parser.add_argument(
+        "--stories-dir",
+        type=str,
+        default="tests/data",
+        help="Directory containing user story files (default: tests/data)",
+    )
+    parser.add_argument(
+        "--output-file",
+        type=str,
+        default="tests/results/benchmark.json",
+        help="File to save the results to (default: tests/results/benchmark.json)",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help=(
+            "Mean simulated LLM latency in seconds (default: 0, measuring the pipeline"
+            " overhead only)"
+        ),
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.0,
+        help="Standard deviation of the simulated LLM latency in seconds (default: 0)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Seed of the simulated latencies (default: 0)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=str,
+        default="1,4,8",
+        help=(
+            "Comma-separated numbers of concurrent stories for the throughput runs"
+            " (default: 1,4,8)"
+        ),
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="Number of times each story is calculated in each run (default: 1)",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Also measure the peak Python heap with tracemalloc (slower)",
+    )
+    parser.add_argument("--compare", type=str, help="Results of a previous run to compare with")
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        default="WARNING",
+        help="Set the logging level (default: WARNING)",
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Main entry point for the benchmark script."""
+    args = parse_arguments()
+    logger = setup_logger(getattr(logging, args.log_level))
+
+    stories_dir = Path(args.stories_dir)
+    if not stories_dir.exists():
+        print(f"Error: Stories directory '{stories_dir}' does not exist.")
+        sys.exit(1)
+
+    benchmark = Benchmark(logger, latency=args.latency, jitter=args.jitter, seed=args.seed)
+    results = benchmark.run(
+        load_stories(str(stories_dir)),
+        concurrency_levels=[int(level) for level in args.concurrency.split(",") if level.strip()],
+        repeat=args.repeat,
+        trace_memory=args.trace_memory,
+    )
+    save_results(results, args.output_file)
+
+    latency = results["sequential"]["latency"]
+    print(
+        f"Sequential latency: p50 {latency['p50'] * 1000:.1f} ms, "
+        f"p95 {latency['p95'] * 1000:.1f} ms"
+    )
+    for step_name, step in results["sequential"]["steps"].items():
+        print(f"  {step_name}: overhead {step['overhead']['mean'] * 1000:.2f} ms")
+    for level in results["throughput"]:
+        print(f"Concurrency {level['concurrency']}: {level['throughput']:.1f} stories/s")
+    print(f"Peak RSS: {results['memory']['peak_rss_bytes'] / 2 ** 20:.1f} MiB")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\nComparison with {args.compare}:")
+        for entry in compare_results(baseline, results):
+            change = f"{entry['change']:+.1%}" if entry["change"] is not None else "n/a"
+            print(
+                f"  {entry['figure']}: {entry['baseline']:.4g} -> {entry['current']:.4g} ({change})"
+            )
+
+    print(f"\nResults saved to {args.output_file}")
+
+
+if __name__ == "__main__":
+    main()
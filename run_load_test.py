@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Run Load Test
+
+This script starts the BCP Calculator API with the fake provider (or targets a
+running server), drives /calculate and /status traffic at a target rate and
+saves the latencies, throughput, error rates and server resources as JSON.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from src.benchmarks.benchmark import load_stories, save_results
+from src.benchmarks.load_test import ApiServer, LoadTest, parse_mix
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Load test the BCP Calculator HTTP API.")
+    parser.add_argument(
+        "--url",
+        type=str,
+        help="URL of a running API server (default: start one with the fake provider)",
+    )
+    parser.add_argument(
+        "--pid",
+        type=int,
+        help="Process id of the server given with --url, to sample its memory and threads",
+    )
+    parser.add_argument(
+        "--provider",
+        type=str,
+        default="fake",
+        help="Provider requested for the calculations (default: fake)",
+    )
+    parser.add_argument(
+        "--stories-dir",
+        type=str,
+        default="tests/data",
+        help="Directory containing user story files (default: tests/data)",
+    )
+    parser.add_argument(
+        "--output-file",
+        type=str,
+        default="tests/results/load_test.json",
+        help="File to save the results to (default: tests/results/load_test.json)",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=10.0,
+        help="Target number of requests per second (default: 10)",
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=30.0,
+        help="Seconds during which requests are sent (default: 30)",
+    )
+    parser.add_argument(
+        "--mix",
+        type=str,
+        default="calculate=1,status=1",
+        help="Weights of the operations (default: calculate=1,status=1)",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=1.0,
+        help="Mean simulated LLM latency of the started server in seconds (default: 1)",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.3,
+        help="Standard deviation of the simulated LLM latency in seconds (default: 0.3)",
+    )
+    parser.add_argument(
+        "--workers", type=int, help="Concurrent jobs of the started server (BCP_API_WORKERS)"
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        help="Queued jobs accepted by the started server (BCP_API_MAX_QUEUE)",
+    )
+    parser.add_argument(
+        "--drain-timeout",
+        type=float,
+        default=60.0,
+        help="Seconds to wait for the submitted jobs after the last request (default: 60)",
+    )
+    parser.add_argument(
+        "--sample-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between two samples of the server memory and threads (default: 1)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0, help="Seed of the operation draws (default: 0)"
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Main entry point for the load test script."""
+    args = parse_arguments()
+
+    stories_dir = Path(args.stories_dir)
+    if not stories_dir.exists():
+        print(f"Error: Stories directory '{stories_dir}' does not exist.")
+        sys.exit(1)
+
+    env = {}
+    if args.workers:
+        env["BCP_API_WORKERS"] = str(args.workers)
+    if args.max_queue:
+        env["BCP_API_MAX_QUEUE"] = str(args.max_queue)
+    server = None if args.url else ApiServer(latency=args.latency, jitter=args.jitter, env=env)
+
+    try:
+        if server:
+            print(f"Starting API server on {server.url}")
+            server.start()
+        load_test = LoadTest(
+            args.url or server.url,
+            load_stories(str(stories_dir)),
+            rate=args.rate,
+            duration=args.duration,
+            mix=parse_mix(args.mix),
+            provider=args.provider,
+            pid=args.pid if args.url else server.pid,
+            drain_timeout=args.drain_timeout,
+            sample_interval=args.sample_interval,
+            seed=args.seed,
+        )
+        print(f"Sending {args.rate:g} requests/s for {args.duration:g}s")
+        results = load_test.run()
+    finally:
+        if server:
+            server.stop()
+
+    if server:
+        results["metadata"].update(latency=args.latency, jitter=args.jitter, server_env=env)
+    save_results(results, args.output_file)
+
+    for operation, stats in results["requests"].items():
+        latency = stats["latency"]
+        print(
+            f"{operation}: {stats['count']} requests, {stats['error_rate']:.1%} errors, "
+            f"p50 {latency['p50'] * 1000:.1f} ms, p95 {latency['p95'] * 1000:.1f} ms, "
+            f"p99 {latency['p99'] * 1000:.1f} ms"
+        )
+    completion = results["completion"]
+    latency = completion["latency"]
+    print(
+        f"Jobs: {completion['completed']} completed, {completion['failed']} failed, "
+        f"{completion['timed_out']} timed out of {completion['submitted']}; "
+        f"completion p50 {latency['p50']:.2f} s, p95 {latency['p95']:.2f} s, "
+        f"p99 {latency['p99']:.2f} s"
+    )
+    throughput = results["throughput"]
+    print(
+        f"Throughput: {throughput['requests_per_second']:.1f} requests/s, "
+        f"{throughput['completed_jobs_per_second']:.2f} jobs/s"
+    )
+    process = results["process"]
+    if process["peak_rss_bytes"] is not None:
+        print(
+            f"Server: peak RSS {process['peak_rss_bytes'] / 2 ** 20:.1f} MiB, "
+            f"up to {process['max_threads']} threads"
+        )
+
+    print(f"\nResults saved to {args.output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,15 @@
+import logging
+import uuid
 from typing import Any
-import httpx
+
 from mcp.server.fastmcp import FastMCP
-import uuid
-import logging
 
 from src.bcp.bcp_calculator import BCPCalculator
+from src.bcp.cache import get_result_cache, get_step_cache
+from src.bcp.callbacks import load_callbacks_from_env
 from src.bcp.logger import setup_logger
+from src.bcp.templates import get_prompt_templates
+from src.bcp.tracing import start_span
 
 # Initialize FastMCP server
 mcp = FastMCP("bcp-calculator-mcp")
@@ -21,11 +25,19 @@ async def calculate_bcp(story_content: str, provider: str = "openai") -> dict:
         provider: LLM provider to use (openai or claude)
     """
     """Start BCP calculation job."""
-    calculator = BCPCalculator(logger, provider_name=provider)
-    result = calculator.calculate_bcp(story_content)
+    with start_span("mcp.calculate_bcp", provider=provider):
+        calculator = BCPCalculator(
+            logger,
+            provider_name=provider,
+            result_cache=get_result_cache(),
+            step_cache=get_step_cache(),
+        )
+        result = await calculator.acalculate_bcp(story_content)
 
     return {"result": result}
 
 if __name__ == "__main__":
     logger.info(f"MCP Server starting...")
+    get_prompt_templates().precompile()
+    load_callbacks_from_env()
     mcp.run(transport='stdio')
@@ -12,9 +12,16 @@ from typing import Optional
 
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
+from starlette.requests import Request
+from starlette.responses import Response
 
 from src.bcp.bcp_calculator import BCPCalculator
+from src.bcp.cache import get_result_cache, get_step_cache
+from src.bcp.callbacks import load_callbacks_from_env
 from src.bcp.logger import setup_logger
+from src.bcp.metrics import CONTENT_TYPE, get_metrics
+from src.bcp.templates import get_prompt_templates
+from src.bcp.tracing import start_span
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -31,8 +38,13 @@ def build_server(logger: logging.Logger) -> FastMCP:
     @mcp.tool()
     async def calculate_bcp(story_content: str, provider: str = "openai") -> dict:
         """Calculate BCP via MCP tool."""
-        calculator = BCPCalculator(logger, provider_name=provider)
-        result = calculator.calculate_bcp(story_content)
+        calculator = BCPCalculator(
+            logger,
+            provider_name=provider,
+            result_cache=get_result_cache(),
+            step_cache=get_step_cache(),
+        )
+        result = await calculator.acalculate_bcp(story_content)
         return {"result": result}
 
     return mcp
@@ -45,6 +57,8 @@ def main() -> None:
     logger = setup_logger(logging.INFO)
     logger.info(f"Starting MCP HTTP Server on {args.host}:{args.port}")
     logger.info(f"Allowed origins: {args.allowed_origins}")
+    get_prompt_templates().precompile()
+    load_callbacks_from_env()
 
     # Configure server bind settings via FastMCP constructor arguments
     mcp = FastMCP(
@@ -53,6 +67,7 @@ def main() -> None:
         port=args.port,
         streamable_http_path="/mcp",
     )
+    metrics = get_metrics()
 
     def apply_provider_overrides(
         provider: str | None,
@@ -124,10 +139,27 @@ def main() -> None:
         """
         effective_provider = (provider or os.environ.get("BCP_PROVIDER") or "openai").lower()
         apply_provider_overrides(effective_provider, api_key, model_name, flow_client_id, flow_client_secret, flow_base_url, flow_tenant, flow_agent)
-        calculator = BCPCalculator(logger, provider_name=effective_provider)
-        result = calculator.calculate_bcp(story_content)
+        calculator = BCPCalculator(
+            logger,
+            provider_name=effective_provider,
+            result_cache=get_result_cache(),
+            step_cache=get_step_cache(),
+        )
+        metrics.jobs_in_flight.inc()
+        try:
+            with start_span("mcp.calculate_bcp", provider=effective_provider):
+                result = await calculator.acalculate_bcp(
+                    story_content, callbacks=[metrics.handler(effective_provider)]
+                )
+        finally:
+            metrics.jobs_in_flight.inc(-1)
         return {"result": result}
 
+    @mcp.custom_route("/metrics", methods=["GET"])
+    async def metrics_endpoint(request: Request) -> Response:
+        """Prometheus metrics of the calculations and caches."""
+        return Response(metrics.render(), media_type=CONTENT_TYPE)
+
     # Run using streamable HTTP transport
     mcp.run(transport="streamable-http")
 
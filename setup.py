@@ -2,7 +2,7 @@
      Setup script for the bcp-calculator package.
 """
 
-from setuptools import setup, find_packages
+from setuptools import find_packages, setup
 
 # Read the contents of README.md for the long description
 with open("README.md", encoding="utf-8") as f:
@@ -30,13 +30,14 @@ setup(
         "fastapi>=0.103.0",
         "uvicorn>=0.23.0",
         "requests>=2.28.0",
+        "httpx>=0.24.0",
         "pydantic>=2.0.0",
     ],
     entry_points={
         "console_scripts": [
             "bcp-calc=src.main:main",
             "bcp-api=src.api.server:run_api",
-            "bcp-compare=tests.compare_providers:main"
+            "bcp-compare=tests.compare_providers:main",
         ],
     },
     classifiers=[
@@ -49,4 +50,4 @@ setup(
         "Programming Language :: Python :: 3.12",
     ],
     python_requires=">=3.10",
-)
\ No newline at end of file
+)
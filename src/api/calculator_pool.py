@@ -0,0 +1,113 @@
+"""
+Calculator pool for the BCP Calculator API.
+"""
+
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from ..bcp import BCPCalculator, get_result_cache, get_step_cache
+
+
+class CalculatorPool:
+    """
+    Pool of reusable BCPCalculator instances, one small pool per provider.
+
+    Calculators (and their prompt handlers and providers) are built lazily on
+    first use and handed back to the pool after each job, so at most ``size``
+    calculators exist per provider.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        size: int,
+        factory: Optional[Callable[[str], BCPCalculator]] = None,
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            logger: The logger passed to the calculators
+            size: Maximum number of calculators per provider, usually the worker concurrency
+            factory: Optional function building a calculator for a provider name
+        """
+        self.logger = logger
+        self.size = max(1, size)
+        self.factory = factory or self._build_calculator
+        self._idle: Dict[str, "queue.LifoQueue[BCPCalculator]"] = {}
+        self._created: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _build_calculator(self, provider: str) -> BCPCalculator:
+        """Build a calculator sharing the process-wide caches."""
+        return BCPCalculator(
+            self.logger,
+            provider_name=provider,
+            result_cache=get_result_cache(),
+            step_cache=get_step_cache(),
+        )
+
+    @contextmanager
+    def acquire(self, provider: str) -> Iterator[BCPCalculator]:
+        """
+        Borrow a calculator for a provider.
+
+        Blocks when ``size`` calculators of the provider are already in use.
+
+        Args:
+            provider: The name of the LLM provider
+
+        Yields:
+            A calculator for the provider, returned to the pool on exit
+        """
+        provider = provider.lower()
+        with self._lock:
+            idle = self._idle.setdefault(provider, queue.LifoQueue())
+            create = idle.empty() and self._created.get(provider, 0) < self.size
+            if create:
+                self._created[provider] = self._created.get(provider, 0) + 1
+
+        if create:
+            try:
+                calculator = self.factory(provider)
+            except Exception:
+                with self._lock:
+                    self._created[provider] -= 1
+                raise
+        else:
+            calculator = idle.get()
+
+        try:
+            yield calculator
+        finally:
+            idle.put(calculator)
+
+    def preload(self, providers: List[str]) -> None:
+        """
+        Build one calculator per provider ahead of the first job.
+
+        Args:
+            providers: The names of the providers to warm up
+        """
+        for provider in providers:
+            try:
+                with self.acquire(provider):
+                    pass
+            except Exception as e:
+                self.logger.warning(f"Could not preload calculator for {provider}: {str(e)}")
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get the number of calculators created and idle per provider.
+
+        Returns:
+            A dictionary mapping provider names to their pool counters
+        """
+        with self._lock:
+            return {
+                provider: {"created": self._created.get(provider, 0), "idle": idle.qsize()}
+                for provider, idle in self._idle.items()
+            }
@@ -0,0 +1,67 @@
+"""
+Job progress events for the BCP Calculator API.
+"""
+
+import json
+import time
+from typing import Any, Dict, Optional
+
+from ..bcp.callbacks import BCPCallbackHandler
+from .job_store import JobStore
+
+# Events after which a job emits nothing else
+TERMINAL_EVENTS = ("job_completed", "job_failed")
+
+
+class JobEventRecorder(BCPCallbackHandler):
+    """Callback handler recording the step events of a calculation in the job store."""
+
+    def __init__(self, store: JobStore, job_id: str):
+        """
+        Initialize the recorder.
+
+        Args:
+            store: The job store receiving the events
+            job_id: The job whose calculation is followed
+        """
+        self.store = store
+        self.job_id = job_id
+
+    def on_step_start(self, step_name: str, story_name: str) -> None:
+        self.store.append_event(
+            self.job_id, {"event": "step_started", "step": step_name, "time": time.time()}
+        )
+
+    def on_step_end(
+        self,
+        step_name: str,
+        story_name: str,
+        response: Any,
+        error: Optional[Exception],
+        duration: float,
+    ) -> None:
+        self.store.append_event(
+            self.job_id,
+            {
+                "event": "step_failed" if error is not None else "step_completed",
+                "step": step_name,
+                "duration": duration,
+                "output": response,
+                "error": str(error) if error is not None else None,
+                "time": time.time(),
+            },
+        )
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """
+    Format a job event as a server-sent event.
+
+    Args:
+        event: The event, with its sequence number under ``id``
+
+    Returns:
+        The text of the server-sent event
+    """
+    data = json.dumps(event, ensure_ascii=False, default=str)
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {data}\n\n"
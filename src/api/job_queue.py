@@ -0,0 +1,267 @@
+"""
+Job queue for the BCP Calculator API.
+"""
+
+import contextvars
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted to a full queue."""
+
+    def __init__(self, retry_after: int):
+        """
+        Initialize the error.
+
+        Args:
+            retry_after: Suggested number of seconds to wait before retrying
+        """
+        super().__init__(f"Job queue is full, retry after {retry_after} seconds")
+        self.retry_after = retry_after
+
+
+class JobQueue:
+    """
+    Bounded FIFO job queue served by a fixed pool of worker threads.
+
+    Jobs run in a copy of the context they were submitted from, so the trace
+    span of the submitting request follows them into the worker thread.
+
+    Besides the overall worker concurrency, each provider can be capped so a
+    burst of jobs for one provider cannot trip its rate limits; jobs of other
+    providers keep flowing past them.
+
+    Batch jobs wait in a separate, larger backlog so a batch of hundreds of
+    stories does not need free slots in the queue of single jobs. Workers take
+    a batch job only when no single job can run, so single jobs are not stuck
+    behind a batch.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        workers: int = 4,
+        max_depth: int = 100,
+        max_backlog: int = 5000,
+        provider_limits: Optional[Dict[str, int]] = None,
+        default_provider_limit: Optional[int] = None,
+    ):
+        """
+        Initialize the queue.
+
+        Args:
+            logger: The logger instance
+            workers: Number of jobs running at the same time
+            max_depth: Maximum number of jobs waiting to run
+            max_backlog: Maximum number of batch jobs waiting to run
+            provider_limits: Maximum number of running jobs per provider name
+            default_provider_limit: Maximum number of running jobs for providers
+                without an explicit limit (default: no limit besides ``workers``)
+        """
+        self.logger = logger
+        self.workers = max(1, workers)
+        self.max_depth = max_depth
+        self.max_backlog = max_backlog
+        self.provider_limits = {k.lower(): v for k, v in (provider_limits or {}).items()}
+        self.default_provider_limit = default_provider_limit
+        self._pending: Deque[Dict[str, Any]] = deque()
+        self._backlog: Deque[Dict[str, Any]] = deque()
+        self._running: Dict[str, int] = {}
+        self._waits: Deque[float] = deque(maxlen=100)
+        self._durations: Deque[float] = deque(maxlen=100)
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+
+    def _limit(self, provider: str) -> int:
+        """Get the maximum number of running jobs for a provider."""
+        return self.provider_limits.get(provider, self.default_provider_limit or self.workers)
+
+    def _start_workers(self) -> None:
+        """Start the worker threads on first use."""
+        if self._threads:
+            return
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"bcp-job-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, job_id: str, provider: str, func: Callable[[], Any]) -> int:
+        """
+        Enqueue a job.
+
+        Args:
+            job_id: The job identifier
+            provider: The provider used by the job, for the per-provider limits
+            func: The function running the job
+
+        Returns:
+            The 1-based position of the job in the queue
+
+        Raises:
+            QueueFullError: If ``max_depth`` jobs are already waiting
+        """
+        with self._condition:
+            if len(self._pending) >= self.max_depth:
+                raise QueueFullError(self.retry_after())
+            self._start_workers()
+            self._pending.append(self._entry(job_id, provider, func))
+            self._condition.notify_all()
+            return len(self._pending)
+
+    def submit_batch(self, jobs: List[Tuple[str, str, Callable[[], Any]]]) -> None:
+        """
+        Enqueue the jobs of a batch in the batch backlog, all or none of them.
+
+        Args:
+            jobs: The identifier, provider and function of every job
+
+        Raises:
+            QueueFullError: If the backlog cannot hold every job
+        """
+        with self._condition:
+            if len(self._backlog) + len(jobs) > self.max_backlog:
+                raise QueueFullError(self.retry_after())
+            self._start_workers()
+            self._backlog.extend(self._entry(*job) for job in jobs)
+            self._condition.notify_all()
+
+    def _entry(self, job_id: str, provider: str, func: Callable[[], Any]) -> Dict[str, Any]:
+        """Build the queue entry of a job, capturing the context it was submitted from."""
+        return {
+            "job_id": job_id,
+            "provider": provider.lower(),
+            "func": func,
+            "context": contextvars.copy_context(),
+            "enqueued_at": time.time(),
+        }
+
+    def retry_after(self) -> int:
+        """
+        Estimate the seconds until a queue slot frees up, from the recent job run times.
+
+        Returns:
+            The suggested number of seconds to wait before submitting again
+        """
+        average = sum(self._durations) / len(self._durations) if self._durations else 60.0
+        return max(1, math.ceil(average / self.workers))
+
+    def _next_job(self) -> Dict[str, Any]:
+        """Wait for the oldest job whose provider has spare capacity, single jobs first."""
+        with self._condition:
+            while True:
+                for jobs in (self._pending, self._backlog):
+                    for job in jobs:
+                        if self._running.get(job["provider"], 0) < self._limit(job["provider"]):
+                            jobs.remove(job)
+                            self._running[job["provider"]] = (
+                                self._running.get(job["provider"], 0) + 1
+                            )
+                            job["started_at"] = time.time()
+                            self._waits.append(job["started_at"] - job["enqueued_at"])
+                            return job
+                self._condition.wait()
+
+    def _work(self) -> None:
+        """Worker loop running jobs until the process exits."""
+        while True:
+            job = self._next_job()
+            try:
+                job["context"].run(job["func"])
+            except Exception as e:
+                self.logger.error(f"Job {job['job_id']} failed: {str(e)}")
+            finally:
+                with self._condition:
+                    self._running[job["provider"]] -= 1
+                    self._durations.append(time.time() - job["started_at"])
+                    self._condition.notify_all()
+
+    def free_slots(self) -> int:
+        """
+        Get the number of jobs that can still be queued.
+
+        Returns:
+            The number of free queue slots
+        """
+        with self._condition:
+            return max(0, self.max_depth - len(self._pending))
+
+    def position(self, job_id: str) -> Optional[int]:
+        """
+        Get the position of a job in the queue.
+
+        Args:
+            job_id: The job identifier
+
+        Returns:
+            The 1-based position of the job, batch jobs counting after the
+            single jobs, or None if it is not waiting
+        """
+        with self._condition:
+            for index, job in enumerate(self._pending + self._backlog):
+                if job["job_id"] == job_id:
+                    return index + 1
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the queue figures.
+
+        Returns:
+            A dictionary with the queue depth, running jobs overall and per
+            provider, and the average wait and run times of recent jobs
+        """
+        with self._condition:
+            return {
+                "queue_depth": len(self._pending),
+                "max_depth": self.max_depth,
+                "backlog_depth": len(self._backlog),
+                "max_backlog": self.max_backlog,
+                "in_flight": sum(self._running.values()),
+                "workers": self.workers,
+                "running_by_provider": {p: n for p, n in self._running.items() if n},
+                "avg_wait_time": sum(self._waits) / len(self._waits) if self._waits else 0.0,
+                "avg_run_time": (
+                    sum(self._durations) / len(self._durations) if self._durations else 0.0
+                ),
+            }
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until no job or batch job is waiting or running.
+
+        Args:
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            True if the queue is idle, False if the timeout expired
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._pending and not self._backlog and not any(self._running.values()),
+                timeout=timeout,
+            )
+
+
+def parse_provider_limits(value: str) -> Dict[str, int]:
+    """
+    Parse per-provider limits from a "provider=limit,provider=limit" string.
+
+    Args:
+        value: The limits specification
+
+    Returns:
+        A dictionary mapping provider names to their limits
+    """
+    limits = {}
+    for item in value.split(","):
+        if "=" in item:
+            provider, limit = item.split("=", 1)
+            limits[provider.strip().lower()] = int(limit)
+    return limits
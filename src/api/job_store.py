@@ -0,0 +1,465 @@
+"""
+Job store for the BCP Calculator API.
+
+Jobs are kept in a local SQLite database by default, so every uvicorn worker
+process of a host sees the same jobs, with an in-memory store for tests and
+single-process deployments.
+"""
+
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from ..bcp.cache import default_cache_dir
+
+FINISHED_STATUSES = ("completed", "failed")
+
+# Fields kept when a result is larger than the configured maximum size
+SUMMARY_FIELDS = ("story_name", "total_bcp", "breakdown", "error")
+
+
+class JobStore(ABC):
+    """
+    Base class of the job stores.
+
+    A job is a dictionary with at least a ``status``; finished jobs (completed
+    or failed) are evicted ``ttl`` seconds after they finish, and results
+    larger than ``max_result_bytes`` are reduced to their summary fields.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_result_bytes: Optional[int] = None):
+        """
+        Initialize the store.
+
+        Args:
+            ttl: Seconds a finished job is retained, or None to keep it forever
+            max_result_bytes: Maximum size of a stored result in bytes of JSON,
+                or None for no limit
+        """
+        self.ttl = ttl
+        self.max_result_bytes = max_result_bytes
+
+    @abstractmethod
+    def create(self, job_id: str, **fields: Any) -> None:
+        """
+        Store a new job.
+
+        Args:
+            job_id: The job identifier
+            **fields: The job fields, including its ``status``
+        """
+        pass
+
+    @abstractmethod
+    def update(self, job_id: str, **fields: Any) -> None:
+        """
+        Update some fields of a job.
+
+        Args:
+            job_id: The job identifier
+            **fields: The fields to set
+        """
+        pass
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job.
+
+        Args:
+            job_id: The job identifier
+
+        Returns:
+            A copy of the job fields, or None if the job is unknown or expired
+        """
+        pass
+
+    def get_many(self, job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get several jobs at once.
+
+        Args:
+            job_ids: The job identifiers
+
+        Returns:
+            A dictionary mapping the identifiers of the jobs found to copies of their fields
+        """
+        jobs = {}
+        for job_id in job_ids:
+            job = self.get(job_id)
+            if job is not None:
+                jobs[job_id] = job
+        return jobs
+
+    @abstractmethod
+    def append_event(self, job_id: str, event: Dict[str, Any]) -> int:
+        """
+        Record a progress event of a job.
+
+        Args:
+            job_id: The job identifier
+            event: The event fields (must be JSON serializable)
+
+        Returns:
+            The 1-based sequence number of the event within the job
+        """
+        pass
+
+    @abstractmethod
+    def get_events(self, job_id: str, after: int = 0) -> List[Dict[str, Any]]:
+        """
+        Get the progress events of a job.
+
+        Args:
+            job_id: The job identifier
+            after: Only return the events with a sequence number greater than this one
+
+        Returns:
+            The events in order, each with its sequence number under ``id``
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, job_id: str) -> None:
+        """
+        Remove a job.
+
+        Args:
+            job_id: The job identifier
+        """
+        pass
+
+    @abstractmethod
+    def count(self, status: Optional[str] = None) -> int:
+        """
+        Count the stored jobs.
+
+        Args:
+            status: Only count the jobs with this status
+
+        Returns:
+            The number of jobs
+        """
+        pass
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """
+        Remove the finished jobs older than the TTL.
+
+        Returns:
+            The number of removed jobs
+        """
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Remove every job."""
+        pass
+
+    def _prepare(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Stamp the finish time of finished jobs and cap the size of their result."""
+        fields = dict(fields)
+        if fields.get("status") in FINISHED_STATUSES:
+            fields.setdefault("finished_at", time.time())
+        result = fields.get("result")
+        if self.max_result_bytes is not None and isinstance(result, dict):
+            if len(json.dumps(result, ensure_ascii=False).encode("utf-8")) > self.max_result_bytes:
+                fields["result"] = {key: result[key] for key in SUMMARY_FIELDS if key in result}
+                fields["result"]["truncated"] = True
+        return fields
+
+    def _expired(self, job: Dict[str, Any], now: float) -> bool:
+        """Check whether a finished job has outlived the TTL."""
+        finished_at = job.get("finished_at")
+        return self.ttl is not None and finished_at is not None and now - finished_at > self.ttl
+
+
+class MemoryJobStore(JobStore):
+    """Job store keeping the jobs in a dictionary of the current process."""
+
+    def __init__(self, ttl: Optional[float] = None, max_result_bytes: Optional[int] = None):
+        """
+        Initialize the store.
+
+        Args:
+            ttl: Seconds a finished job is retained, or None to keep it forever
+            max_result_bytes: Maximum size of a stored result in bytes of JSON
+        """
+        super().__init__(ttl, max_result_bytes)
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._events: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id: str, **fields: Any) -> None:
+        fields = self._prepare(fields)
+        self.purge_expired()
+        with self._lock:
+            self._jobs[job_id] = fields
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        fields = self._prepare(fields)
+        with self._lock:
+            self._jobs.setdefault(job_id, {}).update(fields)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or self._expired(job, time.time()):
+                return None
+            return copy.deepcopy(job)
+
+    def append_event(self, job_id: str, event: Dict[str, Any]) -> int:
+        with self._lock:
+            events = self._events.setdefault(job_id, [])
+            events.append(dict(event, id=len(events) + 1))
+            return len(events)
+
+    def get_events(self, job_id: str, after: int = 0) -> List[Dict[str, Any]]:
+        with self._lock:
+            return copy.deepcopy(self._events.get(job_id, [])[after:])
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._jobs.pop(job_id, None)
+            self._events.pop(job_id, None)
+
+    def count(self, status: Optional[str] = None) -> int:
+        with self._lock:
+            return sum(
+                1 for job in self._jobs.values() if status is None or job.get("status") == status
+            )
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items() if self._expired(job, now)]
+            for job_id in expired:
+                del self._jobs[job_id]
+                self._events.pop(job_id, None)
+        return len(expired)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._jobs.clear()
+            self._events.clear()
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Job store backed by a local SQLite database.
+
+    Every thread (and every process) opens its own connection; the database
+    runs in WAL mode so worker processes can read while another one writes.
+    """
+
+    # Minimum number of seconds between two purges of expired jobs
+    PURGE_INTERVAL = 60
+
+    def __init__(
+        self, path: str, ttl: Optional[float] = None, max_result_bytes: Optional[int] = None
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            path: Path of the SQLite database
+            ttl: Seconds a finished job is retained, or None to keep it forever
+            max_result_bytes: Maximum size of a stored result in bytes of JSON
+        """
+        super().__init__(ttl, max_result_bytes)
+        self.path = path
+        self._local = threading.local()
+        self._last_purge = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " finished_at REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (finished_at)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_events ("
+            " job_id TEXT NOT NULL,"
+            " seq INTEGER NOT NULL,"
+            " data TEXT NOT NULL,"
+            " PRIMARY KEY (job_id, seq))"
+        )
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection of the current thread, reopening it after a fork."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def create(self, job_id: str, **fields: Any) -> None:
+        fields = self._prepare(fields)
+        now = time.time()
+        if now - self._last_purge > self.PURGE_INTERVAL:
+            self.purge_expired()
+        self._connection().execute(
+            "INSERT OR REPLACE INTO jobs (id, status, data, created_at, updated_at, finished_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                job_id,
+                fields.get("status", "pending"),
+                json.dumps(fields, ensure_ascii=False),
+                now,
+                now,
+                fields.get("finished_at"),
+            ),
+        )
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        fields = self._prepare(fields)
+        conn = self._connection()
+        # Read-modify-write under a write lock so concurrent writers do not lose fields
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            job = json.loads(row[0]) if row else {}
+            job.update(fields)
+            now = time.time()
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs"
+                " (id, status, data, created_at, updated_at, finished_at)"
+                " VALUES (?, ?, ?, COALESCE((SELECT created_at FROM jobs WHERE id = ?), ?), ?, ?)",
+                (
+                    job_id,
+                    job.get("status", "pending"),
+                    json.dumps(job, ensure_ascii=False),
+                    job_id,
+                    now,
+                    now,
+                    job.get("finished_at"),
+                ),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = json.loads(row[0])
+        if self._expired(job, time.time()):
+            return None
+        return job
+
+    def get_many(self, job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        jobs = {}
+        unique_ids = list(dict.fromkeys(job_ids))
+        now = time.time()
+        # Stay below the SQLite limit on the number of query parameters
+        for start in range(0, len(unique_ids), 500):
+            chunk = unique_ids[start : start + 500]
+            rows = (
+                self._connection()
+                .execute(
+                    f"SELECT id, data FROM jobs WHERE id IN ({', '.join('?' * len(chunk))})", chunk
+                )
+                .fetchall()
+            )
+            for job_id, data in rows:
+                job = json.loads(data)
+                if not self._expired(job, now):
+                    jobs[job_id] = job
+        return jobs
+
+    def append_event(self, job_id: str, event: Dict[str, Any]) -> int:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            seq = conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) + 1 FROM job_events WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+            conn.execute(
+                "INSERT INTO job_events (job_id, seq, data) VALUES (?, ?, ?)",
+                (job_id, seq, json.dumps(event, ensure_ascii=False, default=str)),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return seq
+
+    def get_events(self, job_id: str, after: int = 0) -> List[Dict[str, Any]]:
+        rows = (
+            self._connection()
+            .execute(
+                "SELECT seq, data FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, after),
+            )
+            .fetchall()
+        )
+        return [dict(json.loads(data), id=seq) for seq, data in rows]
+
+    def delete(self, job_id: str) -> None:
+        self._connection().execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        self._connection().execute("DELETE FROM job_events WHERE job_id = ?", (job_id,))
+
+    def count(self, status: Optional[str] = None) -> int:
+        if status is None:
+            row = self._connection().execute("SELECT COUNT(*) FROM jobs").fetchone()
+        else:
+            row = (
+                self._connection()
+                .execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,))
+                .fetchone()
+            )
+        return row[0]
+
+    def purge_expired(self) -> int:
+        self._last_purge = time.time()
+        if self.ttl is None:
+            return 0
+        conn = self._connection()
+        cursor = conn.execute(
+            "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+            (self._last_purge - self.ttl,),
+        )
+        conn.execute("DELETE FROM job_events WHERE job_id NOT IN (SELECT id FROM jobs)")
+        return max(cursor.rowcount, 0)
+
+    def clear(self) -> None:
+        self._connection().execute("DELETE FROM jobs")
+        self._connection().execute("DELETE FROM job_events")
+
+
+def get_job_store() -> JobStore:
+    """
+    Build the job store configured through the environment.
+
+    BCP_JOB_STORE selects the backend (sqlite or memory, default: sqlite),
+    BCP_JOB_DB_PATH the SQLite database (default: jobs.sqlite in BCP_CACHE_DIR),
+    BCP_JOB_TTL the retention of finished jobs in seconds (default: 1 day) and
+    BCP_JOB_MAX_RESULT_BYTES the maximum stored result size (default: 1 MB).
+
+    Returns:
+        The job store
+    """
+    ttl = float(os.environ.get("BCP_JOB_TTL", str(24 * 3600)))
+    max_result_bytes = int(os.environ.get("BCP_JOB_MAX_RESULT_BYTES", str(1024 * 1024)))
+    if os.environ.get("BCP_JOB_STORE", "sqlite").lower() == "memory":
+        return MemoryJobStore(ttl=ttl, max_result_bytes=max_result_bytes)
+    path = os.environ.get("BCP_JOB_DB_PATH") or os.path.join(default_cache_dir(), "jobs.sqlite")
+    return SQLiteJobStore(path, ttl=ttl, max_result_bytes=max_result_bytes)
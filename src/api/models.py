@@ -2,8 +2,9 @@
 Pydantic models for the BCP Calculator API.
 """
 
+from typing import Any, Dict, List, Optional
+
 from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional, List
 
 
 class StoryRequest(BaseModel):
@@ -17,4 +18,62 @@ class JobStatus(BaseModel):
     job_id: str = Field(..., description="Unique identifier for the job")
     status: str = Field(..., description="Current status of the job (pending, processing, completed, failed)")
     result: Optional[Dict[str, Any]] = Field(None, description="Results of the BCP calculation if completed")
-    error: Optional[str] = Field(None, description="Error message if job failed")
\ No newline at end of file
+    error: Optional[str] = Field(None, description="Error message if job failed")
+    queue_position: Optional[int] = Field(
+        None, description="Position of the job in the queue while pending"
+    )
+    queue_depth: Optional[int] = Field(None, description="Number of jobs waiting in the queue")
+    wait_time: Optional[float] = Field(
+        None, description="Seconds the job waited (or has been waiting) in the queue"
+    )
+
+
+class BatchRequest(BaseModel):
+    """Request model for a batch of BCP calculations."""
+
+    stories: List[str] = Field(..., min_length=1, description="User story contents")
+    provider: str = Field("openai", description="LLM provider to use for every story")
+
+
+class BatchItem(BaseModel):
+    """Progress of one story of a batch."""
+
+    index: int = Field(..., description="Position of the story in the submitted list")
+    job_id: str = Field(..., description="Job computing the story (shared by identical stories)")
+    status: str = Field(..., description="Current status of the job")
+    total_bcp: Optional[float] = Field(None, description="Total BCP of the story once completed")
+    result: Optional[Dict[str, Any]] = Field(
+        None, description="Results of the BCP calculation if completed"
+    )
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+
+
+class BatchStatus(BaseModel):
+    """Response model for batch status."""
+
+    batch_id: str = Field(..., description="Unique identifier for the batch")
+    status: str = Field(..., description="Status of the batch (pending, processing, completed)")
+    provider: str = Field(..., description="LLM provider used by the batch")
+    total: int = Field(..., description="Number of submitted stories")
+    unique: int = Field(..., description="Number of distinct stories actually calculated")
+    counts: Dict[str, int] = Field(..., description="Number of stories per job status")
+    usage: Dict[str, Dict[str, Any]] = Field(
+        default_factory=dict,
+        description="Token usage and cost of the finished stories per provider/model",
+    )
+    items: List[BatchItem] = Field(
+        ..., description="Progress of every story, without the full results"
+    )
+
+
+class BatchResults(BaseModel):
+    """Response model for a page of batch results."""
+
+    batch_id: str = Field(..., description="Unique identifier for the batch")
+    offset: int = Field(..., description="Index of the first story of the page")
+    limit: int = Field(..., description="Maximum number of stories per page")
+    total: int = Field(..., description="Number of submitted stories")
+    next_offset: Optional[int] = Field(None, description="Offset of the next page, if any")
+    items: List[BatchItem] = Field(
+        ..., description="Progress and results of the stories of the page"
+    )
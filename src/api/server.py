@@ -2,25 +2,141 @@
 FastAPI server for the BCP Calculator API.
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from typing import Dict, Any
+import asyncio
 import logging
 import os
+import threading
+import time
 import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional
 
-from .models import StoryRequest, JobStatus
-from ..bcp import BCPCalculator, setup_logger
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+from ..bcp import setup_logger
+from ..bcp.callbacks import load_callbacks_from_env
+from ..bcp.metrics import CONTENT_TYPE, Gauge, get_metrics
+from ..bcp.templates import get_prompt_templates
+from ..bcp.tracing import remote_parent, start_span
+from ..bcp.usage import rollup_usage
+from .calculator_pool import CalculatorPool
+from .events import TERMINAL_EVENTS, JobEventRecorder, format_sse
+from .job_queue import JobQueue, QueueFullError, parse_provider_limits
+from .job_store import FINISHED_STATUSES, JobStore, get_job_store
+from .models import BatchRequest, BatchResults, BatchStatus, JobStatus, StoryRequest
+
+# Job storage shared by the worker processes (SQLite by default, see BCP_JOB_STORE),
+# opened on first use so importing the server creates no database
+job_store: Optional[JobStore] = None
+_job_store_lock = threading.Lock()
+
+# Serializes the updates of the finished job counters of the batches
+_batch_lock = threading.Lock()
+
+logger = setup_logger(logging.INFO)
+
+# Jobs run on a bounded queue: BCP_API_WORKERS jobs at a time, at most
+# BCP_API_PROVIDER_CONCURRENCY per provider, BCP_API_MAX_QUEUE waiting and
+# BCP_API_MAX_BATCH_BACKLOG batch jobs waiting behind them
+job_queue = JobQueue(
+    logger,
+    workers=int(os.environ.get("BCP_API_WORKERS", "4")),
+    max_depth=int(os.environ.get("BCP_API_MAX_QUEUE", "100")),
+    max_backlog=int(os.environ.get("BCP_API_MAX_BATCH_BACKLOG", "5000")),
+    provider_limits=parse_provider_limits(os.environ.get("BCP_API_PROVIDER_CONCURRENCY", "")),
+)
+
+# Maximum number of stories accepted by /calculate/batch
+max_batch_size = int(os.environ.get("BCP_API_MAX_BATCH", "1000"))
+
+# Long-poll and event stream settings: longest /status?wait=, store polling
+# interval and keep-alive interval of the event streams, in seconds
+max_wait = float(os.environ.get("BCP_API_MAX_WAIT", "60"))
+poll_interval = float(os.environ.get("BCP_API_POLL_INTERVAL", "0.25"))
+keepalive_interval = 15.0
+
+# Calculators are reused across jobs, at most one per concurrent worker and provider
+calculator_pool = CalculatorPool(logger, size=job_queue.workers)
+
+# Calculation metrics served on /metrics, with the job queue figures read at scrape time
+metrics = get_metrics()
+queue_depth_gauge = metrics.registry.register(
+    Gauge("bcp_queue_depth", "Jobs waiting in the API job queue")
+)
+backlog_depth_gauge = metrics.registry.register(
+    Gauge("bcp_batch_backlog_depth", "Batch jobs waiting in the API job queue")
+)
+queue_running_gauge = metrics.registry.register(
+    Gauge("bcp_queue_running_jobs", "Jobs running per provider", ("provider",))
+)
+queue_wait_gauge = metrics.registry.register(
+    Gauge("bcp_queue_wait_seconds", "Average queue wait of the recent jobs")
+)
+
+
+def collect_queue_metrics() -> None:
+    """Copy the job queue figures into the metrics."""
+    stats = job_queue.stats()
+    queue_depth_gauge.set(stats["queue_depth"])
+    backlog_depth_gauge.set(stats["backlog_depth"])
+    metrics.jobs_in_flight.set(stats["in_flight"])
+    queue_wait_gauge.set(stats["avg_wait_time"])
+    queue_running_gauge.clear()
+    for provider, running in stats["running_by_provider"].items():
+        queue_running_gauge.set(running, provider=provider)
+
+
+metrics.registry.add_collector(collect_queue_metrics)
+
+
+def get_store() -> JobStore:
+    """
+    Get the job store of the server, opening it on first use.
+
+    Returns:
+        The job store configured through the environment (see ``get_job_store``)
+    """
+    global job_store
+
+    if job_store is None:
+        with _job_store_lock:
+            if job_store is None:
+                job_store = get_job_store()
+    return job_store
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the job store and warm up shared resources before serving requests."""
+    get_store()
+    get_prompt_templates().precompile()
+    load_callbacks_from_env()
+    preload = os.environ.get("BCP_API_PRELOAD_PROVIDERS", "")
+    calculator_pool.preload([p.strip() for p in preload.split(",") if p.strip()])
+    yield
 
-# In-memory job storage (replace with database for production)
-jobs = {}
 
 app = FastAPI(
     title="BCP Calculator API",
     description="API for calculating Business Complexity Points (BCP) of user stories",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Record a span per request, continuing the trace of the caller's traceparent header."""
+    with remote_parent(request.headers.get("traceparent")):
+        with start_span("http.request", method=request.method, path=request.url.path) as span:
+            response = await call_next(request)
+            if span is not None:
+                span.set_attribute("status_code", response.status_code)
+                response.headers["traceparent"] = span.traceparent
+            return response
+
+
 @app.get("/")
 def read_root():
     """Root endpoint returning API information."""
@@ -31,50 +147,357 @@ def read_root():
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics_text():
+    """Prometheus metrics of the calculations, job queue and caches."""
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
+
 @app.post("/calculate", response_model=Dict[str, str])
-def calculate_bcp(story: StoryRequest, background_tasks: BackgroundTasks):
+def calculate_bcp(story: StoryRequest):
     """Start BCP calculation job."""
     job_id = str(uuid.uuid4())
-    jobs[job_id] = {"status": "pending", "result": None}
-    
-    background_tasks.add_task(
-        process_bcp_calculation, 
-        job_id=job_id,
-        story_content=story.content,
-        provider=story.provider
-    )
-    
+    try:
+        enqueue_job(job_id, story.content, story.provider)
+    except QueueFullError as e:
+        raise queue_full_error(e.retry_after)
+
     return {"job_id": job_id}
 
 
+@app.post("/calculate/batch", response_model=Dict[str, Any])
+def calculate_batch(batch: BatchRequest):
+    """Start BCP calculation jobs for a batch of stories, computing identical stories once."""
+    if len(batch.stories) > max_batch_size:
+        raise HTTPException(
+            status_code=413, detail=f"A batch accepts at most {max_batch_size} stories"
+        )
+
+    job_ids: Dict[str, str] = {}
+    for content in batch.stories:
+        if content not in job_ids:
+            job_ids[content] = str(uuid.uuid4())
+    if len(job_ids) > job_queue.max_backlog:
+        raise HTTPException(
+            status_code=413,
+            detail=f"A batch accepts at most {job_queue.max_backlog} distinct stories",
+        )
+
+    # The batch is stored first, so every job finishing finds it
+    batch_id = str(uuid.uuid4())
+    get_store().create(
+        batch_id,
+        kind="batch",
+        status="pending",
+        provider=batch.provider,
+        job_ids=[job_ids[content] for content in batch.stories],
+        unique=len(job_ids),
+        completed=0,
+        failed=0,
+        submitted_at=time.time(),
+    )
+    for job_id in job_ids.values():
+        get_store().create(job_id, status="pending", result=None, submitted_at=time.time())
+    try:
+        job_queue.submit_batch(
+            [
+                (job_id, batch.provider, make_job(job_id, content, batch.provider, batch_id))
+                for content, job_id in job_ids.items()
+            ]
+        )
+    except QueueFullError as e:
+        for job_id in [batch_id, *job_ids.values()]:
+            get_store().delete(job_id)
+        raise queue_full_error(e.retry_after)
+
+    return {"batch_id": batch_id, "total": len(batch.stories), "unique": len(job_ids)}
+
+
+@app.get("/batches/{batch_id}", response_model=BatchStatus)
+def get_batch_status(batch_id: str):
+    """Get the progress of every story of a batch, without the full results."""
+    batch = get_batch(batch_id)
+    jobs = get_store().get_many(list(set(batch["job_ids"])))
+    items = batch_items(batch, 0, len(batch["job_ids"]), with_results=False, jobs=jobs)
+
+    counts: Dict[str, int] = {}
+    for item in items:
+        counts[item["status"]] = counts.get(item["status"], 0) + 1
+
+    return {
+        "batch_id": batch_id,
+        "status": batch_status(batch, jobs),
+        "provider": batch["provider"],
+        "total": len(items),
+        "unique": len(set(batch["job_ids"])),
+        "counts": counts,
+        # Usage of distinct stories only: duplicates were calculated once
+        "usage": rollup_usage(job.get("result") for job in jobs.values()),
+        "items": items,
+    }
+
+
+@app.get("/batches/{batch_id}/results", response_model=BatchResults)
+def get_batch_results(
+    batch_id: str, offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500)
+):
+    """Get a page of the stories of a batch with their results."""
+    batch = get_batch(batch_id)
+    total = len(batch["job_ids"])
+    return {
+        "batch_id": batch_id,
+        "offset": offset,
+        "limit": limit,
+        "total": total,
+        "next_offset": offset + limit if offset + limit < total else None,
+        "items": batch_items(batch, offset, limit, with_results=True),
+    }
+
+
 @app.get("/status/{job_id}", response_model=JobStatus)
-def get_status(job_id: str):
-    """Get job status and results if complete."""
-    if job_id not in jobs:
+async def get_status(job_id: str, wait: float = Query(0, ge=0)):
+    """Get job status and results if complete, waiting up to ``wait`` seconds for a change."""
+    job = await asyncio.to_thread(get_store().get, job_id)
+    if job is None or job.get("kind") == "batch":
         raise HTTPException(status_code=404, detail="Job not found")
-    
+
+    initial_status = job["status"]
+    deadline = time.monotonic() + min(wait, max_wait)
+    while (
+        job["status"] == initial_status
+        and job["status"] not in FINISHED_STATUSES
+        and time.monotonic() < deadline
+    ):
+        await asyncio.sleep(poll_interval)
+        job = await asyncio.to_thread(get_store().get, job_id) or job
+
+    wait_time = None
+    if "submitted_at" in job:
+        wait_time = job.get("started_at", time.time()) - job["submitted_at"]
+
     return {
         "job_id": job_id,
-        "status": jobs[job_id]["status"],
-        "result": jobs[job_id].get("result"),
-        "error": jobs[job_id].get("error")
+        "status": job["status"],
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "queue_position": job_queue.position(job_id),
+        "queue_depth": job_queue.stats()["queue_depth"],
+        "wait_time": wait_time,
     }
 
 
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """Stream the progress events of a job as server-sent events until it finishes."""
+    job = await asyncio.to_thread(get_store().get, job_id)
+    if job is None or job.get("kind") == "batch":
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    # Clients reconnecting after a dropped stream resume after the last event they saw
+    last_id = int(request.headers.get("last-event-id") or 0)
+
+    async def event_stream():
+        nonlocal last_id
+        idle = 0.0
+        finished = False
+        while True:
+            events = await asyncio.to_thread(get_store().get_events, job_id, last_id)
+            for event in events:
+                last_id = event["id"]
+                yield format_sse(event)
+                if event["event"] in TERMINAL_EVENTS:
+                    return
+            # The terminal event is recorded before the final status, so once the
+            # job is seen finished a last read returns every remaining event
+            if finished or await request.is_disconnected():
+                return
+            if not events:
+                job = await asyncio.to_thread(get_store().get, job_id)
+                finished = job is None or job["status"] in FINISHED_STATUSES
+                if finished:
+                    continue
+                if idle >= keepalive_interval:
+                    yield ": keep-alive\n\n"
+                    idle = 0.0
+                await asyncio.sleep(poll_interval)
+                idle += poll_interval
+            else:
+                idle = 0.0
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def make_job(
+    job_id: str, story_content: str, provider: str, batch_id: Optional[str] = None
+) -> Callable[[], None]:
+    """
+    Build the function running a job on the queue.
+
+    Args:
+        job_id: The job identifier
+        story_content: The story to calculate
+        provider: The LLM provider of the calculation
+        batch_id: The batch of the job, whose counters are updated once the job finishes
+
+    Returns:
+        The function calculating the story
+    """
+
+    def run() -> None:
+        process_bcp_calculation(job_id=job_id, story_content=story_content, provider=provider)
+        if batch_id is not None:
+            record_batch_job(batch_id, job_id)
+
+    return run
+
+
+def enqueue_job(job_id: str, story_content: str, provider: str) -> None:
+    """
+    Store a pending job and queue its calculation.
+
+    Args:
+        job_id: The job identifier
+        story_content: The story to calculate
+        provider: The LLM provider of the calculation
+
+    Raises:
+        QueueFullError: If the job queue is full
+    """
+    get_store().create(job_id, status="pending", result=None, submitted_at=time.time())
+    try:
+        job_queue.submit(job_id, provider, make_job(job_id, story_content, provider))
+    except QueueFullError:
+        get_store().delete(job_id)
+        raise
+
+
+def queue_full_error(retry_after: int) -> HTTPException:
+    """Build the 429 error returned when the job queue is full."""
+    return HTTPException(
+        status_code=429,
+        detail="Job queue is full, retry later",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def get_batch(batch_id: str) -> Dict[str, Any]:
+    """Get a batch record or raise a 404 error."""
+    batch = get_store().get(batch_id)
+    if batch is None or batch.get("kind") != "batch":
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return batch
+
+
+def batch_status(batch: Dict[str, Any], jobs: Dict[str, Dict[str, Any]]) -> str:
+    """
+    Aggregate the status of a batch from the jobs of its stories.
+
+    Args:
+        batch: The batch record
+        jobs: The jobs of the batch found in the store, by identifier
+
+    Returns:
+        completed once every job finished (or was evicted), processing once one
+        started, pending otherwise
+    """
+    if batch["status"] == "completed":
+        return "completed"
+    # Finished jobs may have been evicted by the job store TTL
+    statuses = [jobs.get(job_id, {"status": "expired"})["status"] for job_id in batch["job_ids"]]
+    if all(status in FINISHED_STATUSES or status == "expired" for status in statuses):
+        return "completed"
+    if any(status != "pending" for status in statuses):
+        return "processing"
+    return "pending"
+
+
+def record_batch_job(batch_id: str, job_id: str) -> None:
+    """
+    Count a finished job of a batch, completing the batch with its last job.
+
+    The batch keeps the number of its completed and failed jobs, so each job
+    reads the batch and its own job only. Completing the batch stamps its
+    finish time, so the job store evicts it after its TTL like any finished job.
+
+    Args:
+        batch_id: The batch identifier
+        job_id: The identifier of the finished job
+    """
+    with _batch_lock:
+        batch = get_store().get(batch_id)
+        if batch is None or batch.get("kind") != "batch":
+            return
+        job = get_store().get(job_id)
+        counter = "completed" if job is not None and job["status"] == "completed" else "failed"
+        counts = {counter: batch[counter] + 1}
+        if batch["completed"] + batch["failed"] + 1 >= batch["unique"]:
+            counts["status"] = "completed"
+        get_store().update(batch_id, **counts)
+
+
+def batch_items(
+    batch: Dict[str, Any],
+    offset: int,
+    limit: int,
+    with_results: bool,
+    jobs: Dict[str, Dict[str, Any]] | None = None,
+) -> List[Dict[str, Any]]:
+    """Build the progress entries of a slice of a batch, reusing ``jobs`` when already read."""
+    job_ids = batch["job_ids"][offset : offset + limit]
+    if jobs is None:
+        jobs = get_store().get_many(job_ids)
+    items = []
+    for index, job_id in enumerate(job_ids, start=offset):
+        # Finished jobs may have been evicted by the job store TTL
+        job = jobs.get(job_id, {"status": "expired"})
+        result = job.get("result")
+        items.append(
+            {
+                "index": index,
+                "job_id": job_id,
+                "status": job["status"],
+                "total_bcp": result.get("total_bcp") if result else None,
+                "result": result if with_results else None,
+                "error": job.get("error"),
+            }
+        )
+    return items
+
+
 def process_bcp_calculation(job_id: str, story_content: str, provider: str):
     """Process BCP calculation in background."""
-    logger = setup_logger(logging.INFO)
-    
-    try:
-        # Update status to processing
-        jobs[job_id]["status"] = "processing"
-        
-        # Calculate BCP
-        calculator = BCPCalculator(logger, provider_name=provider)
-        result = calculator.calculate_bcp(story_content)
-        
-        # Update job with results
-        jobs[job_id] = {"status": "completed", "result": result}
-    except Exception as e:
-        logger.error(f"Error calculating BCP: {str(e)}")
-        jobs[job_id] = {"status": "failed", "error": str(e)}
\ No newline at end of file
+    with start_span("bcp.job", job_id=job_id, provider=provider) as span:
+        try:
+            # Update status to processing
+            get_store().update(job_id, status="processing", started_at=time.time())
+            get_store().append_event(job_id, {"event": "job_started", "time": time.time()})
+
+            # Calculate BCP, recording the step events for /jobs/{job_id}/events and /metrics
+            with calculator_pool.acquire(provider) as calculator:
+                result = calculator.calculate_bcp(
+                    story_content,
+                    callbacks=[JobEventRecorder(get_store(), job_id), metrics.handler(provider)],
+                )
+
+            # Update job with results
+            get_store().append_event(
+                job_id,
+                {
+                    "event": "job_completed",
+                    "total_bcp": result.get("total_bcp"),
+                    "time": time.time(),
+                },
+            )
+            get_store().update(job_id, status="completed", result=result)
+        except Exception as e:
+            if span is not None:
+                span.record_error(e)
+            logger.error(f"Error calculating BCP: {str(e)}")
+            get_store().append_event(
+                job_id, {"event": "job_failed", "error": str(e), "time": time.time()}
+            )
+            get_store().update(job_id, status="failed", error=str(e))
@@ -3,20 +3,51 @@ Business Complexity Points (BCP) Calculator
 
 This package provides tools for calculating Business Complexity Points
 for user stories using various LLM providers.
+
+The exports are imported on first use, so importing the package stays cheap
+and only the modules, and LLM client libraries, a program uses are loaded.
 """
 
-from .bcp_calculator import BCPCalculator
-from .prompt_handler import PromptHandler
-from .llm_providers import get_provider, LLMProvider, OpenAIProvider, ClaudeProvider
-from .logger import setup_logger, StepLogger
-
-__all__ = [
-    'BCPCalculator',
-    'PromptHandler',
-    'LLMProvider',
-    'OpenAIProvider',
-    'ClaudeProvider',
-    'get_provider',
-    'setup_logger',
-    'StepLogger',
-]
\ No newline at end of file
+import importlib
+from typing import Any, Dict
+
+# Submodule defining each export
+_EXPORTS: Dict[str, str] = {
+    "BCPCalculator": "bcp_calculator",
+    "PromptHandler": "prompt_handler",
+    "LLMProvider": "llm_providers",
+    "OpenAIProvider": "llm_providers",
+    "ClaudeProvider": "llm_providers",
+    "get_provider": "llm_providers",
+    "setup_logger": "logger",
+    "StepLogger": "logger",
+    "PersistentCache": "cache",
+    "get_result_cache": "cache",
+    "get_step_cache": "cache",
+    "BCPCallbackHandler": "callbacks",
+    "register_callback": "callbacks",
+    "unregister_callback": "callbacks",
+    "Cassette": "cassette",
+    "CassetteMissError": "cassette",
+    "open_cassette": "cassette",
+    "RateLimiter": "rate_limit",
+    "get_rate_limiter": "rate_limit",
+    "set_rate_limit": "rate_limit",
+    "rate_limit_scope": "rate_limit",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    """Import the submodule of an export the first time the export is used."""
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    """List the attributes of the package, including the exports not imported yet."""
+    return sorted(list(globals()) + __all__)
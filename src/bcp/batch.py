@@ -0,0 +1,225 @@
+"""
+Streaming batch execution and output.
+
+This module runs a batch of items on a pool of threads, with only a bounded
+window of them queued, and writes the batch results to a JSON Lines file as
+each item finishes, with a checkpoint index of the byte offset of every result,
+so an interrupted batch keeps the finished items and can resume where it stopped.
+"""
+
+import contextvars
+import json
+import os
+import threading
+from collections.abc import Mapping
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple, TypeVar, Union
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def run_windowed(
+    items: Iterable[T],
+    work: Callable[[T], R],
+    max_concurrency: int,
+    on_result: Callable[[T, R], None],
+) -> None:
+    """
+    Run work on every item on a pool of threads, handing each result over as soon as it is ready.
+
+    Only a few items beyond the running ones are queued, so results are handed
+    over in completion order while the batch runs, and a large batch does not
+    queue every item up front. Every item runs in a copy of the context of the
+    caller, so scoped rate limits and trace spans follow it.
+
+    Args:
+        items: The items to process
+        work: Called on a worker thread with an item, returns its result
+        max_concurrency: Maximum number of items processed at the same time
+        on_result: Called on the calling thread with every item and its result
+    """
+    remaining = iter(items)
+    context = contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+
+        def submit(item: T) -> Future:
+            return executor.submit(context.copy().run, work, item)
+
+        running = {submit(item): item for item in islice(remaining, max_concurrency * 2)}
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                on_result(running.pop(future), future.result())
+                next_item = next(remaining, None)
+                if next_item is not None:
+                    running[submit(next_item)] = next_item
+
+
+class JsonlBatchOutput(Mapping):
+    """
+    Batch results streamed to a JSON Lines file.
+
+    Every line holds ``{"file": name, "result": {...}}`` and is appended with a
+    single write followed by an fsync, then recorded in the ``.index`` file next
+    to it. When a name appears several times, for example after a failed story
+    was retried, the last line wins.
+
+    The output is a read-only mapping of names to results, in name order.
+    Results are read back from disk on access, so memory only holds the names
+    and offsets however large the batch is.
+    """
+
+    def __init__(self, path: Union[str, Path], resume: bool = False):
+        """
+        Open the output.
+
+        Args:
+            path: The path of the JSON Lines file
+            resume: Keep the results already in the file, otherwise start an empty file
+        """
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + ".index")
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+        self._failed: set = set()
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and self.path.exists():
+            self._recover()
+        else:
+            self.path.write_bytes(b"")
+            self.index_path.write_bytes(b"")
+        self._size = self.path.stat().st_size
+
+    def _recover(self) -> None:
+        """Load the checkpoint index, then index the results written after the last checkpoint."""
+        indexed_end = 0
+        if self.index_path.exists():
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break
+                    self._offsets[entry["file"]] = (entry["offset"], entry["length"])
+                    if entry.get("failed"):
+                        self._failed.add(entry["file"])
+                    else:
+                        self._failed.discard(entry["file"])
+                    indexed_end = max(indexed_end, entry["offset"] + entry["length"])
+
+        size = self.path.stat().st_size
+        if indexed_end > size:
+            # The index is ahead of a replaced or truncated file: index it again
+            self._offsets.clear()
+            self._failed.clear()
+            indexed_end = 0
+
+        # Results written after the last checkpoint, up to the last complete line
+        valid_end = indexed_end
+        with open(self.path, "rb") as f:
+            f.seek(indexed_end)
+            offset = indexed_end
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                self._checkpoint(entry["file"], offset, len(line), "error" in entry["result"])
+                offset += len(line)
+                valid_end = offset
+        if valid_end < size:
+            # Drop the line an interrupted run left incomplete
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_end)
+        self._rewrite_index()
+
+    def _checkpoint(self, name: str, offset: int, length: int, failed: bool) -> None:
+        """Record the position of a result in memory."""
+        self._offsets[name] = (offset, length)
+        if failed:
+            self._failed.add(name)
+        else:
+            self._failed.discard(name)
+
+    def _rewrite_index(self) -> None:
+        """Write the whole checkpoint index atomically."""
+        temp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for name, (offset, length) in self._offsets.items():
+                f.write(
+                    json.dumps(
+                        {
+                            "file": name,
+                            "offset": offset,
+                            "length": length,
+                            "failed": name in self._failed,
+                        }
+                    )
+                    + "\n"
+                )
+        os.replace(temp_path, self.index_path)
+
+    def is_done(self, name: str) -> bool:
+        """
+        Check whether a name already has a successful result.
+
+        Args:
+            name: The name of the result, such as the file name of the story
+
+        Returns:
+            True if the output holds a result without error for the name
+        """
+        with self._lock:
+            return name in self._offsets and name not in self._failed
+
+    def append(self, name: str, result: Dict[str, Any]) -> None:
+        """
+        Append a result and checkpoint it.
+
+        Args:
+            name: The name of the result, such as the file name of the story
+            result: The BCP calculation result, or an ``error`` entry
+        """
+        line = (json.dumps({"file": name, "result": result}, ensure_ascii=False) + "\n").encode(
+            "utf-8"
+        )
+        failed = "error" in result
+        with self._lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+            try:
+                os.write(fd, line)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            offset = self._size
+            self._size += len(line)
+            self._checkpoint(name, offset, len(line), failed)
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(
+                    json.dumps(
+                        {"file": name, "offset": offset, "length": len(line), "failed": failed}
+                    )
+                    + "\n"
+                )
+
+    def __getitem__(self, name: str) -> Dict[str, Any]:
+        with self._lock:
+            offset, length = self._offsets[name]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(length))["result"]
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            names = sorted(self._offsets)
+        return iter(names)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._offsets)
@@ -5,88 +5,658 @@ This module orchestrates the flow for calculating Business Complexity Points (BC
 of user stories using a series of predefined prompts and GPT-4o.
 """
 
+import asyncio
+import contextvars
 import json
 import logging
 import math
 import os
-from typing import Dict, Any, List
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
 
-from .prompt_handler import PromptHandler
+from .cache import PersistentCache, make_cache_key
+from .callbacks import BCPCallbackHandler, callback_scope, emit, registered_callbacks
+from .cassette import Cassette
 from .logger import StepLogger
+from .prompt_handler import PromptHandler
+from .tracing import start_span
+from .usage import StepUsageTracker, cached_usage, summarize_usage
+
 
 class BCPCalculator:
     """
     Calculator for Business Complexity Points (BCP) of user stories.
     """
-    
-    def __init__(self, logger: logging.Logger, provider_name: str = "openai", prompt_handler: PromptHandler | None = None):
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        provider_name: str = "openai",
+        prompt_handler: PromptHandler | None = None,
+        max_concurrency: int | None = None,
+        result_cache: PersistentCache | None = None,
+        step_cache: PersistentCache | None = None,
+        callbacks: List[BCPCallbackHandler] | None = None,
+        cassette: Cassette | None = None,
+    ):
         """
         Initialize the BCP calculator.
-        
+
         Args:
             logger: The logger instance
             provider_name: The name of the LLM provider to use ('openai' or 'claude')
             prompt_handler: Optional PromptHandler to enable dependency injection for testing
+            max_concurrency: Maximum number of steps running at the same time
+                (default: BCP_MAX_STEP_CONCURRENCY environment variable or 4)
+            result_cache: Optional cache of full results, keyed by the story content,
+                the provider parameters and the prompt templates
+            step_cache: Optional cache of parsed step responses, passed to the
+                PromptHandler created when none is injected
+            callbacks: Optional handlers notified of the progress of every calculation,
+                in addition to the handlers registered with ``register_callback``
+            cassette: Optional cassette recording or replaying the LLM responses, passed
+                to the PromptHandler created when none is injected
         """
         self.logger = logger
         self.provider_name = provider_name
-        self.prompt_handler = prompt_handler or PromptHandler(logger, provider_name=provider_name)
-        
-        # Define the steps in the BCP calculation process
+        self.prompt_handler = prompt_handler or PromptHandler(
+            logger, provider_name=provider_name, step_cache=step_cache, cassette=cassette
+        )
+        self.max_concurrency = max(
+            1, max_concurrency or int(os.environ.get("BCP_MAX_STEP_CONCURRENCY", "4"))
+        )
+        self.result_cache = result_cache
+        self.callbacks = list(callbacks or [])
+
+        # Define the steps in the BCP calculation process. Steps without dependencies
+        # run together in the first wave; steps 4-6 wait for "Break Elements".
         self.steps = [
             {
                 "name": "Non Functional Detector",
                 "prompt_file": "step0_flow_bcp_non_functional_detector.jinja2",
-                "required": False  # Not used for BCP calculation, but for additional analysis
+                "required": False,  # Not used for BCP calculation, but for additional analysis
+                "depends_on": [],
             },
             {
                 "name": "Story Maturity Complexity",
                 "prompt_file": "step1_flow_story_maturity_complexity.jinja2",
-                "required": False  # Not used for BCP calculation, but for additional analysis
+                "required": False,  # Not used for BCP calculation, but for additional analysis
+                "depends_on": [],
             },
             {
                 "name": "Story INVEST Maturity",
                 "prompt_file": "step2_flow_story_invest_maturity.jinja2",
-                "required": False  # Not used for BCP calculation, but for additional analysis
+                "required": False,  # Not used for BCP calculation, but for additional analysis
+                "depends_on": [],
             },
             {
                 "name": "Break Elements",
                 "prompt_file": "step3_flow_bcp_break_elements.jinja2",
-                "required": True  # Required for BCP calculation
+                "required": True,  # Required for BCP calculation
+                "depends_on": [],
             },
             {
                 "name": "External Integrations Complexity",
                 "prompt_file": "step4_flow_bcp_boundaries.jinja2",
-                "required": True  # Required for BCP calculation
+                "required": True,  # Required for BCP calculation
+                "depends_on": ["Break Elements"],  # Uses the elements extracted in step 3
             },
             {
                 "name": "UI Elements Complexity",
                 "prompt_file": "step5_flow_bcp_interface_elements.jinja2",
-                "required": True  # Required for BCP calculation
+                "required": True,  # Required for BCP calculation
+                "depends_on": ["Break Elements"],  # Uses the elements extracted in step 3
             },
             {
                 "name": "Business Rules Complexity",
                 "prompt_file": "step6_flow_bcp_business_rule.jinja2",
-                "required": True  # Required for BCP calculation
-            }
+                "required": True,  # Required for BCP calculation
+                "depends_on": ["Break Elements"],  # Uses the elements extracted in step 3
+            },
         ]
-    
-    def calculate_bcp(self, story_content: str) -> Dict[str, Any]:
+
+    def calculate_bcp(
+        self, story_content: str, callbacks: List[BCPCallbackHandler] | None = None
+    ) -> Dict[str, Any]:
         """
         Calculate the Business Complexity Points (BCP) for a user story.
-        
+
+        Steps are executed in waves: every step whose dependencies are satisfied runs
+        concurrently with the others in its wave, bounded by ``max_concurrency``. Once
+        a required step fails, the steps of its wave that have not started are skipped.
+
         Args:
             story_content: The content of the user story
-            
+            callbacks: Optional handlers notified of the progress of this calculation,
+                in addition to the handlers of the calculator
+
         Returns:
             A dictionary containing the results of each step and the final BCP
         """
         self.logger.info("Starting BCP calculation")
-        
-        # Extract story name from content (assuming first line is the title)
+        started = time.perf_counter()
+        story_name = self._story_name(story_content)
+
+        with start_span("bcp.calculate", story=story_name, provider=self.provider_name) as span:
+            handlers, cache_key, cached = self._start_pipeline(
+                story_content, story_name, callbacks, span, started
+            )
+            if cached is not None:
+                return cached
+
+            # Step name -> (response, error) for every step that has been executed
+            outputs: Dict[str, Tuple[Any, Exception | None]] = {}
+            usage = StepUsageTracker()
+            handlers = handlers + [usage]
+
+            # Steps record their own output, so a step starting after a required
+            # step of its wave failed is skipped without calling the LLM
+            def run_step(step: Dict[str, Any], wave: List[Dict[str, Any]]) -> None:
+                if not self._wave_failed(wave, outputs):
+                    outputs[step["name"]] = self._run_step(
+                        step, story_content, story_name, outputs, handlers
+                    )
+
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                for wave in self.plan_waves():
+                    # Each step runs in a copy of the current context, so it is
+                    # traced under this calculation
+                    futures = [
+                        executor.submit(contextvars.copy_context().run, run_step, step, wave)
+                        for step in wave
+                    ]
+                    for future in futures:
+                        future.result()
+                    if self._wave_failed(wave, outputs):
+                        break
+
+            return self._finish_pipeline(story_name, outputs, usage, cache_key, handlers, started)
+
+    async def acalculate_bcp(
+        self, story_content: str, callbacks: List[BCPCallbackHandler] | None = None
+    ) -> Dict[str, Any]:
+        """
+        Calculate the Business Complexity Points (BCP) for a user story on the running event loop.
+
+        This is the asyncio counterpart of ``calculate_bcp``: the steps of each wave are
+        awaited together, bounded by ``max_concurrency``, without blocking the event loop.
+        Once a required step fails, the steps of its wave that have not started are skipped.
+
+        Args:
+            story_content: The content of the user story
+            callbacks: Optional handlers notified of the progress of this calculation,
+                in addition to the handlers of the calculator
+
+        Returns:
+            A dictionary containing the results of each step and the final BCP
+        """
+        self.logger.info("Starting BCP calculation")
+        started = time.perf_counter()
+        story_name = self._story_name(story_content)
+
+        with start_span("bcp.calculate", story=story_name, provider=self.provider_name) as span:
+            handlers, cache_key, cached = self._start_pipeline(
+                story_content, story_name, callbacks, span, started
+            )
+            if cached is not None:
+                return cached
+
+            # Step name -> (response, error) for every step that has been executed
+            outputs: Dict[str, Tuple[Any, Exception | None]] = {}
+            usage = StepUsageTracker()
+            handlers = handlers + [usage]
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+
+            async def run_bounded(step: Dict[str, Any], wave: List[Dict[str, Any]]) -> None:
+                async with semaphore:
+                    if not self._wave_failed(wave, outputs):
+                        outputs[step["name"]] = await self._arun_step(
+                            step, story_content, story_name, outputs, handlers
+                        )
+
+            for wave in self.plan_waves():
+                await asyncio.gather(*(run_bounded(step, wave) for step in wave))
+                if self._wave_failed(wave, outputs):
+                    break
+
+            return self._finish_pipeline(story_name, outputs, usage, cache_key, handlers, started)
+
+    def _story_name(self, story_content: str) -> str:
+        """Extract the story name from its content (assuming the first line is the title)."""
         story_lines = story_content.strip().split('\n')
-        story_name = story_lines[0] if story_lines else "Unnamed Story"
-        
+        return story_lines[0] if story_lines else "Unnamed Story"
+
+    def _start_pipeline(
+        self,
+        story_content: str,
+        story_name: str,
+        callbacks: List[BCPCallbackHandler] | None,
+        span: Any,
+        started: float,
+    ) -> Tuple[List[BCPCallbackHandler], str | None, Dict[str, Any] | None]:
+        """
+        Notify the start of a calculation and look up its result in the result cache.
+
+        A cache hit also notifies the end of the calculation.
+
+        Args:
+            story_content: The content of the user story
+            story_name: The name of the user story
+            callbacks: The handlers passed for this calculation
+            span: The span of the calculation, if tracing is enabled
+            started: The start time of the calculation (``time.perf_counter``)
+
+        Returns:
+            A tuple with the handlers of the calculation, the result cache key and
+            the cached result, or None on a cache miss
+        """
+        handlers = self._handlers(callbacks)
+        emit(handlers, "on_pipeline_start", story_name)
+
+        cache_key = self._result_cache_key(story_content)
+        cached = self._get_cached_result(cache_key)
+        if span is not None:
+            span.set_attribute("cache_hit", cached is not None)
+        if cached is not None:
+            emit(handlers, "on_pipeline_end", story_name, cached, time.perf_counter() - started)
+        return handlers, cache_key, cached
+
+    def _wave_failed(
+        self, wave: List[Dict[str, Any]], outputs: Dict[str, Tuple[Any, Exception | None]]
+    ) -> bool:
+        """Check whether a required step of a wave failed, making the remaining steps pointless."""
+        return any(step["required"] and outputs.get(step["name"], (None, None))[1] for step in wave)
+
+    def _finish_pipeline(
+        self,
+        story_name: str,
+        outputs: Dict[str, Tuple[Any, Exception | None]],
+        usage: StepUsageTracker,
+        cache_key: str | None,
+        handlers: List[BCPCallbackHandler],
+        started: float,
+    ) -> Dict[str, Any]:
+        """
+        Build the results of a calculation, cache them and notify the end of the calculation.
+
+        Args:
+            story_name: The name of the user story
+            outputs: The outputs of the executed steps
+            usage: The usage tracked during the calculation
+            cache_key: The result cache key, or None if result caching is disabled
+            handlers: The handlers of the calculation
+            started: The start time of the calculation (``time.perf_counter``)
+
+        Returns:
+            A dictionary containing the results of each step and the final BCP
+        """
+        results = self._build_results(story_name, outputs)
+        results["usage"] = self._summarize_usage(usage)
+        results = self._store_result(cache_key, results)
+        emit(handlers, "on_pipeline_end", story_name, results, time.perf_counter() - started)
+        return results
+
+    def _handlers(self, callbacks: List[BCPCallbackHandler] | None) -> List[BCPCallbackHandler]:
+        """
+        Collect the handlers notified of a calculation.
+
+        Args:
+            callbacks: The handlers passed for this calculation
+
+        Returns:
+            The registered handlers, then the handlers of the calculator, then the given ones
+        """
+        return registered_callbacks() + self.callbacks + list(callbacks or [])
+
+    def _summarize_usage(self, usage: StepUsageTracker) -> Dict[str, Any]:
+        """
+        Build the usage section of the results, in step order.
+
+        Args:
+            usage: The usage tracked during the calculation
+
+        Returns:
+            The token usage and cost of each step and of the story
+        """
+        provider = getattr(self.prompt_handler, "provider", None)
+        model_name = getattr(provider, "model_name", None)
+        steps = {
+            step["name"]: usage.steps[step["name"]]
+            for step in self.steps
+            if step["name"] in usage.steps
+        }
+        return summarize_usage(steps, self.provider_name, model_name)
+
+    def _result_cache_key(self, story_content: str) -> str | None:
+        """
+        Build the result cache key of a story.
+
+        Args:
+            story_content: The content of the user story
+
+        Returns:
+            The cache key, or None if result caching is disabled
+        """
+        if self.result_cache is None:
+            return None
+
+        prompt_files = [step["prompt_file"] for step in self.steps]
+        return make_cache_key(
+            story=story_content,
+            provider=self.provider_name,
+            params=self.prompt_handler.provider.get_params(),
+            templates=self.prompt_handler.template_hashes(prompt_files),
+        )
+
+    def _get_cached_result(self, cache_key: str | None) -> Dict[str, Any] | None:
+        """
+        Look up a previously calculated result.
+
+        The usage of the stored result is replaced with a zero usage marked
+        ``cached``, since serving it incurs no LLM spend.
+
+        Args:
+            cache_key: The result cache key, or None if result caching is disabled
+
+        Returns:
+            A copy of the cached result, or None on a cache miss
+        """
+        if cache_key is None:
+            return None
+
+        cached = self.result_cache.get(cache_key)
+        if cached is None:
+            return None
+        self.logger.info(f"Using cached BCP result. Total BCP: {cached['total_bcp']}")
+        return dict(cached, usage=cached_usage(cached.get("usage")))
+
+    def _store_result(self, cache_key: str | None, results: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Store a successful result in the result cache.
+
+        Results with a failed step are not cached, so that the next request retries them.
+
+        Args:
+            cache_key: The result cache key, or None if result caching is disabled
+            results: The calculated results
+
+        Returns:
+            The results, unchanged
+        """
+        failed = "error" in results or any(
+            isinstance(response, dict) and "error" in response
+            for response in results["steps"].values()
+        )
+        if cache_key is not None and not failed:
+            self.result_cache.set(cache_key, results)
+        return results
+
+    def plan_waves(self) -> List[List[Dict[str, Any]]]:
+        """
+        Group the steps into waves that can be executed concurrently.
+
+        Each wave only contains steps whose dependencies were executed in an earlier
+        wave. Steps keep their relative order inside a wave.
+
+        Returns:
+            The list of waves, each wave being a list of step definitions
+
+        Raises:
+            ValueError: If a step depends on an unknown step or the dependencies are circular
+        """
+        waves = []
+        done = set()
+        pending = list(self.steps)
+
+        while pending:
+            wave = [
+                step for step in pending if all(dep in done for dep in step.get("depends_on", []))
+            ]
+            if not wave:
+                names = ", ".join(step["name"] for step in pending)
+                raise ValueError(f"Unresolvable step dependencies for: {names}")
+            waves.append(wave)
+            done.update(step["name"] for step in wave)
+            pending = [step for step in pending if step["name"] not in done]
+
+        return waves
+
+    def _run_step(
+        self,
+        step: Dict[str, Any],
+        story_content: str,
+        story_name: str,
+        outputs: Dict[str, Tuple[Any, Exception | None]],
+        handlers: List[BCPCallbackHandler] | None = None,
+    ) -> Tuple[Any, Exception | None]:
+        """
+        Execute a single step of the BCP calculation.
+
+        Args:
+            step: The step definition
+            story_content: The content of the user story
+            story_name: The name of the user story
+            outputs: The outputs of the steps executed in previous waves
+            handlers: The callback handlers notified of the step events
+
+        Returns:
+            A tuple with the step response and the error raised while processing it, if any
+        """
+        with self._step_scope(step, story_name, handlers) as run:
+            variables, response = self._prepare_step(
+                step, story_content, story_name, outputs, run["logger"]
+            )
+
+            # Process the prompt, if response is not set
+            if not response:
+                with callback_scope(run["handlers"], step["name"]):
+                    response = self.prompt_handler.process_prompt(step["prompt_file"], variables)
+            run["response"] = response
+        return run["output"]
+
+    async def _arun_step(
+        self,
+        step: Dict[str, Any],
+        story_content: str,
+        story_name: str,
+        outputs: Dict[str, Tuple[Any, Exception | None]],
+        handlers: List[BCPCallbackHandler] | None = None,
+    ) -> Tuple[Any, Exception | None]:
+        """
+        Execute a single step of the BCP calculation asynchronously.
+
+        Args:
+            step: The step definition
+            story_content: The content of the user story
+            story_name: The name of the user story
+            outputs: The outputs of the steps executed in previous waves
+            handlers: The callback handlers notified of the step events
+
+        Returns:
+            A tuple with the step response and the error raised while processing it, if any
+        """
+        with self._step_scope(step, story_name, handlers) as run:
+            variables, response = self._prepare_step(
+                step, story_content, story_name, outputs, run["logger"]
+            )
+
+            # Process the prompt, if response is not set
+            if not response:
+                with callback_scope(run["handlers"], step["name"]):
+                    response = await self.prompt_handler.aprocess_prompt(
+                        step["prompt_file"], variables
+                    )
+            run["response"] = response
+        return run["output"]
+
+    @contextmanager
+    def _step_scope(
+        self, step: Dict[str, Any], story_name: str, handlers: List[BCPCallbackHandler] | None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Trace a step and notify its start and end around the code executing it.
+
+        The code sets the step ``response`` in the yielded dictionary. An exception
+        it raises is recorded as the step error instead of propagating, and the
+        step output is left under ``output`` as a (response, error) tuple.
+
+        Args:
+            step: The step definition
+            story_name: The name of the user story
+            handlers: The callback handlers notified of the step events
+
+        Yields:
+            The step state, with the step ``logger`` and ``handlers``
+        """
+        step_name = step["name"]
+        step_logger = StepLogger(self.logger, step_name)
+        step_logger.info(f"Processing step: {step_name}")
+        run: Dict[str, Any] = {"logger": step_logger, "handlers": handlers or []}
+        emit(run["handlers"], "on_step_start", step_name, story_name)
+        started = time.perf_counter()
+
+        with start_span("bcp.step", step=step_name, prompt_file=step["prompt_file"]) as span:
+            try:
+                yield run
+                step_logger.info(f"Step completed successfully")
+                run["output"] = (run["response"], None)
+            except Exception as e:
+                run["output"] = (None, e)
+                if span is not None:
+                    span.record_error(e)
+        emit(
+            run["handlers"],
+            "on_step_end",
+            step_name,
+            story_name,
+            *run["output"],
+            time.perf_counter() - started,
+        )
+
+    def _prepare_step(
+        self,
+        step: Dict[str, Any],
+        story_content: str,
+        story_name: str,
+        outputs: Dict[str, Tuple[Any, Exception | None]],
+        step_logger: StepLogger,
+    ) -> Tuple[Dict[str, Any], Any]:
+        """
+        Build the prompt variables for a step.
+
+        Args:
+            step: The step definition
+            story_content: The content of the user story
+            story_name: The name of the user story
+            outputs: The outputs of the steps executed in previous waves
+            step_logger: The logger for the step
+
+        Returns:
+            A tuple with the prompt variables and a default response, which is empty
+            when the prompt must be sent to the LLM
+        """
+        # Prepare variables for the prompt
+        variables = {"story": story_content, "storyName": story_name}
+        response = {}
+
+        # For steps 4-6, we need the output from step 3
+        elements = outputs.get("Break Elements", (None, None))[0]
+
+        if step["name"] == "External Integrations Complexity" and elements:
+            # Extract all instances from elements['Integrations (Boundaries)'] and set as
+            # comma-separated string
+            variables["elements"] = ""
+            if isinstance(elements, dict) and "Integrations (Boundaries)" in elements:
+                boundaries = elements["Integrations (Boundaries)"]
+                if isinstance(boundaries, list):
+                    variables["elements"] = ", ".join(str(b) for b in boundaries)
+                else:
+                    variables["elements"] = str(boundaries)
+            step_logger.debug(f"Using boundaries section: {variables['elements']}")
+            # If no elements found, set default response
+            if not variables["elements"]:
+                response = [
+                    {
+                        "Boundary": 1,
+                        "Summary": "There is no external integration detected",
+                        "Size": "XS",
+                    }
+                ]
+
+        elif step["name"] == "UI Elements Complexity" and elements:
+            # Extract interface elements section from elements
+            variables["elements"] = ""
+            if isinstance(elements, dict):
+                interface_elements = {}
+                if "User View" in elements:
+                    interface_elements["User View"] = elements.get("User View")
+                if "Acceptance Criteria" in elements:
+                    interface_elements["Acceptance Criteria"] = ", ".join(
+                        str(b) for b in elements["Acceptance Criteria"]
+                    )
+                if "Test Plan" in elements:
+                    interface_elements["Test Plan"] = elements.get("Test Plan")
+                variables["elements"] = (
+                    json.dumps(interface_elements, ensure_ascii=False, indent=2)
+                    .replace("'", "")
+                    .replace('"', "")
+                )
+            step_logger.debug(f"Using interface section: {variables['elements']}")
+            # If no elements found, set default response
+            if not variables["elements"]:
+                response = {
+                    "step": "Interface",
+                    "description": "There is no interface elements detected",
+                    "total": 0,
+                }
+
+        elif step["name"] == "Business Rules Complexity" and elements:
+            # Extract business rules section from elements
+            variables["elements"] = ""
+            if isinstance(elements, dict):
+                business_elements = {}
+                if "Business Narrative" in elements:
+                    business_elements["Business Narrative"] = elements.get("Business Narrative")
+                if "Requirements and Business Rules" in elements:
+                    business_elements["Requirements and Business Rules"] = elements.get(
+                        "Requirements and Business Rules"
+                    )
+                if "Test Plan" in elements:
+                    business_elements["Test Plan"] = elements.get("Test Plan")
+                variables["elements"] = (
+                    json.dumps(business_elements, ensure_ascii=False, indent=2)
+                    .replace("'", "")
+                    .replace('"', "")
+                )
+            step_logger.debug(f"Using business section: {variables['elements']}")
+            # If no elements found, set default response
+            if not variables["elements"]:
+                response = {
+                    "step": "Business",
+                    "description": "There is no logical rules detected",
+                    "total": 0,
+                }
+
+        return variables, response
+
+    def _build_results(
+        self, story_name: str, outputs: Dict[str, Tuple[Any, Exception | None]]
+    ) -> Dict[str, Any]:
+        """
+        Assemble the step outputs into the final results, in step order.
+
+        A failed required step makes the BCP unavailable, but the responses of the
+        other executed steps are still returned, since their LLM calls were paid for.
+
+        Args:
+            story_name: The name of the user story
+            outputs: The outputs of the executed steps
+
+        Returns:
+            A dictionary containing the results of each step and the final BCP
+        """
         # Initialize results dictionary
         results = {
             "story_name": story_name,
@@ -94,166 +664,109 @@ class BCPCalculator:
             "breakdown": {},
             "total_bcp": 0
         }
-        
-        # Process each step
-        elements = None
-        
+
         for step in self.steps:
             step_name = step["name"]
+            if step_name not in outputs:
+                continue
             step_logger = StepLogger(self.logger, step_name)
-            step_logger.info(f"Processing step: {step_name}")
-            
+            response, error = outputs[step_name]
+
             try:
-                # Prepare variables for the prompt
-                variables = {"story": story_content, "storyName": story_name}
-                response = {}
-                
-                # For steps 4-6, we need the output from step 3
-                if step["name"] == "External Integrations Complexity" and elements:
-                    # Extract all instances from elements['Integrations (Boundaries)'] and set as comma-separated string
-                    variables["elements"] = ""
-                    if isinstance(elements, dict) and "Integrations (Boundaries)" in elements:
-                        boundaries = elements["Integrations (Boundaries)"]
-                        if isinstance(boundaries, list):
-                            variables["elements"] = ", ".join(str(b) for b in boundaries)
-                        else:
-                            variables["elements"] = str(boundaries)
-                    step_logger.debug(f"Using boundaries section: {variables['elements']}")
-                    # If no elements found, set default response
-                    if not variables["elements"]:
-                        response = [{
-                            "Boundary": 1,
-                            "Summary": "There is no external integration detected",
-                            "Size": "XS"
-                        }]
-                
-                elif step["name"] == "UI Elements Complexity" and elements:
-                    # Extract interface elements section from elements
-                    variables["elements"] = ""
-                    if isinstance(elements, dict):
-                        interface_elements = {}                        
-                        if "User View" in elements:
-                            interface_elements['User View'] = elements.get('User View')
-                        if "Acceptance Criteria" in elements:
-                            interface_elements['Acceptance Criteria'] = ", ".join(str(b) for b in elements["Acceptance Criteria"])
-                        if "Test Plan" in elements:
-                            interface_elements['Test Plan'] = elements.get('Test Plan')
-                        variables["elements"] = json.dumps(interface_elements, ensure_ascii=False, indent=2).replace("'", "").replace('"', "")
-                    step_logger.debug(f"Using interface section: {variables['elements']}")
-                    # If no elements found, set default response
-                    if not variables["elements"]:
-                        response = {
-                            "step": "Interface",
-                            "description": "There is no interface elements detected",
-                            "total": 0
-                        }
-                
-                elif step["name"] == "Business Rules Complexity" and elements:
-                    # Extract business rules section from elements
-                    variables["elements"] = ""
-                    if isinstance(elements, dict):
-                        business_elements = {}                        
-                        if "Business Narrative" in elements:
-                            business_elements['Business Narrative'] = elements.get('Business Narrative')
-                        if "Requirements and Business Rules" in elements:
-                            business_elements['Requirements and Business Rules'] = elements.get('Requirements and Business Rules')
-                        if "Test Plan" in elements:
-                            business_elements['Test Plan'] = elements.get('Test Plan')
-                        variables["elements"] = json.dumps(business_elements, ensure_ascii=False, indent=2).replace("'", "").replace('"', "")
-                    step_logger.debug(f"Using business section: {variables['elements']}")
-                    # If no elements found, set default response
-                    if not variables["elements"]:
-                        response = {
-                            "step": "Business",
-                            "description": "There is no logical rules detected",
-                            "total": 0
-                        }
-
-                # Process the prompt, if response is not set
-                if not response:
-                    response = self.prompt_handler.process_prompt(step["prompt_file"], variables)
-                step_logger.info(f"Step completed successfully")
-                
+                if error is not None:
+                    raise error
+
                 # Store the result
                 results["steps"][step_name] = response
-                
-                # If this is step 3, store the elements for later steps
-                if step["name"] == "Break Elements":
-                    #elements = response.get("raw_response", "")
-                    elements = response
-                
+
                 # If this is a required step (4-6), add to BCP calculation
-                if step["required"] and step["name"] != "Break Elements":
-                    step_logger.debug(f"Response:\n {json.dumps(response, ensure_ascii=False)}")
-                    total_bcp = 0
-                    
-                    # Check if response is a string, which indicates parsing error
-                    if isinstance(response, str):
-                        step_logger.warning(f"Response is a string, not a parsed object: {response}")
-                        response = {"raw_response": response}
-                    
-                    if isinstance(response, dict) and "raw_response" in response:
-                        step_logger.warning("Using raw_response as fallback")
-                        # Skip BCP calculation for this step
-                        continue
-                        
-                    match step["name"]:
-                        case "External Integrations Complexity":
-                            # Make sure response is a list
-                            if not isinstance(response, list):
-                                step_logger.warning(f"Expected list for boundaries but got {type(response)}")
-                                continue
-                                
-                            for boundary in response:
-                                if isinstance(boundary, dict):
-                                    boundary_size = boundary.get("Size", "")
-                                    match boundary_size:
-                                        case "XS":
-                                            total_bcp += 1
-                                        case "S":
-                                            total_bcp += 2
-                                        case "M":
-                                            total_bcp += 3
-                                        case "XL":
-                                            total_bcp += 8
-                        case "UI Elements Complexity":
-                            # Make sure response is a dict
-                            if not isinstance(response, dict):
-                                step_logger.warning(f"Expected dict for UI Elements but got {type(response)}")
-                                continue
-                                
-                            total_bcp += math.ceil(response.get("Static", 0) / 5) * 3
-                            total_bcp += math.ceil(response.get("Dynamic", 0) / 5) * 5
-                        case "Business Rules Complexity":
-                            # Make sure response is a list
-                            if not isinstance(response, list):
-                                step_logger.warning(f"Expected list for Business Rules but got {type(response)}")
-                                continue
-                                
-                            for rule in response:
-                                if isinstance(rule, dict):
-                                    total_bcp += rule.get("Score", 0)
-
-                    if total_bcp > 0:
-                        component_name = step["name"].replace(" Complexity", "")
-                        results["breakdown"][component_name] = total_bcp
-                        results["total_bcp"] += total_bcp
-                    else:
-                        step_logger.warning(f"No BCP value found in response: {response}")
+                if step["required"] and step["name"] != "Break Elements" and "error" not in results:
+                    self._score_step(step, response, results, step_logger)
 
             except Exception as e:
                 step_logger.error(f"Error processing step: {str(e)}")
                 results["steps"][step_name] = {"error": str(e)}
-                
+
                 # If this is a required step and it failed, we can't calculate the BCP
-                if step["required"]:
+                if step["required"] and "error" not in results:
                     self.logger.error("Required step failed, cannot calculate BCP")
                     results["error"] = f"Failed to calculate BCP: {str(e)}"
-                    return results
-        
-        self.logger.info(f"BCP calculation completed. Total BCP: {results['total_bcp']}")
+
+        if "error" not in results:
+            self.logger.info(f"BCP calculation completed. Total BCP: {results['total_bcp']}")
         return results
-    
+
+    def _score_step(
+        self, step: Dict[str, Any], response: Any, results: Dict[str, Any], step_logger: StepLogger
+    ) -> None:
+        """
+        Add the BCP value of a required step to the results.
+
+        Args:
+            step: The step definition
+            response: The parsed response of the step
+            results: The results being assembled
+            step_logger: The logger for the step
+        """
+        step_logger.debug(f"Response:\n {json.dumps(response, ensure_ascii=False)}")
+        total_bcp = 0
+
+        # Check if response is a string, which indicates parsing error
+        if isinstance(response, str):
+            step_logger.warning(f"Response is a string, not a parsed object: {response}")
+            response = {"raw_response": response}
+
+        if isinstance(response, dict) and "raw_response" in response:
+            step_logger.warning("Using raw_response as fallback")
+            # Skip BCP calculation for this step
+            return
+
+        match step["name"]:
+            case "External Integrations Complexity":
+                # Make sure response is a list
+                if not isinstance(response, list):
+                    step_logger.warning(f"Expected list for boundaries but got {type(response)}")
+                    return
+
+                for boundary in response:
+                    if isinstance(boundary, dict):
+                        boundary_size = boundary.get("Size", "")
+                        match boundary_size:
+                            case "XS":
+                                total_bcp += 1
+                            case "S":
+                                total_bcp += 2
+                            case "M":
+                                total_bcp += 3
+                            case "XL":
+                                total_bcp += 8
+            case "UI Elements Complexity":
+                # Make sure response is a dict
+                if not isinstance(response, dict):
+                    step_logger.warning(f"Expected dict for UI Elements but got {type(response)}")
+                    return
+
+                total_bcp += math.ceil(response.get("Static", 0) / 5) * 3
+                total_bcp += math.ceil(response.get("Dynamic", 0) / 5) * 5
+            case "Business Rules Complexity":
+                # Make sure response is a list
+                if not isinstance(response, list):
+                    step_logger.warning(
+                        f"Expected list for Business Rules but got {type(response)}"
+                    )
+                    return
+
+                for rule in response:
+                    if isinstance(rule, dict):
+                        total_bcp += rule.get("Score", 0)
+
+        if total_bcp > 0:
+            component_name = step["name"].replace(" Complexity", "")
+            results["breakdown"][component_name] = total_bcp
+            results["total_bcp"] += total_bcp
+        else:
+            step_logger.warning(f"No BCP value found in response: {response}")
+
     def _extract_section(self, elements_text: str, section_number: int) -> str:
         """
         Extract a specific section from the elements text.
@@ -266,9 +779,9 @@ class BCPCalculator:
             The extracted section text
         """
         sections = elements_text.split("<-->")
-        
+
         if len(sections) >= section_number:
             return sections[section_number - 1].strip()
         else:
             self.logger.warning(f"Section {section_number} not found in elements text")
-            return ""
\ No newline at end of file
+            return ""
@@ -0,0 +1,314 @@
+"""
+Cache for BCP Calculator
+
+This module provides a two-tier cache (in-memory LRU in front of a local SQLite
+database) used to reuse BCP results and step responses across calculators,
+processes and entry points.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def default_cache_dir() -> str:
+    """
+    Get the directory used for the on-disk caches.
+
+    Returns:
+        The BCP_CACHE_DIR environment variable or ~/.cache/bcp-calculator
+    """
+    return os.environ.get("BCP_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "bcp-calculator"
+    )
+
+
+def make_cache_key(**parts: Any) -> str:
+    """
+    Build a content-addressed cache key.
+
+    Args:
+        **parts: The values identifying the cached entry (must be JSON serializable)
+
+    Returns:
+        The SHA-256 hex digest of the canonical JSON representation of the parts
+    """
+    canonical = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class PersistentCache:
+    """
+    Two-tier cache with an in-memory LRU tier in front of an optional SQLite tier.
+
+    Values are stored as JSON, so every ``get`` returns a fresh copy that callers
+    can mutate freely. Entries expire after ``ttl`` seconds and each tier evicts
+    its least recently used entries once it holds more than its maximum size.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        namespace: str = "results",
+        ttl: Optional[float] = None,
+        max_memory_entries: int = 256,
+        max_disk_entries: int = 10000,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            path: Path of the SQLite database, or None for a memory-only cache
+            namespace: Namespace separating unrelated caches sharing the same database
+            ttl: Time to live of the entries in seconds, or None to never expire
+            max_memory_entries: Maximum number of entries kept in memory
+            max_disk_entries: Maximum number of entries kept on disk for this namespace
+        """
+        self.path = path
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "sets": 0,
+            "evictions": 0,
+        }
+        self._conn = self._connect() if path else None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the SQLite database and create the cache table if needed."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed"
+            " ON cache_entries (namespace, accessed_at)"
+        )
+        conn.commit()
+        return conn
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        """Check whether an entry created at ``created_at`` has outlived the TTL."""
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a value from the cache.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            A copy of the cached value, or None if the key is missing or expired
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self._stats["hits"] += 1
+                    self._stats["memory_hits"] += 1
+                    return json.loads(value)
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, created_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key),
+                ).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    if not self._expired(created_at, now):
+                        self._conn.execute(
+                            "UPDATE cache_entries SET accessed_at = ?"
+                            " WHERE namespace = ? AND key = ?",
+                            (now, self.namespace, key),
+                        )
+                        self._conn.commit()
+                        self._remember(key, created_at, value)
+                        self._stats["hits"] += 1
+                        self._stats["disk_hits"] += 1
+                        return json.loads(value)
+                    self._conn.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                        (self.namespace, key),
+                    )
+                    self._conn.commit()
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Store a value in the cache.
+
+        Args:
+            key: The cache key
+            value: The value to store (must be JSON serializable)
+        """
+        now = time.time()
+        serialized = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, now, serialized)
+            self._stats["sets"] += 1
+
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries"
+                    " (namespace, key, value, created_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (self.namespace, key, serialized, now, now),
+                )
+                self._evict_disk(now)
+                self._conn.commit()
+
+    def _remember(self, key: str, created_at: float, value: str) -> None:
+        """Store a serialized value in the memory tier, evicting the least recently used entries."""
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _evict_disk(self, now: float) -> None:
+        """Remove expired entries and the least recently used entries above the disk limit."""
+        if self.ttl is not None:
+            cursor = self._conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND created_at < ?",
+                (self.namespace, now - self.ttl),
+            )
+            self._stats["evictions"] += max(cursor.rowcount, 0)
+
+        cursor = self._conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+            " SELECT key FROM cache_entries WHERE namespace = ?"
+            " ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.namespace, self.max_disk_entries),
+        )
+        self._stats["evictions"] += max(cursor.rowcount, 0)
+
+    def clear(self) -> None:
+        """Remove every entry of this namespace from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,)
+                )
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache counters.
+
+        Returns:
+            A dictionary with hit, miss, set and eviction counters, the hit ratio
+            and the number of entries held in memory
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_result_cache: Optional[PersistentCache] = None
+_step_cache: Optional[PersistentCache] = None
+_cache_lock = threading.Lock()
+
+
+def _env_enabled(name: str) -> bool:
+    """Check whether a boolean environment flag, enabled by default, is turned on."""
+    return os.environ.get(name, "true").lower() in ("1", "true", "yes", "on")
+
+
+def get_result_cache() -> Optional[PersistentCache]:
+    """
+    Get the process-wide cache of full BCP results.
+
+    The cache is configured through the environment:
+    BCP_RESULT_CACHE (true/false, default: true), BCP_RESULT_CACHE_TTL (seconds,
+    default: 7 days), BCP_RESULT_CACHE_MAX_ENTRIES (default: 10000) and
+    BCP_CACHE_DIR for the location of the SQLite database.
+
+    Returns:
+        The shared result cache, or None if result caching is disabled
+    """
+    global _result_cache
+
+    if not _env_enabled("BCP_RESULT_CACHE"):
+        return None
+
+    with _cache_lock:
+        if _result_cache is None:
+            _result_cache = PersistentCache(
+                path=os.path.join(default_cache_dir(), "cache.sqlite"),
+                namespace="results",
+                ttl=float(os.environ.get("BCP_RESULT_CACHE_TTL", str(7 * 24 * 3600))),
+                max_disk_entries=int(os.environ.get("BCP_RESULT_CACHE_MAX_ENTRIES", "10000")),
+            )
+        return _result_cache
+
+
+def get_step_cache() -> Optional[PersistentCache]:
+    """
+    Get the process-wide cache of parsed LLM responses for individual steps.
+
+    The cache shares the SQLite database of the result cache and is configured
+    through the environment: BCP_STEP_CACHE (true/false, default: true),
+    BCP_STEP_CACHE_TTL (seconds, default: 7 days) and BCP_STEP_CACHE_MAX_ENTRIES
+    (default: 50000).
+
+    Returns:
+        The shared step cache, or None if step caching is disabled
+    """
+    global _step_cache
+
+    if not _env_enabled("BCP_STEP_CACHE"):
+        return None
+
+    with _cache_lock:
+        if _step_cache is None:
+            _step_cache = PersistentCache(
+                path=os.path.join(default_cache_dir(), "cache.sqlite"),
+                namespace="steps",
+                ttl=float(os.environ.get("BCP_STEP_CACHE_TTL", str(7 * 24 * 3600))),
+                max_memory_entries=1024,
+                max_disk_entries=int(os.environ.get("BCP_STEP_CACHE_MAX_ENTRIES", "50000")),
+            )
+        return _step_cache
+
+
+def active_caches() -> Dict[str, PersistentCache]:
+    """
+    Get the process-wide caches that have been opened, without opening the others.
+
+    Returns:
+        A dictionary mapping "results" and "steps" to the caches in use
+    """
+    with _cache_lock:
+        caches = {"results": _result_cache, "steps": _step_cache}
+    return {name: cache for name, cache in caches.items() if cache is not None}
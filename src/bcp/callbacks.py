@@ -0,0 +1,265 @@
+"""
+Callbacks for BCP Calculator
+
+This module defines the handler interface notified while a BCP calculation
+progresses (pipeline, steps, prompt rendering, LLM calls and response parsing),
+used to plug metrics, tracing and progress streaming into the calculator.
+"""
+
+import importlib
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class BCPCallbackHandler:
+    """
+    Base class of the BCP calculation callback handlers.
+
+    Subclasses override the methods of the events they are interested in. The
+    methods are called from the thread (or task) running the step, so handlers
+    shared between steps must be thread-safe. Durations are wall times in
+    seconds and sizes are numbers of characters.
+    """
+
+    def on_pipeline_start(self, story_name: str) -> None:
+        """
+        Called when a calculation starts.
+
+        Args:
+            story_name: The name of the user story
+        """
+
+    def on_pipeline_end(self, story_name: str, results: Dict[str, Any], duration: float) -> None:
+        """
+        Called when a calculation ends, including when its result comes from the cache.
+
+        Args:
+            story_name: The name of the user story
+            results: The results of the calculation
+            duration: The wall time of the calculation
+        """
+
+    def on_step_start(self, step_name: str, story_name: str) -> None:
+        """
+        Called when a step starts.
+
+        Args:
+            step_name: The name of the step
+            story_name: The name of the user story
+        """
+
+    def on_step_end(
+        self,
+        step_name: str,
+        story_name: str,
+        response: Any,
+        error: Optional[Exception],
+        duration: float,
+    ) -> None:
+        """
+        Called when a step ends, successfully or not.
+
+        Args:
+            step_name: The name of the step
+            story_name: The name of the user story
+            response: The parsed response of the step, or None if it failed
+            error: The error raised by the step, if any
+            duration: The wall time of the step
+        """
+
+    def on_prompt_rendered(
+        self, step_name: Optional[str], prompt_file: str, prompt_size: int
+    ) -> None:
+        """
+        Called when the prompt of a step has been rendered.
+
+        Args:
+            step_name: The name of the step, if the prompt is rendered within one
+            prompt_file: The filename of the prompt template
+            prompt_size: The size of the rendered prompt
+        """
+
+    def on_llm_start(self, step_name: Optional[str], prompt_file: str, prompt_size: int) -> None:
+        """
+        Called before a prompt is sent to the LLM (not on step cache hits).
+
+        Args:
+            step_name: The name of the step, if the call is made within one
+            prompt_file: The filename of the prompt template
+            prompt_size: The size of the rendered prompt
+        """
+
+    def on_llm_end(
+        self,
+        step_name: Optional[str],
+        prompt_file: str,
+        response_size: int,
+        error: Optional[Exception],
+        duration: float,
+        usage: Dict[str, int],
+    ) -> None:
+        """
+        Called when the LLM call of a prompt returns or fails.
+
+        Args:
+            step_name: The name of the step, if the call is made within one
+            prompt_file: The filename of the prompt template
+            response_size: The size of the raw response, 0 if the call failed
+            error: The error raised by the call, if any
+            duration: The wall time of the call
+            usage: The input, output, cached and total tokens of the call
+                (zero when the provider does not report them)
+        """
+
+    def on_llm_retry(self, step_name: Optional[str], reason: str) -> None:
+        """
+        Called when a provider sends a request to the LLM again.
+
+        Args:
+            step_name: The name of the step, if the call is made within one
+            reason: Why the request is retried, e.g. "token_rejected"
+        """
+
+    def on_parse_result(
+        self, step_name: Optional[str], prompt_file: str, parsed: Any, success: bool
+    ) -> None:
+        """
+        Called when an LLM response has been parsed.
+
+        Args:
+            step_name: The name of the step, if the response belongs to one
+            prompt_file: The filename of the prompt template
+            parsed: The parsed response
+            success: False if the response was not valid JSON and is kept as raw text
+        """
+
+
+_registered: List[BCPCallbackHandler] = []
+_registered_lock = threading.Lock()
+
+# Handlers and step of the calculation running in the current thread or task
+_active: ContextVar[Tuple[Tuple[BCPCallbackHandler, ...], Optional[str]]] = ContextVar(
+    "bcp_active_callbacks", default=((), None)
+)
+
+
+def register_callback(handler: BCPCallbackHandler) -> None:
+    """
+    Register a handler notified of every calculation of the process.
+
+    Args:
+        handler: The callback handler
+    """
+    with _registered_lock:
+        if handler not in _registered:
+            _registered.append(handler)
+
+
+def unregister_callback(handler: BCPCallbackHandler) -> None:
+    """
+    Unregister a handler registered with ``register_callback``.
+
+    Args:
+        handler: The callback handler
+    """
+    with _registered_lock:
+        if handler in _registered:
+            _registered.remove(handler)
+
+
+def registered_callbacks() -> List[BCPCallbackHandler]:
+    """
+    Get the handlers registered for every calculation.
+
+    Returns:
+        A copy of the list of registered handlers
+    """
+    with _registered_lock:
+        return list(_registered)
+
+
+def load_callbacks_from_env() -> List[BCPCallbackHandler]:
+    """
+    Register the handlers listed in the BCP_CALLBACKS environment variable.
+
+    The variable holds comma-separated "module:ClassName" references; each class
+    is instantiated without arguments. Servers call this at startup so handlers
+    can be plugged in without changing their code.
+
+    Returns:
+        The handlers that were registered
+    """
+    handlers = []
+    for reference in os.environ.get("BCP_CALLBACKS", "").split(","):
+        reference = reference.strip()
+        if not reference:
+            continue
+        try:
+            module_name, class_name = reference.split(":", 1)
+            handler = getattr(importlib.import_module(module_name), class_name)()
+        except Exception as e:
+            logging.getLogger("bcp_calculator").warning(
+                f"Could not load callback {reference}: {str(e)}"
+            )
+            continue
+        register_callback(handler)
+        handlers.append(handler)
+    return handlers
+
+
+@contextmanager
+def callback_scope(
+    handlers: List[BCPCallbackHandler], step_name: Optional[str] = None
+) -> Iterator[None]:
+    """
+    Make handlers the active handlers of the current thread or task.
+
+    Code called from within the scope (e.g. the PromptHandler) notifies them
+    through ``emit_active`` without receiving them as arguments.
+
+    Args:
+        handlers: The callback handlers
+        step_name: The step running within the scope, passed to the prompt and LLM events
+    """
+    token = _active.set((tuple(handlers), step_name))
+    try:
+        yield
+    finally:
+        _active.reset(token)
+
+
+def emit(handlers: List[BCPCallbackHandler], event: str, *args: Any) -> None:
+    """
+    Call an event method on every handler.
+
+    Errors raised by a handler are logged and never interrupt the calculation.
+
+    Args:
+        handlers: The callback handlers
+        event: The name of the handler method, e.g. "on_step_start"
+        *args: The arguments of the event
+    """
+    for handler in handlers:
+        try:
+            getattr(handler, event)(*args)
+        except Exception as e:
+            logging.getLogger("bcp_calculator").warning(
+                f"Callback {type(handler).__name__}.{event} failed: {str(e)}"
+            )
+
+
+def emit_active(event: str, *args: Any) -> None:
+    """
+    Call an event method on the active handlers, preceded by the active step name.
+
+    Args:
+        event: The name of the handler method, e.g. "on_llm_start"
+        *args: The arguments of the event after the step name
+    """
+    handlers, step_name = _active.get()
+    if handlers:
+        emit(list(handlers), event, step_name, *args)
@@ -0,0 +1,304 @@
+"""
+Record/Replay Cassettes for BCP Calculator
+
+This module wraps an LLM provider so its responses are recorded to a local
+cassette file and replayed on later runs without any network call. Entries are
+keyed by the provider parameters (provider class, model and sampling settings)
+and the hash of the rendered prompt, so a cassette recorded over ``tests/data``
+gives reproducible regression and performance runs with realistic outputs.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from .cache import make_cache_key
+from .providers.base import LLMProvider
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseLanguageModel
+
+# record: always call the provider and (re)record its responses
+# replay: only answer from the cassette, failing on prompts it does not hold
+# auto: replay the prompts the cassette holds and record the others
+CASSETTE_MODES = ("record", "replay", "auto")
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when the cassette holds no response for a prompt."""
+
+
+class Cassette:
+    """
+    Append-only JSON Lines file of recorded LLM responses.
+
+    Every line holds one response. When a prompt was recorded several times the
+    last line wins, so re-recording never rewrites the file. Cassettes are safe
+    to share across threads.
+    """
+
+    def __init__(self, path: str, mode: str = "auto"):
+        """
+        Initialize the cassette, loading the responses already recorded.
+
+        Args:
+            path: The path of the cassette file, created on the first recording
+            mode: The cassette mode ('record', 'replay' or 'auto')
+
+        Raises:
+            ValueError: If the mode is not supported
+            FileNotFoundError: In replay mode, if the cassette file does not exist
+        """
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.mode = mode
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+        if os.path.exists(self.path):
+            self._load()
+        elif mode == "replay":
+            raise FileNotFoundError(f"Cassette not found: {self.path}")
+
+    def _load(self) -> None:
+        """Read the recorded responses, skipping lines left truncated by an interrupted run."""
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(entry, dict) and "key" in entry:
+                    self._entries[entry["key"]] = entry
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @staticmethod
+    def make_key(params: Dict[str, Any], prompt: str) -> Tuple[str, str]:
+        """
+        Build the key of a response.
+
+        Args:
+            params: The parameters of the provider
+            prompt: The rendered prompt
+
+        Returns:
+            The entry key and the SHA-256 hex digest of the prompt
+        """
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return make_cache_key(provider=params, prompt=prompt_hash), prompt_hash
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a recorded response.
+
+        Args:
+            key: The entry key
+
+        Returns:
+            The entry, or None if the prompt was never recorded
+        """
+        with self._lock:
+            return self._entries.get(key)
+
+    def record(self, key: str, entry: Dict[str, Any]) -> None:
+        """
+        Record a response, appending it to the cassette file.
+
+        Args:
+            key: The entry key
+            entry: The response, its token usage and the details of the call
+        """
+        entry = {"key": key, **entry}
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self._entries[key] = entry
+
+
+class CassetteProvider(LLMProvider):
+    """
+    Provider answering from a cassette and recording the responses of the wrapped provider.
+
+    The wrapped provider is only called when the cassette has to record, so a
+    replay needs neither credentials nor network.
+    """
+
+    def __init__(self, provider: LLMProvider, cassette: Cassette):
+        """
+        Initialize the cassette provider.
+
+        Args:
+            provider: The provider whose responses are recorded
+            cassette: The cassette holding the responses
+        """
+        super().__init__(provider.logger)
+        self.provider = provider
+        self.cassette = cassette
+        self.model_name = getattr(provider, "model_name", None)
+        self.logger.info(f"Using cassette {cassette.path} in {cassette.mode} mode")
+
+    def get_params(self) -> Dict[str, Any]:
+        """
+        Get the parameters of the wrapped provider.
+
+        Recorded responses are the ones of the wrapped provider, so they share
+        its cache entries.
+
+        Returns:
+            The parameters of the wrapped provider
+        """
+        return self.provider.get_params()
+
+    def get_model(self) -> "BaseLanguageModel":
+        """
+        Get the model of the wrapped provider.
+
+        Returns:
+            The wrapped LLM model
+        """
+        return self.provider.get_model()
+
+    def _lookup(self, prompt: str) -> Tuple[str, str, Optional[Dict[str, Any]]]:
+        """Find the recorded entry of a prompt, honouring the cassette mode."""
+        key, prompt_hash = self.cassette.make_key(self.get_params(), prompt)
+        if self.cassette.mode == "record":
+            return key, prompt_hash, None
+        entry = self.cassette.get(key)
+        if entry is None and self.cassette.mode == "replay":
+            raise CassetteMissError(
+                f"No recorded response in {self.cassette.path} for prompt {prompt_hash[:12]} "
+                f"of {self.get_params().get('provider')}"
+            )
+        return key, prompt_hash, entry
+
+    def _record(
+        self, key: str, prompt_hash: str, response: str, usage: Dict[str, int], duration: float
+    ) -> None:
+        """Record a response of the wrapped provider."""
+        self.cassette.record(
+            key,
+            {
+                "provider": self.get_params(),
+                "model": self.model_name,
+                "prompt_sha256": prompt_hash,
+                "response": response,
+                "usage": usage,
+                "duration": duration,
+                "recorded_at": datetime.now(timezone.utc).isoformat(),
+            },
+        )
+
+    def invoke_with_usage(self, prompt: str) -> Tuple[str, Dict[str, int]]:
+        """
+        Answer a prompt from the cassette, or record the answer of the wrapped provider.
+
+        Args:
+            prompt: The prompt to send to the LLM
+
+        Returns:
+            The LLM response as a string and its recorded token usage
+
+        Raises:
+            CassetteMissError: In replay mode, if the prompt was never recorded
+        """
+        key, prompt_hash, entry = self._lookup(prompt)
+        if entry is not None:
+            self.logger.debug(f"Replaying response for prompt {prompt_hash[:12]}")
+            return entry["response"], dict(entry.get("usage") or {})
+
+        started = time.perf_counter()
+        response, usage = self.provider.invoke_with_usage(prompt)
+        self._record(key, prompt_hash, response, usage, time.perf_counter() - started)
+        return response, usage
+
+    async def ainvoke_with_usage(self, prompt: str) -> Tuple[str, Dict[str, int]]:
+        """
+        Answer a prompt from the cassette, or record the answer of the wrapped provider,
+        without blocking the event loop on the LLM call.
+
+        Args:
+            prompt: The prompt to send to the LLM
+
+        Returns:
+            The LLM response as a string and its recorded token usage
+
+        Raises:
+            CassetteMissError: In replay mode, if the prompt was never recorded
+        """
+        key, prompt_hash, entry = self._lookup(prompt)
+        if entry is not None:
+            self.logger.debug(f"Replaying response for prompt {prompt_hash[:12]}")
+            return entry["response"], dict(entry.get("usage") or {})
+
+        started = time.perf_counter()
+        response, usage = await self.provider.ainvoke_with_usage(prompt)
+        self._record(key, prompt_hash, response, usage, time.perf_counter() - started)
+        return response, usage
+
+
+_cassettes: Dict[Tuple[str, str], Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def open_cassette(path: str, mode: str = "auto") -> Cassette:
+    """
+    Get the process-wide cassette of a file, loading it on first use.
+
+    Args:
+        path: The path of the cassette file
+        mode: The cassette mode ('record', 'replay' or 'auto')
+
+    Returns:
+        The cassette, shared by every calculator using the same file and mode
+    """
+    key = (os.path.abspath(os.path.expanduser(path)), mode)
+    with _cassettes_lock:
+        if key not in _cassettes:
+            _cassettes[key] = Cassette(path, mode)
+        return _cassettes[key]
+
+
+def get_cassette() -> Optional[Cassette]:
+    """
+    Get the cassette configured through the environment.
+
+    The cassette is configured with BCP_CASSETTE_PATH (no cassette when unset)
+    and BCP_CASSETTE_MODE (record, replay or auto, default: auto).
+
+    Returns:
+        The shared cassette, or None if no cassette is configured
+    """
+    path = os.environ.get("BCP_CASSETTE_PATH")
+    if not path:
+        return None
+    return open_cassette(path, os.environ.get("BCP_CASSETTE_MODE", "auto").lower())
+
+
+def with_cassette(provider: LLMProvider, cassette: Optional[Cassette] = None) -> LLMProvider:
+    """
+    Wrap a provider with a cassette.
+
+    Args:
+        provider: The provider to wrap
+        cassette: The cassette to use (default: the one configured through the environment)
+
+    Returns:
+        The provider answering from the cassette, or the provider itself without a cassette
+    """
+    if cassette is None:
+        cassette = get_cassette()
+    if cassette is None or isinstance(provider, CassetteProvider):
+        return provider
+    return CassetteProvider(provider, cassette)
@@ -0,0 +1,213 @@
+"""
+Flow Authentication for BCP Calculator
+
+This module provides a process-wide cache of Flow API tokens shared by the Flow
+providers, with expiry-aware background refresh and single-flight fetching.
+"""
+
+import base64
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from .tracing import start_span
+from .transport import get_http_client
+
+TokenKey = Tuple[Optional[str], str, str]
+
+
+class FlowTokenCache:
+    """
+    Cache of Flow API tokens keyed by client id, tenant and base URL.
+
+    Tokens are refreshed in the background once they enter the refresh margin
+    before their expiry, and concurrent callers missing the cache wait for a
+    single fetch instead of each requesting their own token.
+    """
+
+    def __init__(self, refresh_margin: Optional[float] = None, default_ttl: Optional[float] = None):
+        """
+        Initialize the token cache.
+
+        Args:
+            refresh_margin: Seconds before expiry at which a token is refreshed
+                (default: BCP_FLOW_TOKEN_REFRESH_MARGIN environment variable or 300)
+            default_ttl: Lifetime assumed for tokens that do not state their expiry
+                (default: BCP_FLOW_TOKEN_TTL environment variable or 3600)
+        """
+        self.refresh_margin = (
+            refresh_margin
+            if refresh_margin is not None
+            else float(os.environ.get("BCP_FLOW_TOKEN_REFRESH_MARGIN", "300"))
+        )
+        self.default_ttl = (
+            default_ttl
+            if default_ttl is not None
+            else float(os.environ.get("BCP_FLOW_TOKEN_TTL", "3600"))
+        )
+        self.logger = logging.getLogger("bcp_calculator")
+        self._tokens: Dict[TokenKey, Tuple[str, float]] = {}
+        self._fetch_locks: Dict[TokenKey, threading.Lock] = {}
+        self._refreshing: Set[TokenKey] = set()
+        self._lock = threading.Lock()
+
+    def get_token(
+        self,
+        base_url: str,
+        client_id: Optional[str],
+        client_secret: Optional[str],
+        tenant: str = "flowteam",
+        rejected_token: Optional[str] = None,
+    ) -> str:
+        """
+        Get a valid Flow token, fetching one only when needed.
+
+        Args:
+            base_url: The Flow base URL
+            client_id: The Flow client id
+            client_secret: The Flow client secret
+            tenant: The Flow tenant
+            rejected_token: A token the API just rejected (e.g. with a 401), which
+                must not be returned again
+
+        Returns:
+            The Flow API token
+        """
+        key = (client_id, tenant, base_url)
+        with self._lock:
+            entry = self._tokens.get(key)
+        if entry is not None and entry[0] != rejected_token:
+            token, expires_at = entry
+            now = time.time()
+            if now < expires_at - self.refresh_margin:
+                return token
+            if now < expires_at:
+                self._refresh_in_background(key, client_secret)
+                return token
+
+        # Single-flight: the first caller fetches, the others wait and reuse its token
+        with self._fetch_lock(key):
+            with self._lock:
+                entry = self._tokens.get(key)
+            if entry is not None and entry[0] != rejected_token and time.time() < entry[1]:
+                return entry[0]
+            return self._fetch_and_store(key, client_secret)
+
+    def invalidate(self, base_url: str, client_id: Optional[str], tenant: str = "flowteam") -> None:
+        """
+        Drop the cached token of a client.
+
+        Args:
+            base_url: The Flow base URL
+            client_id: The Flow client id
+            tenant: The Flow tenant
+        """
+        with self._lock:
+            self._tokens.pop((client_id, tenant, base_url), None)
+
+    def clear(self) -> None:
+        """Drop every cached token."""
+        with self._lock:
+            self._tokens.clear()
+
+    def _fetch_lock(self, key: TokenKey) -> threading.Lock:
+        """Get the lock serializing the fetches of a key."""
+        with self._lock:
+            return self._fetch_locks.setdefault(key, threading.Lock())
+
+    def _refresh_in_background(self, key: TokenKey, client_secret: Optional[str]) -> None:
+        """Start a background refresh of a token about to expire, unless one is running."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh() -> None:
+            try:
+                with self._fetch_lock(key):
+                    self._fetch_and_store(key, client_secret)
+            except Exception as e:
+                self.logger.warning(f"Background Flow token refresh failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name="flow-token-refresh", daemon=True).start()
+
+    def _fetch_and_store(self, key: TokenKey, client_secret: Optional[str]) -> str:
+        """Fetch a new token and store it with its expiry time."""
+        client_id, tenant, base_url = key
+        token, expires_in = self._fetch_token(base_url, client_id, client_secret)
+        expires_at = time.time() + (expires_in if expires_in is not None else self.default_ttl)
+        with self._lock:
+            self._tokens[key] = (token, expires_at)
+        self.logger.debug(
+            f"Fetched Flow token for tenant {tenant}, valid for {expires_at - time.time():.0f}s"
+        )
+        return token
+
+    def _fetch_token(
+        self, base_url: str, client_id: Optional[str], client_secret: Optional[str]
+    ) -> Tuple[str, Optional[float]]:
+        """
+        Retrieve a new Flow token from the auth engine.
+
+        Returns:
+            The token and its lifetime in seconds, if the response states it
+        """
+        headers = {
+            "accept": "/",
+            "Content-Type": "application/json",
+            "FlowTenant": "flowteam",
+        }
+
+        payload = {"clientId": client_id, "clientSecret": client_secret, "appToAccess": "llm-api"}
+
+        url = f"{base_url}/auth-engine-api/v1/api-key/token"
+
+        with start_span("flow.token_fetch", url=url):
+            try:
+                response = get_http_client().post(url, json=payload, headers=headers)
+                response.raise_for_status()
+                data = response.json()
+
+            except Exception as e:
+                raise RuntimeError(f"Error calling Flow API: {str(e)}")
+
+        token = data.get("access_token")
+        expires_in = data.get("expires_in")
+        if expires_in is None:
+            expires_in = _jwt_lifetime(token)
+        return token, float(expires_in) if expires_in is not None else None
+
+
+def _jwt_lifetime(token: Optional[str]) -> Optional[float]:
+    """Read the remaining lifetime of a JWT from its ``exp`` claim, if it has one."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"]) - time.time()
+    except Exception:
+        return None
+
+
+_token_cache: Optional[FlowTokenCache] = None
+_token_cache_lock = threading.Lock()
+
+
+def get_flow_token_cache() -> FlowTokenCache:
+    """
+    Get the process-wide Flow token cache shared by the Flow providers.
+
+    Returns:
+        The shared token cache
+    """
+    global _token_cache
+
+    with _token_cache_lock:
+        if _token_cache is None:
+            _token_cache = FlowTokenCache()
+        return _token_cache
@@ -0,0 +1,470 @@
+"""
+Metrics for BCP Calculator
+
+This module keeps process-wide counters, gauges and histograms of the BCP
+calculations (step and LLM latencies, LLM errors and retries, parse fallbacks,
+tokens and cache hits) and renders them in the Prometheus text exposition
+format, so the API and MCP servers can serve them on ``/metrics``.
+"""
+
+import math
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .cache import active_caches
+from .callbacks import BCPCallbackHandler
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets in seconds, sized for LLM calls taking from a few hundred ms to minutes
+DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value as Prometheus expects it."""
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues) -> str:
+    """Format a label set, escaping the values."""
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Metric:
+    """Base class of the metrics: a name, a help text and the values of each label set."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        """
+        Initialize the metric.
+
+        Args:
+            name: The metric name
+            documentation: The help text of the metric
+            labelnames: The names of the labels of the metric
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        """Get the label values of a label set, in label name order."""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects the labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def get(self, **labels: Any) -> Any:
+        """
+        Get the current value of a label set.
+
+        Args:
+            **labels: The label values
+
+        Returns:
+            The value, or None if the label set was never recorded
+        """
+        with self._lock:
+            return self._values.get(self._key(labels))
+
+    def clear(self) -> None:
+        """Forget the values of every label set."""
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """Get the (name, labels, value) samples of the metric."""
+        with self._lock:
+            return [
+                (self.name, _format_labels(self.labelnames, key), value)
+                for key, value in sorted(self._values.items())
+            ]
+
+    def render(self) -> List[str]:
+        """Render the metric in the Prometheus text format."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(
+            f"{name}{labels} {_format_value(value)}" for name, labels, value in self.samples()
+        )
+        return lines
+
+
+class Counter(Metric):
+    """Monotonic counter."""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        """
+        Increase the counter of a label set.
+
+        Args:
+            amount: The increase
+            **labels: The label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value: float, **labels: Any) -> None:
+        """
+        Mirror a total counted elsewhere (e.g. the statistics of a cache).
+
+        Args:
+            value: The total
+            **labels: The label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        """
+        Set the gauge of a label set.
+
+        Args:
+            value: The value
+            **labels: The label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        """
+        Increase the gauge of a label set (decrease it with a negative amount).
+
+        Args:
+            amount: The increase
+            **labels: The label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Histogram(Metric):
+    """Distribution of observations in cumulative buckets, with their count and sum."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        """
+        Initialize the histogram.
+
+        Args:
+            name: The metric name
+            documentation: The help text of the metric
+            labelnames: The names of the labels of the metric
+            buckets: The upper bounds of the buckets, +Inf is added
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """
+        Record an observation.
+
+        Args:
+            value: The observed value
+            **labels: The label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        samples = []
+        names = self.labelnames + ("le",)
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, counts):
+                    samples.append(
+                        (
+                            f"{self.name}_bucket",
+                            _format_labels(names, key + (_format_value(bound),)),
+                            count,
+                        )
+                    )
+                labels = _format_labels(self.labelnames, key)
+                samples.append((f"{self.name}_count", labels, counts[-1]))
+                samples.append((f"{self.name}_sum", labels, total))
+        return samples
+
+
+class MetricsRegistry:
+    """Set of metrics rendered together, refreshed by collectors at scrape time."""
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        Add a metric to the registry.
+
+        Args:
+            metric: The metric
+
+        Returns:
+            The metric already registered under that name, or the new one
+        """
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """
+        Add a function called before each rendering, to refresh gauges read from elsewhere.
+
+        Args:
+            collector: The function, called without arguments
+        """
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            The exposition text
+        """
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = list(self._metrics.values())
+        for collector in collectors:
+            collector()
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class BCPMetrics:
+    """The metrics of the BCP calculations of the process."""
+
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        """
+        Initialize the metrics.
+
+        Args:
+            registry: The registry holding the metrics (default: a new one)
+        """
+        self.registry = registry or MetricsRegistry()
+        register = self.registry.register
+        self.step_duration = register(
+            Histogram(
+                "bcp_step_duration_seconds",
+                "Wall time of the calculation steps",
+                ("step", "provider"),
+            )
+        )
+        self.step_errors = register(
+            Counter("bcp_step_errors_total", "Calculation steps that failed", ("step", "provider"))
+        )
+        self.llm_duration = register(
+            Histogram(
+                "bcp_llm_duration_seconds", "Wall time of the LLM calls", ("step", "provider")
+            )
+        )
+        self.llm_calls = register(
+            Counter("bcp_llm_calls_total", "LLM calls (step cache misses)", ("step", "provider"))
+        )
+        self.llm_errors = register(
+            Counter("bcp_llm_errors_total", "LLM calls that raised an error", ("step", "provider"))
+        )
+        self.llm_retries = register(
+            Counter(
+                "bcp_llm_retries_total",
+                "LLM requests retried by the providers",
+                ("provider", "reason"),
+            )
+        )
+        self.parse_fallbacks = register(
+            Counter(
+                "bcp_parse_fallbacks_total",
+                "LLM responses that were not valid JSON and were kept as raw_response",
+                ("step", "provider"),
+            )
+        )
+        self.tokens = register(
+            Counter(
+                "bcp_llm_tokens_total", "Tokens used by the LLM calls", ("step", "provider", "type")
+            )
+        )
+        self.calculations = register(
+            Counter(
+                "bcp_calculations_total",
+                "Finished BCP calculations, including result cache hits",
+                ("provider",),
+            )
+        )
+        self.calculation_duration = register(
+            Histogram(
+                "bcp_calculation_duration_seconds",
+                "Wall time of the BCP calculations",
+                ("provider",),
+            )
+        )
+        self.jobs_in_flight = register(
+            Gauge("bcp_jobs_in_flight", "Calculations running in the server", ())
+        )
+        self.cache_lookups = register(
+            Counter(
+                "bcp_cache_lookups_total",
+                "Lookups of the result and step caches",
+                ("cache", "result"),
+            )
+        )
+        self.cache_hit_ratio = register(
+            Gauge("bcp_cache_hit_ratio", "Share of the cache lookups that were hits", ("cache",))
+        )
+        self.registry.add_collector(self._collect_caches)
+        self._handlers: Dict[str, "MetricsCallbackHandler"] = {}
+        self._lock = threading.Lock()
+
+    def handler(self, provider: str) -> "MetricsCallbackHandler":
+        """
+        Get the callback handler recording the calculations of a provider.
+
+        Args:
+            provider: The provider name used as label
+
+        Returns:
+            The handler, shared by every calculation of the provider
+        """
+        provider = provider.lower()
+        with self._lock:
+            if provider not in self._handlers:
+                self._handlers[provider] = MetricsCallbackHandler(self, provider)
+            return self._handlers[provider]
+
+    def _collect_caches(self) -> None:
+        """Mirror the statistics of the caches in use."""
+        for name, cache in active_caches().items():
+            stats = cache.stats()
+            self.cache_lookups.set_total(stats["hits"], cache=name, result="hit")
+            self.cache_lookups.set_total(stats["misses"], cache=name, result="miss")
+            self.cache_hit_ratio.set(stats["hit_ratio"], cache=name)
+
+    def render(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+            The exposition text
+        """
+        return self.registry.render()
+
+
+class MetricsCallbackHandler(BCPCallbackHandler):
+    """Callback handler recording the calculations of one provider in the BCP metrics."""
+
+    def __init__(self, metrics: BCPMetrics, provider: str):
+        """
+        Initialize the handler.
+
+        Args:
+            metrics: The metrics to update
+            provider: The provider name used as label
+        """
+        self.metrics = metrics
+        self.provider = provider
+
+    def on_pipeline_end(self, story_name: str, results: Dict[str, Any], duration: float) -> None:
+        self.metrics.calculations.inc(provider=self.provider)
+        self.metrics.calculation_duration.observe(duration, provider=self.provider)
+
+    def on_step_end(
+        self,
+        step_name: str,
+        story_name: str,
+        response: Any,
+        error: Optional[Exception],
+        duration: float,
+    ) -> None:
+        self.metrics.step_duration.observe(duration, step=step_name, provider=self.provider)
+        if error is not None:
+            self.metrics.step_errors.inc(step=step_name, provider=self.provider)
+
+    def on_llm_end(
+        self,
+        step_name: Optional[str],
+        prompt_file: str,
+        response_size: int,
+        error: Optional[Exception],
+        duration: float,
+        usage: Dict[str, int],
+    ) -> None:
+        step = step_name or prompt_file
+        self.metrics.llm_calls.inc(step=step, provider=self.provider)
+        self.metrics.llm_duration.observe(duration, step=step, provider=self.provider)
+        if error is not None:
+            self.metrics.llm_errors.inc(step=step, provider=self.provider)
+        for token_type in ("input", "output", "cached"):
+            count = usage.get(f"{token_type}_tokens", 0)
+            if count:
+                self.metrics.tokens.inc(count, step=step, provider=self.provider, type=token_type)
+
+    def on_llm_retry(self, step_name: Optional[str], reason: str) -> None:
+        self.metrics.llm_retries.inc(provider=self.provider, reason=reason)
+
+    def on_parse_result(
+        self, step_name: Optional[str], prompt_file: str, parsed: Any, success: bool
+    ) -> None:
+        if not success:
+            self.metrics.parse_fallbacks.inc(step=step_name or prompt_file, provider=self.provider)
+
+
+_metrics: Optional[BCPMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> BCPMetrics:
+    """
+    Get the process-wide BCP metrics.
+
+    Returns:
+        The shared metrics
+    """
+    global _metrics
+
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = BCPMetrics()
+        return _metrics
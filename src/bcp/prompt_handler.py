@@ -4,57 +4,97 @@ Prompt Handler for BCP Calculator
 This module handles loading and processing prompts for the BCP Calculator.
 """
 
-import os
+import hashlib
 import json
 import logging
 import re
-from typing import Dict, Any, Optional
-
-from jinja2 import Template
-from langchain_core.output_parsers import StrOutputParser
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
+from .cache import PersistentCache, make_cache_key
+from .callbacks import emit_active
+from .cassette import Cassette
 from .llm_providers import LLMProvider, get_provider
+from .templates import PROMPTS_DIR, get_prompt_templates
+from .tracing import start_span
+from .usage import empty_usage
+
 
 class PromptHandler:
     """
     Handler for loading and processing prompts.
     """
-    
-    def __init__(self, logger: logging.Logger, provider_name: str = "openai"):
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        provider_name: str = "openai",
+        step_cache: PersistentCache | None = None,
+        cassette: Cassette | None = None,
+    ):
         """
         Initialize the prompt handler.
-        
+
         Args:
             logger: The logger instance
             provider_name: The name of the LLM provider to use ('openai' or 'claude')
+            step_cache: Optional cache of parsed responses, keyed by the provider
+                parameters and the hash of the rendered prompt
+            cassette: Optional cassette recording or replaying the LLM responses
+                (default: the BCP_CASSETTE_PATH environment variable)
         """
         self.logger = logger
-        # Get the directory of the current file
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        # The prompts directory should be at the same level as the current file
-        self.prompts_dir = os.path.join(current_dir, "prompts")
-        self.provider = get_provider(provider_name, logger)
-    
+        self.prompts_dir = PROMPTS_DIR
+        self.templates = get_prompt_templates(self.prompts_dir)
+        self.provider = get_provider(provider_name, logger, cassette=cassette)
+        self.step_cache = step_cache
+
     def load_prompt(self, prompt_file: str) -> str:
         """
         Load a prompt template from file.
-        
+
+        The content is served from the shared template store and only read
+        from disk again when the file changes.
+
         Args:
             prompt_file: The filename of the prompt template
-            
+
         Returns:
             The prompt template content
         """
-        prompt_path = os.path.join(self.prompts_dir, prompt_file)
-        self.logger.debug(f"Loading prompt from {prompt_path}")
-        
+        self.logger.debug(f"Loading prompt {prompt_file} from {self.prompts_dir}")
+
         try:
-            with open(prompt_path, 'r', encoding='utf-8') as file:
-                return file.read()
+            return self.templates.get_source(prompt_file)
         except Exception as e:
             self.logger.error(f"Error loading prompt {prompt_file}: {str(e)}")
             raise
-    
+
+    def template_hash(self, prompt_file: str) -> str:
+        """
+        Get the content hash of a prompt template.
+
+        Args:
+            prompt_file: The filename of the prompt template
+
+        Returns:
+            The SHA-256 hex digest of the template content
+        """
+        return self.templates.template_hash(prompt_file)
+
+    def template_hashes(self, prompt_files: List[str]) -> Dict[str, str]:
+        """
+        Get the content hashes of several prompt templates.
+
+        Args:
+            prompt_files: The filenames of the prompt templates
+
+        Returns:
+            A dictionary mapping each filename to its content hash
+        """
+        return {prompt_file: self.template_hash(prompt_file) for prompt_file in prompt_files}
+
     def render_prompt(self, prompt_template: str, variables: Dict[str, Any]) -> str:
         """
         Render a prompt template with variables.
@@ -67,14 +107,14 @@ class PromptHandler:
             The rendered prompt
         """
         self.logger.debug(f"Rendering prompt with variables: {list(variables.keys())}")
-        
+
         try:
-            template = Template(prompt_template)
+            template = self.templates.compile(prompt_template)
             return template.render(**variables)
         except Exception as e:
             self.logger.error(f"Error rendering prompt: {str(e)}")
             raise
-    
+
     def process_prompt(self, prompt_file: str, variables: Dict[str, Any]) -> Dict[str, Any]:
         """
         Process a prompt with the LLM.
@@ -86,22 +126,217 @@ class PromptHandler:
         Returns:
             The parsed response from the LLM
         """
+        with start_span("bcp.prompt", prompt_file=prompt_file) as span:
+            rendered_prompt, cache_key, cached = self._prepare_prompt(prompt_file, variables, span)
+            if cached is not None:
+                return cached
+
+            # Use the provider to invoke the LLM
+            with self._llm_call(prompt_file, rendered_prompt) as call:
+                if hasattr(self.provider, "invoke_with_usage"):
+                    call["response"], call["usage"] = self.provider.invoke_with_usage(
+                        rendered_prompt
+                    )
+                else:
+                    call["response"], call["usage"] = (
+                        self.provider.invoke(rendered_prompt),
+                        self._no_usage(),
+                    )
+
+            return self._store_response(cache_key, self._parse(prompt_file, call["response"]))
+
+    async def aprocess_prompt(self, prompt_file: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process a prompt with the LLM without blocking the event loop.
+
+        Args:
+            prompt_file: The filename of the prompt template
+            variables: The variables to render in the template
+
+        Returns:
+            The parsed response from the LLM
+        """
+        with start_span("bcp.prompt", prompt_file=prompt_file) as span:
+            rendered_prompt, cache_key, cached = self._prepare_prompt(prompt_file, variables, span)
+            if cached is not None:
+                return cached
+
+            # Use the provider to invoke the LLM
+            with self._llm_call(prompt_file, rendered_prompt) as call:
+                if hasattr(self.provider, "ainvoke_with_usage"):
+                    call["response"], call["usage"] = await self.provider.ainvoke_with_usage(
+                        rendered_prompt
+                    )
+                else:
+                    call["response"], call["usage"] = (
+                        await self.provider.ainvoke(rendered_prompt),
+                        self._no_usage(),
+                    )
+
+            return self._store_response(cache_key, self._parse(prompt_file, call["response"]))
+
+    def _prepare_prompt(
+        self, prompt_file: str, variables: Dict[str, Any], span: Any
+    ) -> Tuple[str, Optional[str], Optional[Any]]:
+        """
+        Render a prompt and look up its parsed response in the step cache.
+
+        Args:
+            prompt_file: The filename of the prompt template
+            variables: The variables to render in the template
+            span: The span of the prompt, if tracing is enabled
+
+        Returns:
+            A tuple with the rendered prompt, the step cache key and the cached
+            parsed response, or None on a cache miss
+        """
         self.logger.info(f"Processing prompt: {prompt_file}")
-        
+
         # Load and render prompt
-        prompt_template = self.load_prompt(prompt_file)
-        rendered_prompt = self.render_prompt(prompt_template, variables)
-        
-        # Use the provider to invoke the LLM
-        response = self.provider.invoke(rendered_prompt)
-        
-        # Parse response
+        with start_span("bcp.prompt.render", prompt_file=prompt_file):
+            prompt_template = self.load_prompt(prompt_file)
+            rendered_prompt = self.render_prompt(prompt_template, variables)
+        emit_active("on_prompt_rendered", prompt_file, len(rendered_prompt))
+
+        cache_key = self._step_cache_key(rendered_prompt)
+        cached = self._get_cached_response(cache_key, prompt_file)
+        if span is not None:
+            span.set_attribute("prompt_size", len(rendered_prompt))
+            span.set_attribute("cache_hit", cached is not None)
+        return rendered_prompt, cache_key, cached
+
+    @contextmanager
+    def _llm_call(self, prompt_file: str, rendered_prompt: str) -> Iterator[Dict[str, Any]]:
+        """
+        Trace an LLM call and notify its start and end around the code sending it.
+
+        The code sets the ``response`` and its token ``usage`` in the yielded dictionary.
+
+        Args:
+            prompt_file: The filename of the prompt template
+            rendered_prompt: The rendered prompt sent to the LLM
+
+        Yields:
+            The dictionary receiving the response and usage of the call
+        """
+        emit_active("on_llm_start", prompt_file, len(rendered_prompt))
+        started = time.perf_counter()
+        call: Dict[str, Any] = {}
+        with start_span("bcp.llm", provider=type(self.provider).__name__) as llm_span:
+            try:
+                yield call
+            except Exception as e:
+                emit_active(
+                    "on_llm_end", prompt_file, 0, e, time.perf_counter() - started, self._no_usage()
+                )
+                raise
+            if llm_span is not None:
+                llm_span.set_attribute("response_size", len(call["response"]))
+                llm_span.set_attribute("total_tokens", call["usage"].get("total_tokens", 0))
+        emit_active(
+            "on_llm_end",
+            prompt_file,
+            len(call["response"]),
+            None,
+            time.perf_counter() - started,
+            call["usage"],
+        )
+
+    def _no_usage(self) -> Dict[str, int]:
+        """Get the token usage reported for providers that do not track it."""
+        usage = empty_usage()
+        del usage["calls"], usage["llm_time"]
+        return usage
+
+    def _step_cache_key(self, rendered_prompt: str) -> Optional[str]:
+        """
+        Build the step cache key of a rendered prompt.
+
+        Args:
+            rendered_prompt: The rendered prompt
+
+        Returns:
+            The cache key, or None if step caching is disabled
+        """
+        if self.step_cache is None:
+            return None
+
+        prompt_hash = hashlib.sha256(rendered_prompt.encode("utf-8")).hexdigest()
+        return make_cache_key(params=self.provider.get_params(), prompt=prompt_hash)
+
+    def _get_cached_response(self, cache_key: Optional[str], prompt_file: str) -> Optional[Any]:
+        """
+        Look up a previously parsed response.
+
+        Args:
+            cache_key: The step cache key, or None if step caching is disabled
+            prompt_file: The filename of the prompt template, for logging
+
+        Returns:
+            The cached parsed response, or None on a cache miss
+        """
+        if cache_key is None:
+            return None
+
+        cached = self.step_cache.get(cache_key)
+        if cached is not None:
+            self.logger.info(f"Using cached response for prompt: {prompt_file}")
+        return cached
+
+    def _store_response(self, cache_key: Optional[str], response: Any) -> Any:
+        """
+        Store a parsed response in the step cache.
+
+        Responses that could not be parsed as JSON are not cached.
+
+        Args:
+            cache_key: The step cache key, or None if step caching is disabled
+            response: The parsed response
+
+        Returns:
+            The response, unchanged
+        """
+        if cache_key is not None and not (
+            isinstance(response, dict) and "raw_response" in response
+        ):
+            self.step_cache.set(cache_key, response)
+        return response
+
+    def _parse(self, prompt_file: str, response: str) -> Any:
+        """
+        Parse a raw LLM response and notify the active callbacks of the result.
+
+        Args:
+            prompt_file: The filename of the prompt template
+            response: The raw response from the LLM
+
+        Returns:
+            The parsed response
+        """
+        with start_span("bcp.prompt.parse", prompt_file=prompt_file) as span:
+            parsed = self._parse_response(response)
+            success = not (isinstance(parsed, dict) and "raw_response" in parsed)
+            if span is not None:
+                span.set_attribute("success", success)
+        emit_active("on_parse_result", prompt_file, parsed, success)
+        return parsed
+
+    def _parse_response(self, response: str) -> Dict[str, Any]:
+        """
+        Parse the raw LLM response into a JSON object.
+
+        Args:
+            response: The raw response from the LLM
+
+        Returns:
+            The parsed JSON object, or the raw text under "raw_response" if it is not valid JSON
+        """
         try:
             # First, try to extract JSON from markdown code blocks
             json_content = self._extract_json_from_response(response)
             if json_content:
                 return json.loads(json_content)
-            
+
             # Fallback: Check if response is direct JSON
             if response.strip().startswith('{') and response.strip().endswith('}'):
                 return json.loads(response)
@@ -110,7 +345,7 @@ class PromptHandler:
         except json.JSONDecodeError:
             self.logger.warning("Response is not valid JSON, returning raw text")
             return {"raw_response": response}
-    
+
     def _extract_json_from_response(self, response: str) -> Optional[str]:
         """
         Extract JSON content from markdown code blocks or other formats.
@@ -126,17 +361,17 @@ class PromptHandler:
         match = re.search(json_pattern, response, re.DOTALL)
         if match:
             return match.group(1).strip()
-        
+
         # Try to find JSON without markdown blocks
         json_pattern = r'```\s*\n(\{.*?\})\s*\n```'
         match = re.search(json_pattern, response, re.DOTALL)
         if match:
             return match.group(1).strip()
-        
+
         # Try to find standalone JSON
         json_pattern = r'(\{[^}]*"total"[^}]*\})'
         match = re.search(json_pattern, response, re.DOTALL)
         if match:
             return match.group(1).strip()
-        
-        return None
\ No newline at end of file
+
+        return None
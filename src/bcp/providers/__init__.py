@@ -0,0 +1,8 @@
+"""
+LLM Provider implementations for BCP Calculator
+
+Every provider lives in its own module, importing its LLM client library, so
+a process only pays for the clients of the providers it uses. Load providers
+through ``bcp.llm_providers.get_provider``, which imports their module on
+first use.
+"""
@@ -0,0 +1,157 @@
+"""
+Base LLM Provider for BCP Calculator
+
+This module defines the interface every LLM provider implements. It imports no
+LLM client library, so loading it stays cheap; each provider module imports
+its own client when the provider is first requested.
+"""
+
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from ..rate_limit import RateLimiter, scoped_rate_limiters
+from ..usage import usage_from_message
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseLanguageModel
+    from langchain_core.output_parsers import StrOutputParser
+
+_output_parser: Optional["StrOutputParser"] = None
+
+
+def get_output_parser() -> "StrOutputParser":
+    """
+    Get the string output parser shared by every provider, creating it on first use.
+
+    Returns:
+        The string output parser
+    """
+    global _output_parser
+    if _output_parser is None:
+        from langchain_core.output_parsers import StrOutputParser
+
+        _output_parser = StrOutputParser()
+    return _output_parser
+
+
+class LLMProvider(ABC):
+    """
+    Base abstract class for LLM providers.
+
+    The model is built once, on first use, and shared by every call so the
+    underlying HTTP connections stay warm. Providers are safe to share across
+    threads. Providers given a rate limiter wait for a free
+    request slot before every call.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        """
+        Initialize the LLM provider.
+
+        Args:
+            logger: The logger instance
+        """
+        self.logger = logger
+        self._model: Optional["BaseLanguageModel"] = None
+        self._model_lock = threading.Lock()
+        self.rate_limiter: Optional[RateLimiter] = None
+
+    @abstractmethod
+    def get_model(self) -> "BaseLanguageModel":
+        """
+        Get the LLM model for this provider.
+
+        Returns:
+            The LLM model
+        """
+        pass
+
+    def get_params(self) -> Dict[str, Any]:
+        """
+        Get the parameters that determine the output of this provider.
+
+        Used to key caches of LLM output, so subclasses must include every
+        sampling parameter they send to the model.
+
+        Returns:
+            A dictionary with the provider class and its model parameters
+        """
+        return {"provider": type(self).__name__}
+
+    def _get_built_model(self) -> "BaseLanguageModel":
+        """Get the model shared by every call, building it on first use."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self.get_model()
+        return self._model
+
+    def _rate_limiters(self) -> Tuple[RateLimiter, ...]:
+        """Get the limiters a request waits for: the scoped ones, then the provider one."""
+        if self.rate_limiter is None:
+            return scoped_rate_limiters()
+        return scoped_rate_limiters() + (self.rate_limiter,)
+
+    def invoke(self, prompt: str) -> str:
+        """
+        Invoke the LLM with a prompt.
+
+        Args:
+            prompt: The prompt to send to the LLM
+
+        Returns:
+            The LLM response as a string
+        """
+        return self.invoke_with_usage(prompt)[0]
+
+    async def ainvoke(self, prompt: str) -> str:
+        """
+        Invoke the LLM with a prompt without blocking the event loop.
+
+        Args:
+            prompt: The prompt to send to the LLM
+
+        Returns:
+            The LLM response as a string
+        """
+        return (await self.ainvoke_with_usage(prompt))[0]
+
+    def invoke_with_usage(self, prompt: str) -> Tuple[str, Dict[str, int]]:
+        """
+        Invoke the LLM with a prompt and report the tokens it used.
+
+        Args:
+            prompt: The prompt to send to the LLM
+
+        Returns:
+            The LLM response as a string and its token usage
+        """
+        for limiter in self._rate_limiters():
+            waited = limiter.acquire()
+            if waited:
+                self.logger.debug(f"Waited {waited:.2f}s for the rate limit")
+        self.logger.debug("Sending prompt to LLM")
+        message = self._get_built_model().invoke(prompt)
+        self.logger.debug("Received response from LLM")
+        return get_output_parser().invoke(message), usage_from_message(message)
+
+    async def ainvoke_with_usage(self, prompt: str) -> Tuple[str, Dict[str, int]]:
+        """
+        Invoke the LLM with a prompt without blocking the event loop and report the tokens it used.
+
+        Args:
+            prompt: The prompt to send to the LLM
+
+        Returns:
+            The LLM response as a string and its token usage
+        """
+        for limiter in self._rate_limiters():
+            waited = await limiter.aacquire()
+            if waited:
+                self.logger.debug(f"Waited {waited:.2f}s for the rate limit")
+        self.logger.debug("Sending prompt to LLM")
+        message = await self._get_built_model().ainvoke(prompt)
+        self.logger.debug("Received response from LLM")
+        return get_output_parser().invoke(message), usage_from_message(message)
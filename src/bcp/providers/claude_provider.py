@@ -0,0 +1,78 @@
+"""
+Claude Provider for BCP Calculator
+
+This module provides the provider of the Anthropic Messages API.
+"""
+
+import logging
+from functools import cached_property
+from typing import Any, Dict
+
+import anthropic
+from langchain_anthropic import ChatAnthropic
+from langchain_core.language_models import BaseLanguageModel
+
+from ..transport import get_http_client
+from .base import LLMProvider
+
+
+class PooledChatAnthropic(ChatAnthropic):
+    """ChatAnthropic sending its synchronous calls through the pooled client of the transport."""
+
+    @cached_property
+    def _client(self) -> anthropic.Client:
+        params = {**self._client_params, "http_client": get_http_client()}
+        if self.default_request_timeout is None:
+            # Without an explicit timeout, the BCP_HTTP_* timeouts of the pooled client apply
+            params.pop("timeout", None)
+        return anthropic.Client(**params)
+
+
+class ClaudeProvider(LLMProvider):
+    """Anthropic Claude provider implementation."""
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        model_name: str = "claude-3-sonnet-20240229-v1:0",
+        temperature: float = 0,
+    ):
+        """
+        Initialize the Claude provider.
+
+        Args:
+            logger: The logger instance
+            model_name: The name of the Claude model to use
+            temperature: The temperature parameter for the model
+        """
+        super().__init__(logger)
+        self.model_name = model_name
+        self.temperature = temperature
+        self.logger.info(f"Initialized Claude provider with model {model_name}")
+
+    def get_params(self) -> Dict[str, Any]:
+        """
+        Get the parameters that determine the output of the Claude provider.
+
+        Returns:
+            A dictionary with the provider class, model name and temperature
+        """
+        return {
+            **super().get_params(),
+            "model_name": self.model_name,
+            "temperature": self.temperature,
+        }
+
+    def get_model(self) -> BaseLanguageModel:
+        """
+        Get the Claude model.
+
+        Synchronous calls go through the process-wide pooled client of
+        ``bcp.transport``, sized by the BCP_HTTP_* environment variables, so
+        every provider instance reuses the same connections. Asynchronous calls
+        use the async client langchain-anthropic caches for the whole process.
+
+        Returns:
+            The Claude model
+        """
+        return PooledChatAnthropic(model=self.model_name, temperature=self.temperature)
@@ -0,0 +1,255 @@
+"""
+Fake Provider for BCP Calculator
+
+This module provides a deterministic provider answering every BCP prompt with
+a canned response, for tests and benchmarks that make no network calls.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.language_models import BaseChatModel, BaseLanguageModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import model_validator
+
+from .base import LLMProvider
+
+
+def _json_block(value: Any) -> str:
+    """Format a value the way the models answer: JSON in a markdown code block."""
+    return f"```json\n{json.dumps(value, indent=2)}\n```"
+
+
+# Canned responses of the fake provider, one per prompt template, following the
+# output format each template asks for (step 0 answers in plain text)
+FAKE_RESPONSES: Dict[str, str] = {
+    "step0_flow_bcp_non_functional_detector.jinja2": "Functional",
+    "step1_flow_story_maturity_complexity.jinja2": _json_block(
+        {
+            "score": 4,
+            "assessment": (
+                "The story is clear and testable, but the expected user interactions"
+                " could be detailed further."
+            ),
+            "classification": "Demonstrates Good Maturity",
+            "questions": ["Which user interactions are expected on the dynamic elements?"],
+            "reason": "Some user interactions are not described.",
+        }
+    ),
+    "step2_flow_story_invest_maturity.jinja2": _json_block(
+        {
+            "score": 4,
+            "assessment": (
+                "The story is independent, valuable and testable, although its size"
+                " could be reduced."
+            ),
+            "classification": "Demonstrates Good Maturity",
+            "questions": ["Can the story be split into smaller deliverables?"],
+            "reason": "The story could be smaller.",
+        }
+    ),
+    "step3_flow_bcp_break_elements.jinja2": _json_block(
+        {
+            "User View": {
+                "AS": "customer",
+                "I WANT": "to complete the described task",
+                "SO THAT": "I reach my goal",
+            },
+            "Business Narrative": (
+                "Customers need a simple way to complete the task described in the story."
+            ),
+            "Requirements and Business Rules": (
+                "Inputs are validated. Only authenticated users can submit."
+            ),
+            "Acceptance Criteria": [
+                "User opens the screen",
+                "User submits the form",
+                "System confirms the result",
+            ],
+            "Non-Functional Requirements": ["Response time under 2 seconds"],
+            "Integrations (Boundaries)": ["Authentication service", "Notification service"],
+            "Test Plan": {
+                "GIVEN": "an authenticated user",
+                "WHEN": "the form is submitted",
+                "THEN": "the result is confirmed",
+            },
+            "Developer Tasks": ["Build the screen", "Integrate the services"],
+        }
+    ),
+    "step4_flow_bcp_boundaries.jinja2": _json_block(
+        [
+            {"Boundary": 1, "Summary": "Authentication service", "Size": "S"},
+            {"Boundary": 2, "Summary": "Notification service", "Size": "M"},
+        ]
+    ),
+    "step5_flow_bcp_interface_elements.jinja2": _json_block(
+        {
+            "step": "Interface",
+            "description": "Static elements: 6. Dynamic elements: 4.",
+            "Static Elements List": "Title, labels, help text",
+            "Dynamic Elements List": "Form fields, submit button, result message",
+            "Static": 6,
+            "Dynamic": 4,
+        }
+    ),
+    "step6_flow_bcp_business_rule.jinja2": _json_block(
+        [
+            {"Rule": 1, "Summary": "Input validation.", "Score": 2},
+            {"Rule": 2, "Summary": "Authentication check.", "Score": 1},
+        ]
+    ),
+}
+
+# Phrases identifying each prompt template in the opening of a rendered prompt,
+# checked in order (the first match wins)
+FAKE_PROMPT_MARKERS: List[Tuple[str, str]] = [
+    ("user story formatting assistant", "step3_flow_bcp_break_elements.jinja2"),
+    ("complexity size of the work", "step4_flow_bcp_boundaries.jinja2"),
+    ("implementing interface elements", "step5_flow_bcp_interface_elements.jinja2"),
+    ("complexity of logical rules", "step6_flow_bcp_business_rule.jinja2"),
+    ("INVEST", "step2_flow_story_invest_maturity.jinja2"),
+    ("Functional and Non-Functional", "step0_flow_bcp_non_functional_detector.jinja2"),
+    ("maturity", "step1_flow_story_maturity_complexity.jinja2"),
+]
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model answering every BCP prompt with a canned response after a simulated latency."""
+
+    responses: Dict[str, str]
+    latency: float = 0.0
+    jitter: float = 0.0
+    seed: Optional[int] = None
+    rng: Any = None
+
+    class Config:
+        """Configuration for this pydantic object."""
+
+        arbitrary_types_allowed = True
+        extra = "forbid"
+
+    @model_validator(mode="before")
+    def validate_environment(cls, values: Dict) -> Dict:
+        """Create the random generator of the latencies."""
+        values["rng"] = random.Random(values.get("seed"))
+        return values
+
+    def _llm_type(self) -> str:
+        """Return type of LLM."""
+        return "fake"
+
+    def delay(self) -> float:
+        """
+        Draw the latency of a call.
+
+        Latencies follow a log-normal distribution (LLM latencies are right-skewed)
+        with mean ``latency`` and standard deviation ``jitter``, or are constant
+        without jitter.
+
+        Returns:
+            The latency in seconds
+        """
+        if self.latency <= 0:
+            return 0.0
+        if self.jitter <= 0:
+            return self.latency
+        sigma2 = math.log(1 + (self.jitter / self.latency) ** 2)
+        return self.rng.lognormvariate(math.log(self.latency) - sigma2 / 2, math.sqrt(sigma2))
+
+    def _respond(self, messages: List[BaseMessage]) -> ChatResult:
+        """Build the canned response of a prompt, with token usage estimated from its size."""
+        prompt = "\n".join(str(message.content) for message in messages)
+        opening = prompt[:1000]
+        prompt_file = next(
+            (file for marker, file in FAKE_PROMPT_MARKERS if marker in opening), None
+        )
+        if prompt_file is None or prompt_file not in self.responses:
+            raise ValueError("The fake provider has no response for this prompt")
+        content = self.responses[prompt_file]
+        # Roughly four characters per token
+        input_tokens, output_tokens = len(prompt) // 4, len(content) // 4
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs: Any
+    ) -> ChatResult:
+        """Answer after sleeping for the simulated latency."""
+        time.sleep(self.delay())
+        return self._respond(messages)
+
+    async def _agenerate(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs: Any
+    ) -> ChatResult:
+        """Answer after awaiting the simulated latency."""
+        await asyncio.sleep(self.delay())
+        return self._respond(messages)
+
+
+class FakeProvider(LLMProvider):
+    """Deterministic provider for tests and benchmarks, making no network calls."""
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        seed: Optional[int] = None,
+        responses: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Initialize the fake provider.
+
+        Args:
+            logger: The logger instance
+            latency: Mean simulated latency of a call in seconds
+            jitter: Standard deviation of the simulated latency in seconds
+            seed: Seed of the latency draws, for reproducible runs
+            responses: Raw responses per prompt file, overriding the canned ones
+        """
+        super().__init__(logger)
+        self.model_name = "fake"
+        self.latency = latency
+        self.jitter = jitter
+        self.seed = seed
+        self.responses = {**FAKE_RESPONSES, **(responses or {})}
+        self.logger.info(f"Initialized fake provider with {latency}s latency")
+
+    def get_params(self) -> Dict[str, Any]:
+        """
+        Get the parameters that determine the output of the fake provider.
+
+        Returns:
+            A dictionary with the provider class and the hash of its responses
+        """
+        responses = json.dumps(self.responses, sort_keys=True).encode("utf-8")
+        return {
+            **super().get_params(),
+            "model_name": self.model_name,
+            "responses": hashlib.sha256(responses).hexdigest(),
+        }
+
+    def get_model(self) -> BaseLanguageModel:
+        """
+        Get the fake model.
+
+        Returns:
+            The fake chat model
+        """
+        return FakeChatModel(
+            responses=self.responses, latency=self.latency, jitter=self.jitter, seed=self.seed
+        )
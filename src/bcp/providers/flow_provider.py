@@ -0,0 +1,499 @@
+"""
+Flow Providers for BCP Calculator
+
+This module provides the chat models and providers of the Flow OpenAI and
+Flow Bedrock APIs, sent over the shared pooled transport.
+"""
+
+import asyncio
+import logging
+import os
+from abc import abstractmethod
+from typing import Any, Callable, ClassVar, Dict, Iterator, List, Optional, Tuple, Type
+
+from langchain_core.language_models import BaseChatModel, BaseLanguageModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import model_validator
+
+from ..callbacks import emit_active
+from ..flow_auth import get_flow_token_cache
+from ..tracing import current_traceparent, start_span
+from ..transport import get_async_http_client, get_http_client
+from ..usage import flow_usage_metadata
+from .base import LLMProvider
+
+
+def _with_fresh_token(model: BaseChatModel, headers: Dict[str, str]) -> Dict[str, str]:
+    """Replace the rejected bearer token of a Flow request with a fresh one."""
+    rejected_token = headers.get("Authorization", "").removeprefix("Bearer ") or None
+    return {**headers, "Authorization": f"Bearer {model.token_source(rejected_token)}"}
+
+
+def _traced_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    """Add the traceparent header of the current span to the headers of a Flow request."""
+    traceparent = current_traceparent()
+    return {**headers, "traceparent": traceparent} if traceparent else headers
+
+
+def _flow_post(
+    model: BaseChatModel, url: str, payload: Dict[str, Any], headers: Dict[str, str]
+) -> Dict[str, Any]:
+    """POST a Flow request, retrying once with a fresh token if the token is rejected."""
+    with start_span("http.post", url=url) as span:
+        response = get_http_client().post(url, json=payload, headers=_traced_headers(headers))
+        if response.status_code == 401 and model.token_source is not None:
+            emit_active("on_llm_retry", "token_rejected")
+            response = get_http_client().post(
+                url, json=payload, headers=_traced_headers(_with_fresh_token(model, headers))
+            )
+        if span is not None:
+            span.set_attribute("status_code", response.status_code)
+        response.raise_for_status()
+        return response.json()
+
+
+async def _aflow_post(
+    model: BaseChatModel, url: str, payload: Dict[str, Any], headers: Dict[str, str]
+) -> Dict[str, Any]:
+    """POST a Flow request on the event loop, retrying once with a fresh token if it is rejected."""
+    client = get_async_http_client()
+    with start_span("http.post", url=url) as span:
+        response = await client.post(url, json=payload, headers=_traced_headers(headers))
+        if response.status_code == 401 and model.token_source is not None:
+            emit_active("on_llm_retry", "token_rejected")
+            headers = await asyncio.to_thread(_with_fresh_token, model, headers)
+            response = await client.post(url, json=payload, headers=_traced_headers(headers))
+        if span is not None:
+            span.set_attribute("status_code", response.status_code)
+        response.raise_for_status()
+        return response.json()
+
+
+class FlowBaseChatModel(BaseChatModel):
+    """
+    Base chat model of the Flow APIs over the shared pooled transport.
+
+    Subclasses map the messages to the payload of their API and its response
+    back to a ChatResult; the headers, the token and the retry of a rejected
+    token are handled here for every Flow API.
+    """
+
+    # Path of the API on the Flow server, its accepted content and its name in errors
+    api_path: ClassVar[str] = ""
+    accept: ClassVar[str] = "application/json"
+    api_name: ClassVar[str] = "Flow API"
+
+    # Define required fields for this chat model
+    base_url: str
+    flow_tenant: Optional[str]
+    flow_agent: Optional[str]
+    model_name: str
+    temperature: float
+    max_tokens: int
+    api_key: Optional[str] = None
+    token_source: Optional[Callable[..., str]] = None
+
+    class Config:
+        """Configuration for this pydantic object."""
+
+        arbitrary_types_allowed = True
+        extra = "forbid"
+
+    def _get_token(self) -> Optional[str]:
+        """Get the bearer token of a request, from the token source if there is one."""
+        return self.token_source() if self.token_source is not None else self.api_key
+
+    @abstractmethod
+    def _build_payload(
+        self, messages: List[BaseMessage], stop: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        """Build the payload of a request to the API."""
+        pass
+
+    @abstractmethod
+    def _parse_response(self, data: Dict[str, Any]) -> ChatResult:
+        """Convert a response of the API into a ChatResult."""
+        pass
+
+    def _build_request(
+        self, messages: List[BaseMessage], stop: Optional[List[str]], api_key: Optional[str]
+    ) -> Tuple[str, Dict[str, Any], Dict[str, str]]:
+        """Build the URL, payload and headers of a request to the API."""
+        headers = {"Content-Type": "application/json", "accept": self.accept}
+
+        # Add Flow-specific headers if available
+        if self.flow_tenant:
+            headers["FlowTenant"] = self.flow_tenant
+        if self.flow_agent:
+            headers["FlowAgent"] = self.flow_agent
+
+        # Add API key if available
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+
+        url = f"{self.base_url}/ai-orchestration-api/v1/{self.api_path}"
+        return url, self._build_payload(messages, stop), headers
+
+    def _generate(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs: Any
+    ) -> ChatResult:
+        """Generate completion from the Flow API."""
+        url, payload, headers = self._build_request(messages, stop, self._get_token())
+
+        try:
+            return self._parse_response(_flow_post(self, url, payload, headers))
+        except Exception as e:
+            raise RuntimeError(f"Error calling {self.api_name}: {str(e)}")
+
+    async def _agenerate(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs: Any
+    ) -> ChatResult:
+        """Generate completion from the Flow API without blocking the event loop."""
+        # Fetching a cold or expired token is a blocking HTTP call
+        api_key = await asyncio.to_thread(self._get_token)
+        url, payload, headers = self._build_request(messages, stop, api_key)
+
+        try:
+            return self._parse_response(await _aflow_post(self, url, payload, headers))
+        except Exception as e:
+            raise RuntimeError(f"Error calling {self.api_name}: {str(e)}")
+
+    def _stream(
+        self, messages: List[BaseMessage], stop: Optional[List[str]] = None, **kwargs: Any
+    ) -> Iterator[ChatResult]:
+        """Stream completion from the Flow API (not implemented)."""
+        raise NotImplementedError(f"Streaming not implemented for {type(self).__name__}")
+
+
+class FlowChatModel(FlowBaseChatModel):
+    """Custom implementation for Flow's Chat Completions API over the shared pooled transport."""
+
+    api_path: ClassVar[str] = "openai/chat/completions"
+
+    @model_validator(mode="before")
+    def validate_environment(cls, values: Dict) -> Dict:
+        """Validate that the environment is properly set up."""
+        # Set default values if not provided
+        values["model_name"] = values.get("model_name") or "gpt-4o-mini"
+        values["temperature"] = values.get("temperature") or 0.0
+        values["max_tokens"] = values.get("max_tokens") or 4096
+        values["base_url"] = (
+            values.get("base_url") or "https://flow.ciandt.com/ai-orchestration-api/v1/openai"
+        )
+
+        return values
+
+    def _llm_type(self) -> str:
+        """Return type of LLM."""
+        return "flow"
+
+    def _convert_messages_to_flow_format(self, messages: List[BaseMessage]) -> List[Dict[str, Any]]:
+        """Convert LangChain messages to Flow API format."""
+        flow_messages = []
+        for message in messages:
+            if message.type == "human":
+                flow_messages.append({"role": "user", "content": message.content})
+            elif message.type == "ai":
+                flow_messages.append({"role": "assistant", "content": message.content})
+            elif message.type == "system":
+                flow_messages.append({"role": "system", "content": message.content})
+            else:
+                flow_messages.append({"role": "user", "content": str(message.content)})
+        return flow_messages
+
+    def _build_payload(
+        self, messages: List[BaseMessage], stop: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        """Build the payload of a Flow chat completion request."""
+        payload = {
+            "stream": False,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "allowedModels": [self.model_name],
+            "messages": self._convert_messages_to_flow_format(messages),
+        }
+
+        # Add stop sequences if provided
+        if stop:
+            payload["stop"] = stop
+
+        return payload
+
+    def _parse_response(self, data: Dict[str, Any]) -> ChatResult:
+        """Convert a Flow chat completion response into a ChatResult."""
+        # Extract the assistant's message from the response
+        if "choices" in data and len(data["choices"]) > 0:
+            message_content = data["choices"][0]["message"]["content"]
+
+            # Create a ChatGeneration object, keeping the token usage of the call
+            chat_generation = ChatGeneration(
+                message=AIMessage(
+                    content=message_content, usage_metadata=flow_usage_metadata(data.get("usage"))
+                )
+            )
+
+            # Return a ChatResult
+            return ChatResult(generations=[chat_generation])
+        else:
+            raise ValueError("No message content found in response")
+
+
+class FlowBedrockChatModel(FlowBaseChatModel):
+    """Custom implementation for Flow's Bedrock API over the shared pooled transport."""
+
+    api_path: ClassVar[str] = "bedrock/invoke"
+    accept: ClassVar[str] = "*/*"
+    api_name: ClassVar[str] = "Flow Bedrock API"
+
+    top_p: float
+    top_k: int
+    anthropic_version: str
+    stop_sequences: List[str]
+
+    @model_validator(mode="before")
+    def validate_environment(cls, values: Dict) -> Dict:
+        """Validate that the environment is properly set up."""
+        # Set default values if not provided
+        values["model_name"] = values.get("model_name") or "anthropic.claude-3-5-haiku"
+        values["temperature"] = values.get("temperature") or 1.0
+        values["max_tokens"] = values.get("max_tokens") or 1000
+        values["base_url"] = values.get("base_url") or "https://flow.ciandt.com"
+        values["top_p"] = values.get("top_p") or 0.999
+        values["top_k"] = values.get("top_k") or 250
+        values["anthropic_version"] = values.get("anthropic_version") or "bedrock-2023-05-31"
+        values["stop_sequences"] = values.get("stop_sequences") or []
+
+        return values
+
+    def _llm_type(self) -> str:
+        """Return type of LLM."""
+        return "flow_bedrock"
+
+    def _convert_messages_to_bedrock_format(
+        self, messages: List[BaseMessage]
+    ) -> List[Dict[str, Any]]:
+        """Convert LangChain messages to Bedrock API format."""
+        bedrock_messages = []
+
+        for message in messages:
+            role = (
+                "user"
+                if message.type == "human"
+                else "assistant" if message.type == "ai" else "system"
+            )
+
+            # Format the content as a text entry
+            bedrock_messages.append(
+                {"role": role, "content": [{"type": "text", "text": message.content}]}
+            )
+
+        return bedrock_messages
+
+    def _build_payload(
+        self, messages: List[BaseMessage], stop: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        """Build the payload of a Flow Bedrock invoke request."""
+        return {
+            "messages": self._convert_messages_to_bedrock_format(messages),
+            "anthropic_version": self.anthropic_version,
+            "max_tokens": self.max_tokens,
+            "top_k": self.top_k,
+            # Stop sequences from method parameters take precedence
+            "stop_sequences": stop or self.stop_sequences,
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "model": self.model_name,
+        }
+
+    def _parse_response(self, data: Dict[str, Any]) -> ChatResult:
+        """Convert a Flow Bedrock response into a ChatResult."""
+        # Extract the assistant's message from the response
+        if "content" in data and len(data["content"]) > 0:
+            # Get the text content from the response
+            text_contents = []
+            for content_part in data["content"]:
+                if content_part["type"] == "text":
+                    text_contents.append(content_part["text"])
+
+            message_content = "\n".join(text_contents)
+
+            # Create a ChatGeneration object, keeping the token usage of the call
+            chat_generation = ChatGeneration(
+                message=AIMessage(
+                    content=message_content, usage_metadata=flow_usage_metadata(data.get("usage"))
+                )
+            )
+
+            # Return a ChatResult
+            return ChatResult(generations=[chat_generation])
+        else:
+            raise ValueError("No message content found in response")
+
+
+class FlowBaseProvider(LLMProvider):
+    """
+    Base provider of the Flow APIs.
+
+    Holds the Flow endpoint and credentials read from the environment and the
+    model parameters every Flow API shares; subclasses add their own and set
+    the chat model class they build.
+    """
+
+    chat_model_class: Type[FlowBaseChatModel] = FlowBaseChatModel
+
+    def __init__(
+        self, logger: logging.Logger, model_name: str, temperature: float, max_tokens: int
+    ):
+        """
+        Initialize the Flow provider.
+
+        Args:
+            logger: The logger instance
+            model_name: The name of the Flow model to use
+            temperature: The temperature parameter for the model
+            max_tokens: Maximum tokens to generate
+        """
+        super().__init__(logger)
+        self.model_name = model_name
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.base_url = os.environ.get("FLOW_BASE_URL")
+        self.flow_tenant = os.environ.get("FLOW_TENANT", "flowteam")
+        self.flow_agent = os.environ.get("FLOW_AGENT", "bcp-opensource")
+
+    def get_params(self) -> Dict[str, Any]:
+        """
+        Get the parameters that determine the output of the Flow provider.
+
+        Returns:
+            A dictionary with the provider class, endpoint and model parameters
+        """
+        return {
+            **super().get_params(),
+            "base_url": self.base_url,
+            "model_name": self.model_name,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+        }
+
+    def _get_flow_token(self, rejected_token: Optional[str] = None) -> str:
+        """
+        Get a Flow token from the process-wide token cache.
+
+        Args:
+            rejected_token: A token the API just rejected, which must be replaced
+
+        Returns:
+            The Flow API token
+        """
+        return get_flow_token_cache().get_token(
+            self.base_url,
+            os.environ.get("FLOW_CLIENT_ID"),
+            os.environ.get("FLOW_CLIENT_SECRET"),
+            tenant=self.flow_tenant,
+            rejected_token=rejected_token,
+        )
+
+    def _model_fields(self) -> Dict[str, Any]:
+        """Get the fields of the chat model built by this provider."""
+        return {
+            "base_url": self.base_url,
+            "model_name": self.model_name,
+            "flow_tenant": self.flow_tenant,
+            "flow_agent": self.flow_agent,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            # The model gets its token on every call, off the event loop when async
+            "token_source": self._get_flow_token,
+        }
+
+    def get_model(self) -> BaseLanguageModel:
+        """
+        Get the Flow model.
+
+        Returns:
+            The Flow chat model
+        """
+        return self.chat_model_class(**self._model_fields())
+
+
+class FlowProvider(FlowBaseProvider):
+    """Flow provider implementation."""
+
+    chat_model_class = FlowChatModel
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        model_name: str = "gpt-4o-mini",
+        temperature: float = 0,
+        max_tokens: int = 4096,
+    ):
+        """
+        Initialize the Flow provider.
+
+        Args:
+            logger: The logger instance
+            model_name: The name of the Flow model to use
+            temperature: The temperature parameter for the model
+            max_tokens: Maximum tokens to generate
+        """
+        super().__init__(logger, model_name, temperature, max_tokens)
+        self.logger.info(f"Initialized Flow provider with model {model_name}")
+
+
+class FlowBedrockProvider(FlowBaseProvider):
+    """Flow Bedrock provider implementation."""
+
+    chat_model_class = FlowBedrockChatModel
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        model_name: str = "anthropic.claude-3-5-haiku",
+        temperature: float = 1.0,
+        max_tokens: int = 1000,
+    ):
+        """
+        Initialize the Flow Bedrock provider.
+
+        Args:
+            logger: The logger instance
+            model_name: The name of the Bedrock model to use
+            temperature: The temperature parameter for the model
+            max_tokens: Maximum tokens to generate
+        """
+        super().__init__(logger, model_name, temperature, max_tokens)
+        self.top_p = float(os.environ.get("FLOW_BEDROCK_TOP_P", "0.999"))
+        self.top_k = int(os.environ.get("FLOW_BEDROCK_TOP_K", "250"))
+        self.anthropic_version = os.environ.get(
+            "FLOW_BEDROCK_ANTHROPIC_VERSION", "bedrock-2023-05-31"
+        )
+        self.stop_sequences = []
+        self.logger.info(f"Initialized Flow Bedrock provider with model {model_name}")
+
+    def get_params(self) -> Dict[str, Any]:
+        """
+        Get the parameters that determine the output of the Flow Bedrock provider.
+
+        Returns:
+            A dictionary with the provider class, endpoint and model parameters
+        """
+        return {
+            **super().get_params(),
+            "top_p": self.top_p,
+            "top_k": self.top_k,
+            "anthropic_version": self.anthropic_version,
+            "stop_sequences": self.stop_sequences,
+        }
+
+    def _model_fields(self) -> Dict[str, Any]:
+        """Get the fields of the Flow Bedrock chat model built by this provider."""
+        return {
+            **super()._model_fields(),
+            "top_p": self.top_p,
+            "top_k": self.top_k,
+            "anthropic_version": self.anthropic_version,
+            "stop_sequences": self.stop_sequences,
+        }
@@ -0,0 +1,63 @@
+"""
+OpenAI Provider for BCP Calculator
+
+This module provides the provider of the OpenAI Chat Completions API.
+"""
+
+import logging
+from typing import Any, Dict
+
+from langchain_core.language_models import BaseLanguageModel
+from langchain_openai import ChatOpenAI
+
+from ..transport import get_http_client
+from .base import LLMProvider
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI provider implementation."""
+
+    def __init__(
+        self, logger: logging.Logger, model_name: str = "gpt-4o-2024-05-13", temperature: float = 0
+    ):
+        """
+        Initialize the OpenAI provider.
+
+        Args:
+            logger: The logger instance
+            model_name: The name of the OpenAI model to use
+            temperature: The temperature parameter for the model
+        """
+        super().__init__(logger)
+        self.model_name = model_name
+        self.temperature = temperature
+        self.logger.info(f"Initialized OpenAI provider with model {model_name}")
+
+    def get_params(self) -> Dict[str, Any]:
+        """
+        Get the parameters that determine the output of the OpenAI provider.
+
+        Returns:
+            A dictionary with the provider class, model name and temperature
+        """
+        return {
+            **super().get_params(),
+            "model_name": self.model_name,
+            "temperature": self.temperature,
+        }
+
+    def get_model(self) -> BaseLanguageModel:
+        """
+        Get the OpenAI model.
+
+        Synchronous calls go through the process-wide pooled client of
+        ``bcp.transport``, sized by the BCP_HTTP_* environment variables, so
+        every provider instance reuses the same connections. Asynchronous calls
+        use the async client langchain-openai caches for the whole process.
+
+        Returns:
+            The OpenAI model
+        """
+        return ChatOpenAI(
+            model=self.model_name, temperature=self.temperature, http_client=get_http_client()
+        )
@@ -0,0 +1,182 @@
+"""
+Rate Limits for BCP Calculator
+
+This module caps the number of LLM requests sent to each provider per minute,
+shared by every calculator of the process, so parallel batches stay under the
+quotas of the provider accounts. Extra limiters can be scoped to the requests
+sent from one context, such as a batch, in front of the provider limits.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple
+
+
+class RateLimiter:
+    """
+    Requests-per-minute limiter spacing the requests evenly.
+
+    Every request reserves the next free slot, ``60 / requests_per_minute``
+    seconds after the previous one, and waits until it comes. Limiters are safe
+    to share across threads and event loops, and a limiter without a rate lets
+    every request through.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None):
+        """
+        Initialize the limiter.
+
+        Args:
+            requests_per_minute: Maximum number of requests per minute, None for no limit
+        """
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self.requests_per_minute = None
+        self.set_rate(requests_per_minute)
+
+    def set_rate(self, requests_per_minute: Optional[float]) -> None:
+        """
+        Change the rate of the limiter, taking effect with the next request.
+
+        Args:
+            requests_per_minute: Maximum number of requests per minute, None for no limit
+
+        Raises:
+            ValueError: If the rate is not positive
+        """
+        if requests_per_minute is not None and requests_per_minute <= 0:
+            raise ValueError(f"Requests per minute must be positive: {requests_per_minute}")
+        with self._lock:
+            self.requests_per_minute = requests_per_minute
+
+    def reserve(self) -> float:
+        """
+        Reserve the next request slot.
+
+        Returns:
+            The seconds to wait before sending the request
+        """
+        with self._lock:
+            if not self.requests_per_minute:
+                return 0.0
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 60.0 / self.requests_per_minute
+            return slot - now
+
+    def acquire(self) -> float:
+        """
+        Wait for the next request slot.
+
+        Returns:
+            The seconds waited
+        """
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def aacquire(self) -> float:
+        """
+        Wait for the next request slot without blocking the event loop.
+
+        Returns:
+            The seconds waited
+        """
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+# Limiters scoped to the requests sent from the current thread or task
+_scoped: ContextVar[Tuple[RateLimiter, ...]] = ContextVar("bcp_scoped_rate_limiters", default=())
+
+
+def parse_rate_limits(value: str) -> Dict[str, float]:
+    """
+    Parse per-provider rates from a "provider=rpm,provider=rpm" string.
+
+    Args:
+        value: The rates specification
+
+    Returns:
+        A dictionary mapping provider names to their requests per minute
+    """
+    limits = {}
+    for item in value.split(","):
+        if "=" in item:
+            provider, limit = item.split("=", 1)
+            limits[provider.strip().lower()] = float(limit)
+    return limits
+
+
+def get_rate_limiter(provider_name: str) -> RateLimiter:
+    """
+    Get the process-wide rate limiter of a provider.
+
+    The limiter starts with the rate given for the provider in the BCP_PROVIDER_RPM
+    environment variable (e.g. "openai=500,flow-openai=60"), unlimited otherwise.
+
+    Args:
+        provider_name: The name of the provider
+
+    Returns:
+        The limiter shared by every calculator using the provider
+    """
+    provider_name = provider_name.lower()
+    with _rate_limiters_lock:
+        if provider_name not in _rate_limiters:
+            rate = parse_rate_limits(os.environ.get("BCP_PROVIDER_RPM", "")).get(provider_name)
+            _rate_limiters[provider_name] = RateLimiter(rate)
+        return _rate_limiters[provider_name]
+
+
+def set_rate_limit(provider_name: str, requests_per_minute: Optional[float]) -> None:
+    """
+    Set the requests per minute of a provider for the whole process.
+
+    Args:
+        provider_name: The name of the provider
+        requests_per_minute: Maximum number of requests per minute, None for no limit
+    """
+    get_rate_limiter(provider_name).set_rate(requests_per_minute)
+
+
+@contextmanager
+def rate_limit_scope(limiter: RateLimiter) -> Iterator[RateLimiter]:
+    """
+    Apply a limiter to the LLM requests sent from the current context.
+
+    The limiter is waited for before the limiter of the provider, and follows
+    the calculation into the threads and tasks started with a copy of the
+    context. The process-wide limiters are left unchanged.
+
+    Args:
+        limiter: The limiter of the scope
+
+    Yields:
+        The limiter
+    """
+    token = _scoped.set(_scoped.get() + (limiter,))
+    try:
+        yield limiter
+    finally:
+        _scoped.reset(token)
+
+
+def scoped_rate_limiters() -> Tuple[RateLimiter, ...]:
+    """
+    Get the limiters scoped to the current context, outermost first.
+
+    Returns:
+        The scoped limiters
+    """
+    return _scoped.get()
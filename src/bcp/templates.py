@@ -0,0 +1,201 @@
+"""
+Prompt Templates for BCP Calculator
+
+This module provides a shared Jinja environment that keeps the prompt templates
+compiled in memory, reloads them when they change on disk and exposes their
+content hashes so caches can key on prompt versions.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+
+# The prompts directory is at the same level as this file
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
+
+
+class PromptTemplates:
+    """
+    Compiled, hot-reloading store of prompt templates.
+    """
+
+    def __init__(
+        self,
+        prompts_dir: str = PROMPTS_DIR,
+        bytecode_cache_dir: Optional[str] = None,
+        max_inline_templates: int = 64,
+    ):
+        """
+        Initialize the template store.
+
+        Args:
+            prompts_dir: Directory containing the prompt templates
+            bytecode_cache_dir: Optional directory where compiled templates are cached across
+                processes
+            max_inline_templates: Maximum number of compiled templates kept for sources
+                that do not come from the prompts directory
+        """
+        self.prompts_dir = prompts_dir
+        bytecode_cache = None
+        if bytecode_cache_dir:
+            os.makedirs(bytecode_cache_dir, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+        self.environment = Environment(
+            loader=FileSystemLoader(prompts_dir),
+            auto_reload=True,
+            bytecode_cache=bytecode_cache,
+        )
+        self.max_inline_templates = max_inline_templates
+        # Template name -> (source, content hash, mtime check)
+        self._sources: Dict[str, Tuple[str, str, Callable[[], bool]]] = {}
+        # Content hash -> template name, to route known sources through the loader
+        self._names_by_hash: Dict[str, str] = {}
+        self._inline: "OrderedDict[str, Template]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def list_templates(self) -> List[str]:
+        """
+        List the prompt templates available in the prompts directory.
+
+        Returns:
+            The sorted template filenames
+        """
+        return sorted(
+            name for name in self.environment.list_templates() if name.endswith(".jinja2")
+        )
+
+    def _load(self, name: str) -> Tuple[str, str, Callable[[], bool]]:
+        """Get the cached source of a template, reading it again only if the file changed."""
+        with self._lock:
+            entry = self._sources.get(name)
+        if entry is not None and entry[2]():
+            return entry
+
+        source, _, uptodate = self.environment.loader.get_source(self.environment, name)
+        content_hash = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        entry = (source, content_hash, uptodate)
+        with self._lock:
+            self._sources[name] = entry
+            self._names_by_hash[content_hash] = name
+        return entry
+
+    def get_source(self, name: str) -> str:
+        """
+        Get the source of a prompt template.
+
+        Args:
+            name: The filename of the prompt template
+
+        Returns:
+            The template content
+        """
+        return self._load(name)[0]
+
+    def template_hash(self, name: str) -> str:
+        """
+        Get the content hash of a prompt template.
+
+        Args:
+            name: The filename of the prompt template
+
+        Returns:
+            The SHA-256 hex digest of the template content
+        """
+        return self._load(name)[1]
+
+    def template_hashes(self) -> Dict[str, str]:
+        """
+        Get the content hashes of every prompt template.
+
+        Returns:
+            A dictionary mapping each template filename to its content hash
+        """
+        return {name: self.template_hash(name) for name in self.list_templates()}
+
+    def get_template(self, name: str) -> Template:
+        """
+        Get the compiled version of a prompt template.
+
+        Args:
+            name: The filename of the prompt template
+
+        Returns:
+            The compiled template, recompiled only when the file changed
+        """
+        return self.environment.get_template(name)
+
+    def compile(self, source: str) -> Template:
+        """
+        Get the compiled version of a template source.
+
+        Sources of known prompt files are served by the loader (and the bytecode
+        cache, if configured); other sources are compiled once and kept in a
+        small LRU cache.
+
+        Args:
+            source: The template content
+
+        Returns:
+            The compiled template
+        """
+        content_hash = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        with self._lock:
+            name = self._names_by_hash.get(content_hash)
+            template = self._inline.get(content_hash)
+            if template is not None:
+                self._inline.move_to_end(content_hash)
+
+        if name is not None and self.template_hash(name) == content_hash:
+            return self.get_template(name)
+        if template is not None:
+            return template
+
+        template = self.environment.from_string(source)
+        with self._lock:
+            self._inline[content_hash] = template
+            while len(self._inline) > self.max_inline_templates:
+                self._inline.popitem(last=False)
+        return template
+
+    def precompile(self) -> List[str]:
+        """
+        Load and compile every prompt template ahead of the first request.
+
+        Returns:
+            The filenames of the compiled templates
+        """
+        names = self.list_templates()
+        for name in names:
+            self._load(name)
+            self.get_template(name)
+        return names
+
+
+_templates: Dict[str, PromptTemplates] = {}
+_templates_lock = threading.Lock()
+
+
+def get_prompt_templates(prompts_dir: str = PROMPTS_DIR) -> PromptTemplates:
+    """
+    Get the process-wide template store for a prompts directory.
+
+    The optional on-disk bytecode cache is enabled by setting the
+    BCP_TEMPLATE_BYTECODE_CACHE_DIR environment variable.
+
+    Args:
+        prompts_dir: Directory containing the prompt templates
+
+    Returns:
+        The shared template store
+    """
+    with _templates_lock:
+        if prompts_dir not in _templates:
+            _templates[prompts_dir] = PromptTemplates(
+                prompts_dir,
+                bytecode_cache_dir=os.environ.get("BCP_TEMPLATE_BYTECODE_CACHE_DIR"),
+            )
+        return _templates[prompts_dir]
@@ -0,0 +1,485 @@
+"""
+Tracing for BCP Calculator
+
+This module records trace spans of the estimation pipeline (requests, jobs,
+steps, prompt rendering, LLM and HTTP calls) and exports them, by default to a
+local JSONL file or to the console so tracing works offline, or to an
+OpenTelemetry collector over OTLP/HTTP JSON.
+
+Spans follow the W3C Trace Context model: the current span is kept in a
+context variable, so it follows asyncio tasks, ``asyncio.to_thread`` and any
+thread started through ``contextvars.copy_context().run``.
+"""
+
+import atexit
+import json
+import logging
+import os
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+from .cache import default_cache_dir
+
+
+class Span:
+    """A timed operation of a trace, with its attributes and outcome."""
+
+    def __init__(
+        self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]
+    ):
+        """
+        Initialize and start the span.
+
+        Args:
+            name: The name of the operation
+            trace_id: The 32 hex digits identifier of the trace
+            parent_id: The identifier of the parent span, if any
+            attributes: The initial attributes of the span
+        """
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.start_time = time.time()
+        self.end_time: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """
+        Set an attribute of the span.
+
+        Args:
+            key: The attribute name
+            value: The attribute value
+        """
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        """
+        Mark the span as failed.
+
+        Args:
+            error: The error that made the operation fail
+        """
+        self.error = f"{type(error).__name__}: {error}"
+
+    @property
+    def traceparent(self) -> str:
+        """The W3C traceparent header value identifying this span."""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the span to a dictionary.
+
+        Returns:
+            The identifiers, name, times in seconds, duration, attributes and error of the span
+        """
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration": (self.end_time or time.time()) - self.start_time,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _RemoteParent:
+    """Parent span received from another service through a traceparent header."""
+
+    def __init__(self, trace_id: str, span_id: str):
+        self.trace_id = trace_id
+        self.span_id = span_id
+
+
+class SpanExporter:
+    """Base class of the span exporters."""
+
+    def export(self, span: Span) -> None:
+        """
+        Export a finished span.
+
+        Args:
+            span: The span
+        """
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Send the spans buffered by the exporter, if any."""
+
+
+class ConsoleSpanExporter(SpanExporter):
+    """Exporter writing one JSON line per span to a stream (stderr by default)."""
+
+    def __init__(self, stream: Optional[TextIO] = None):
+        """
+        Initialize the exporter.
+
+        Args:
+            stream: The stream receiving the spans
+        """
+        self.stream = stream or sys.stderr
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+class FileSpanExporter(SpanExporter):
+    """Exporter appending one JSON line per span to a local file."""
+
+    def __init__(self, path: str):
+        """
+        Initialize the exporter.
+
+        Args:
+            path: The path of the JSONL file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    """Convert an attribute value to an OTLP AnyValue."""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPSpanExporter(SpanExporter):
+    """
+    Exporter sending spans to an OpenTelemetry collector over OTLP/HTTP with JSON encoding.
+
+    Spans are buffered and sent in batches from a background thread, so exporting
+    never waits on the network; a failed batch is logged and dropped.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        service_name: str = "bcp-calculator",
+        headers: Optional[Dict[str, str]] = None,
+        batch_size: int = 256,
+        interval: float = 5.0,
+    ):
+        """
+        Initialize the exporter.
+
+        Args:
+            endpoint: The traces URL of the collector, e.g. http://localhost:4318/v1/traces
+            service_name: The service.name resource attribute
+            headers: Extra headers of the requests, e.g. for authentication
+            batch_size: Number of buffered spans that triggers a send
+            interval: Maximum number of seconds a span stays buffered
+        """
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.headers = headers or {}
+        self.batch_size = batch_size
+        self.interval = interval
+        self._buffer: List[Span] = []
+        self._condition = threading.Condition()
+        self._send_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def export(self, span: Span) -> None:
+        with self._condition:
+            self._buffer.append(span)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="bcp-otlp-exporter", daemon=True
+                )
+                self._thread.start()
+            if len(self._buffer) >= self.batch_size:
+                self._condition.notify()
+
+    def _run(self) -> None:
+        """Send the buffered spans every ``interval`` seconds or when a batch is full."""
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: len(self._buffer) >= self.batch_size, timeout=self.interval
+                )
+            self.flush()
+
+    def flush(self) -> None:
+        with self._send_lock:
+            with self._condition:
+                spans, self._buffer = self._buffer, []
+            if not spans:
+                return
+            try:
+                import httpx
+
+                response = httpx.post(
+                    self.endpoint, json=self.payload(spans), headers=self.headers, timeout=10
+                )
+                response.raise_for_status()
+            except Exception as e:
+                logging.getLogger("bcp_calculator").warning(
+                    f"Could not export {len(spans)} spans: {str(e)}"
+                )
+
+    def payload(self, spans: List[Span]) -> Dict[str, Any]:
+        """
+        Build the OTLP/JSON request body of a batch of spans.
+
+        Args:
+            spans: The spans
+
+        Returns:
+            The ExportTraceServiceRequest as a dictionary
+        """
+        otlp_spans = []
+        for span in spans:
+            otlp_span = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(int(span.start_time * 1e9)),
+                "endTimeUnixNano": str(int((span.end_time or span.start_time) * 1e9)),
+                "attributes": [
+                    {"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()
+                ],
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            otlp_spans.append(otlp_span)
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": {"stringValue": self.service_name}}
+                        ]
+                    },
+                    "scopeSpans": [{"scope": {"name": "bcp"}, "spans": otlp_spans}],
+                }
+            ]
+        }
+
+
+# Span (or remote parent) of the operation running in the current thread or task
+_current: ContextVar[Optional[Any]] = ContextVar("bcp_current_span", default=None)
+
+
+class Tracer:
+    """Creates the spans and hands the finished ones to the exporters."""
+
+    def __init__(self, exporters: Optional[List[SpanExporter]] = None):
+        """
+        Initialize the tracer.
+
+        Args:
+            exporters: The span exporters, tracing is disabled without any
+        """
+        self.exporters = list(exporters or [])
+
+    @property
+    def enabled(self) -> bool:
+        """Whether spans are recorded."""
+        return bool(self.exporters)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+        """
+        Record a span around a block, as a child of the current span.
+
+        Errors raised by the block mark the span as failed and are re-raised.
+
+        Args:
+            name: The name of the operation
+            **attributes: The initial attributes of the span
+
+        Yields:
+            The span, or None when tracing is disabled
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        parent = _current.get()
+        span = Span(
+            name,
+            parent.trace_id if parent is not None else secrets.token_hex(16),
+            parent.span_id if parent is not None else None,
+            attributes,
+        )
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current.reset(token)
+            span.end_time = time.time()
+            self._export(span)
+
+    def _export(self, span: Span) -> None:
+        """Hand a finished span to every exporter, logging their errors."""
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logging.getLogger("bcp_calculator").warning(
+                    f"Could not export span {span.name}: {str(e)}"
+                )
+
+    def flush(self) -> None:
+        """Send the spans buffered by the exporters."""
+        for exporter in self.exporters:
+            exporter.flush()
+
+
+def current_span() -> Optional[Span]:
+    """
+    Get the span of the operation running in the current thread or task.
+
+    Returns:
+        The current span, or None outside of any span
+    """
+    span = _current.get()
+    return span if isinstance(span, Span) else None
+
+
+def current_traceparent() -> Optional[str]:
+    """
+    Get the traceparent header propagating the current span to another service.
+
+    Returns:
+        The header value, or None outside of any span
+    """
+    span = current_span()
+    return span.traceparent if span is not None else None
+
+
+@contextmanager
+def remote_parent(traceparent: Optional[str]) -> Iterator[None]:
+    """
+    Make the spans of a block children of a span of another service.
+
+    Args:
+        traceparent: The W3C traceparent header received, ignored if missing or invalid
+    """
+    parts = (traceparent or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        yield
+        return
+    token = _current.set(_RemoteParent(parts[1], parts[2]))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def _build_exporters() -> List[SpanExporter]:
+    """Build the exporters configured in the environment."""
+    if os.environ.get("BCP_TRACING", "false").lower() not in ("1", "true", "yes", "on"):
+        return []
+
+    exporters: List[SpanExporter] = []
+    for name in os.environ.get("BCP_TRACE_EXPORTER", "file").split(","):
+        name = name.strip().lower()
+        if name == "file":
+            path = os.environ.get("BCP_TRACE_FILE") or os.path.join(
+                default_cache_dir(), "traces.jsonl"
+            )
+            exporters.append(FileSpanExporter(path))
+        elif name == "console":
+            exporters.append(ConsoleSpanExporter())
+        elif name == "otlp":
+            headers = {}
+            for item in os.environ.get("BCP_OTLP_HEADERS", "").split(","):
+                if "=" in item:
+                    key, value = item.split("=", 1)
+                    headers[key.strip()] = value.strip()
+            exporters.append(
+                OTLPSpanExporter(
+                    os.environ.get("BCP_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"),
+                    service_name=os.environ.get("BCP_SERVICE_NAME", "bcp-calculator"),
+                    headers=headers,
+                )
+            )
+        elif name:
+            logging.getLogger("bcp_calculator").warning(f"Unknown trace exporter: {name}")
+    return exporters
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """
+    Get the process-wide tracer.
+
+    Tracing is configured through the environment: BCP_TRACING (true/false,
+    default: false), BCP_TRACE_EXPORTER (comma-separated file, console and otlp,
+    default: file), BCP_TRACE_FILE (default: traces.jsonl in the cache
+    directory), BCP_OTLP_ENDPOINT (default: http://localhost:4318/v1/traces),
+    BCP_OTLP_HEADERS ("key=value,...") and BCP_SERVICE_NAME.
+
+    Returns:
+        The shared tracer
+    """
+    global _tracer
+
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer(_build_exporters())
+            atexit.register(_tracer.flush)
+        return _tracer
+
+
+def set_tracer(tracer: Tracer) -> None:
+    """
+    Replace the process-wide tracer, e.g. to export spans elsewhere.
+
+    Args:
+        tracer: The new tracer
+    """
+    global _tracer
+
+    with _tracer_lock:
+        _tracer = tracer
+
+
+def start_span(name: str, **attributes: Any):
+    """
+    Record a span with the process-wide tracer.
+
+    Args:
+        name: The name of the operation
+        **attributes: The initial attributes of the span
+
+    Returns:
+        A context manager yielding the span, or None when tracing is disabled
+    """
+    return get_tracer().span(name, **attributes)
@@ -0,0 +1,129 @@
+"""
+HTTP Transport for BCP Calculator
+
+This module centralizes the HTTP clients used to reach the LLM providers: the
+connection pool settings, the timeouts and the shared pooled clients of the
+Flow, OpenAI and Claude integrations.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import threading
+import weakref
+from typing import Optional
+
+import httpx
+
+_sync_client: Optional[httpx.Client] = None
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+_clients_lock = threading.Lock()
+
+
+def http_limits() -> httpx.Limits:
+    """
+    Build the connection pool limits for the provider HTTP clients.
+
+    The limits are configured through the environment: BCP_HTTP_MAX_CONNECTIONS
+    (default: 100), BCP_HTTP_MAX_KEEPALIVE (default: 20) and
+    BCP_HTTP_KEEPALIVE_EXPIRY (seconds, default: 60).
+
+    Returns:
+        The connection pool limits
+    """
+    return httpx.Limits(
+        max_connections=int(os.environ.get("BCP_HTTP_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.environ.get("BCP_HTTP_MAX_KEEPALIVE", "20")),
+        keepalive_expiry=float(os.environ.get("BCP_HTTP_KEEPALIVE_EXPIRY", "60")),
+    )
+
+
+def http_timeout() -> httpx.Timeout:
+    """
+    Build the timeouts for the provider HTTP clients.
+
+    The timeouts are configured through the environment, in seconds:
+    BCP_HTTP_CONNECT_TIMEOUT (default: 10), BCP_HTTP_READ_TIMEOUT (default: 120),
+    BCP_HTTP_WRITE_TIMEOUT (default: 30) and BCP_HTTP_POOL_TIMEOUT (default: 30).
+
+    Returns:
+        The HTTP timeouts
+    """
+    return httpx.Timeout(
+        connect=float(os.environ.get("BCP_HTTP_CONNECT_TIMEOUT", "10")),
+        read=float(os.environ.get("BCP_HTTP_READ_TIMEOUT", "120")),
+        write=float(os.environ.get("BCP_HTTP_WRITE_TIMEOUT", "30")),
+        pool=float(os.environ.get("BCP_HTTP_POOL_TIMEOUT", "30")),
+    )
+
+
+def http2_enabled() -> bool:
+    """
+    Check whether the Flow clients should negotiate HTTP/2.
+
+    HTTP/2 is requested with BCP_HTTP2=true and needs the optional ``h2``
+    package (``pip install httpx[http2]``); without it the clients fall back
+    to HTTP/1.1.
+
+    Returns:
+        True if HTTP/2 is requested and available
+    """
+    if os.environ.get("BCP_HTTP2", "false").lower() not in ("1", "true", "yes", "on"):
+        return False
+    if importlib.util.find_spec("h2") is None:
+        logging.getLogger("bcp_calculator").warning(
+            "BCP_HTTP2 is set but the h2 package is not installed, using HTTP/1.1"
+        )
+        return False
+    return True
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Get the process-wide pooled HTTP client of the Flow, OpenAI and Claude integrations.
+
+    Returns:
+        The shared synchronous HTTP client
+    """
+    global _sync_client
+
+    with _clients_lock:
+        if _sync_client is None:
+            _sync_client = httpx.Client(
+                limits=http_limits(), timeout=http_timeout(), http2=http2_enabled()
+            )
+        return _sync_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Get the pooled asynchronous HTTP client of the Flow integrations.
+
+    Asynchronous connections are bound to an event loop, so one client is kept
+    per running loop.
+
+    Returns:
+        The asynchronous HTTP client of the running event loop
+    """
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                limits=http_limits(), timeout=http_timeout(), http2=http2_enabled()
+            )
+            _async_clients[loop] = client
+        return client
+
+
+def close_http_clients() -> None:
+    """Close the shared synchronous client; it is recreated with the current settings on use."""
+    global _sync_client
+
+    with _clients_lock:
+        if _sync_client is not None:
+            _sync_client.close()
+            _sync_client = None
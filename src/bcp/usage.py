@@ -0,0 +1,281 @@
+"""
+Token Usage for BCP Calculator
+
+This module normalizes the token usage reported by the LLM providers, sums it
+per step and story, and prices it with a configurable price table.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+from .callbacks import BCPCallbackHandler
+
+# List prices in USD per million tokens. Models are matched by exact name first,
+# then by the longest prefix, so dated or versioned model names share an entry.
+DEFAULT_PRICE_TABLE: Dict[str, Dict[str, float]] = {
+    "gpt-4o-2024-05-13": {"input": 5.00, "cached_input": 5.00, "output": 15.00},
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+    "claude-3-sonnet": {"input": 3.00, "cached_input": 0.30, "output": 15.00},
+    "claude-3-5-haiku": {"input": 0.80, "cached_input": 0.08, "output": 4.00},
+    "anthropic.claude-3-5-haiku": {"input": 0.80, "cached_input": 0.08, "output": 4.00},
+}
+
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cached_tokens", "total_tokens")
+
+
+def empty_usage() -> Dict[str, Any]:
+    """
+    Build an empty usage record.
+
+    Returns:
+        A dictionary with every token counter, the number of LLM calls and their wall
+        time set to zero
+    """
+    usage: Dict[str, Any] = {field: 0 for field in USAGE_FIELDS}
+    usage["calls"] = 0
+    usage["llm_time"] = 0.0
+    return usage
+
+
+def usage_from_message(message: Any) -> Dict[str, int]:
+    """
+    Read the token usage of a LangChain chat message.
+
+    Args:
+        message: The message returned by a chat model
+
+    Returns:
+        The input, output, cached and total tokens, all zero when the provider reports no usage
+    """
+    metadata = getattr(message, "usage_metadata", None) or {}
+    input_tokens = int(metadata.get("input_tokens") or 0)
+    output_tokens = int(metadata.get("output_tokens") or 0)
+    details = metadata.get("input_token_details") or {}
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "cached_tokens": int(details.get("cache_read") or 0),
+        "total_tokens": int(metadata.get("total_tokens") or input_tokens + output_tokens),
+    }
+
+
+def flow_usage_metadata(usage: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Convert the ``usage`` block of a Flow response into LangChain usage metadata.
+
+    Both the OpenAI format (prompt/completion tokens) and the Anthropic format
+    (input/output tokens) of the Flow endpoints are understood.
+
+    Args:
+        usage: The ``usage`` block of the response, if any
+
+    Returns:
+        The usage metadata to attach to the AI message, or None without usage
+    """
+    if not usage:
+        return None
+    input_tokens = int(usage.get("prompt_tokens", usage.get("input_tokens")) or 0)
+    output_tokens = int(usage.get("completion_tokens", usage.get("output_tokens")) or 0)
+    cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+    if cached_tokens is None:
+        cached_tokens = usage.get("cache_read_input_tokens")
+        # Anthropic reports cache reads on top of the uncached input tokens
+        input_tokens += int(cached_tokens or 0)
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": int(usage.get("total_tokens") or input_tokens + output_tokens),
+        "input_token_details": {"cache_read": int(cached_tokens or 0)},
+    }
+
+
+def add_usage(total: Dict[str, Any], usage: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Add a usage record to a running total, in place.
+
+    Args:
+        total: The running total
+        usage: The usage to add
+
+    Returns:
+        The updated total
+    """
+    for field, value in usage.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            total[field] = total.get(field, 0) + value
+    return total
+
+
+class StepUsageTracker(BCPCallbackHandler):
+    """Callback handler summing the token usage and LLM time of each step of a calculation."""
+
+    def __init__(self):
+        """Initialize the tracker."""
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def on_step_start(self, step_name: str, story_name: str) -> None:
+        with self._lock:
+            self.steps.setdefault(step_name, empty_usage())
+
+    def on_llm_end(
+        self,
+        step_name: Optional[str],
+        prompt_file: str,
+        response_size: int,
+        error: Optional[Exception],
+        duration: float,
+        usage: Dict[str, int],
+    ) -> None:
+        with self._lock:
+            step = self.steps.setdefault(step_name or prompt_file, empty_usage())
+            add_usage(step, usage)
+            step["calls"] += 1
+            step["llm_time"] += duration
+
+
+def get_price_table() -> Dict[str, Dict[str, float]]:
+    """
+    Get the price table used to compute costs.
+
+    BCP_PRICE_TABLE overrides or extends the default prices, either with a JSON
+    object or with the path of a JSON file, mapping model names to their
+    "input", "cached_input" and "output" prices in USD per million tokens.
+
+    Returns:
+        The price table
+    """
+    table = dict(DEFAULT_PRICE_TABLE)
+    override = os.environ.get("BCP_PRICE_TABLE", "").strip()
+    if override:
+        if not override.startswith("{"):
+            with open(override, "r", encoding="utf-8") as f:
+                override = f.read()
+        table.update(json.loads(override))
+    return table
+
+
+def find_prices(
+    model_name: Optional[str], table: Dict[str, Dict[str, float]]
+) -> Optional[Dict[str, float]]:
+    """
+    Find the prices of a model.
+
+    Args:
+        model_name: The model name
+        table: The price table
+
+    Returns:
+        The prices of the model, or None if it is not in the table
+    """
+    if not model_name:
+        return None
+    if model_name in table:
+        return table[model_name]
+    prefixes = [name for name in table if model_name.startswith(name)]
+    return table[max(prefixes, key=len)] if prefixes else None
+
+
+def usage_cost(usage: Dict[str, Any], prices: Optional[Dict[str, float]]) -> Optional[float]:
+    """
+    Compute the cost of a usage record.
+
+    Cached input tokens are billed at the cached input price and the other
+    input tokens at the input price.
+
+    Args:
+        usage: The usage record
+        prices: The prices of the model, or None if unknown
+
+    Returns:
+        The cost in USD, or None if the model prices are unknown
+    """
+    if prices is None:
+        return None
+    cached = usage.get("cached_tokens", 0)
+    cost = (usage.get("input_tokens", 0) - cached) * prices.get("input", 0.0)
+    cost += cached * prices.get("cached_input", prices.get("input", 0.0))
+    cost += usage.get("output_tokens", 0) * prices.get("output", 0.0)
+    return round(cost / 1_000_000, 6)
+
+
+def summarize_usage(
+    step_usage: Dict[str, Dict[str, Any]],
+    provider: str,
+    model_name: Optional[str],
+    table: Optional[Dict[str, Dict[str, float]]] = None,
+) -> Dict[str, Any]:
+    """
+    Build the ``usage`` section of a BCP result.
+
+    Args:
+        step_usage: The usage of every step
+        provider: The provider name
+        model_name: The model name, used to find the prices
+        table: The price table (default: ``get_price_table()``)
+
+    Returns:
+        The provider, model, per-step usage and story total, each with its cost
+    """
+    prices = find_prices(model_name, table if table is not None else get_price_table())
+    steps = {}
+    total = empty_usage()
+    for step_name, usage in step_usage.items():
+        steps[step_name] = dict(usage, cost=usage_cost(usage, prices))
+        add_usage(total, usage)
+    total["cost"] = usage_cost(total, prices)
+    return {"provider": provider, "model": model_name, "steps": steps, "total": total}
+
+
+def cached_usage(usage: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build the ``usage`` section of a result served from the result cache.
+
+    No LLM call was made, so every counter and the cost are zero; ``cached``
+    tells the rollups to leave the result out.
+
+    Args:
+        usage: The usage section stored with the result, for its provider and model
+
+    Returns:
+        The usage section of the cache hit
+    """
+    usage = usage or {}
+    return {
+        "provider": usage.get("provider"),
+        "model": usage.get("model"),
+        "steps": {},
+        "total": dict(empty_usage(), cost=0.0),
+        "cached": True,
+    }
+
+
+def rollup_usage(results: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Sum the usage of several BCP results per provider and model.
+
+    Results served from the result cache made no LLM call and are left out.
+
+    Args:
+        results: BCP results, with or without a ``usage`` section
+
+    Returns:
+        A dictionary mapping "provider/model" to the summed usage, cost and number of stories
+    """
+    rollup: Dict[str, Dict[str, Any]] = {}
+    for result in results:
+        usage = result.get("usage") if isinstance(result, dict) else None
+        if not usage or usage.get("cached"):
+            continue
+        key = f"{usage.get('provider')}/{usage.get('model')}"
+        entry = rollup.setdefault(key, dict(empty_usage(), cost=None, stories=0))
+        total = dict(usage.get("total", {}))
+        cost = total.pop("cost", None)
+        add_usage(entry, total)
+        entry["stories"] += 1
+        if cost is not None:
+            entry["cost"] = round((entry["cost"] or 0.0) + cost, 6)
+    return rollup
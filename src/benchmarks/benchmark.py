@@ -0,0 +1,381 @@
+"""
+Benchmark suite of the BCP Calculator.
+
+Runs the calculation pipeline over a set of stories with the fake provider, so
+the figures measure the project's own overhead (templates, parsing, step
+scheduling, callbacks) and the effect of concurrency without spending tokens.
+"""
+
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..bcp.bcp_calculator import BCPCalculator
+from ..bcp.callbacks import BCPCallbackHandler
+from ..bcp.llm_providers import FakeProvider
+from ..bcp.prompt_handler import PromptHandler
+
+
+class StepTimer(BCPCallbackHandler):
+    """Callback handler collecting the wall time and LLM time of every step."""
+
+    def __init__(self):
+        """Initialize the timer."""
+        self.steps: Dict[str, Dict[str, List[float]]] = {}
+        self._llm_time: Dict[Tuple[int, str], float] = {}
+        self._lock = threading.Lock()
+
+    def on_llm_end(
+        self,
+        step_name: Optional[str],
+        prompt_file: str,
+        response_size: int,
+        error: Optional[Exception],
+        duration: float,
+        usage: Dict[str, int],
+    ) -> None:
+        with self._lock:
+            key = (threading.get_ident(), step_name or prompt_file)
+            self._llm_time[key] = self._llm_time.get(key, 0.0) + duration
+
+    def on_step_end(
+        self,
+        step_name: str,
+        story_name: str,
+        response: Any,
+        error: Optional[Exception],
+        duration: float,
+    ) -> None:
+        with self._lock:
+            llm_time = self._llm_time.pop((threading.get_ident(), step_name), 0.0)
+            step = self.steps.setdefault(
+                step_name, {"duration": [], "llm_time": [], "overhead": []}
+            )
+            step["duration"].append(duration)
+            step["llm_time"].append(llm_time)
+            step["overhead"].append(duration - llm_time)
+
+
+def load_stories(stories_dir: str) -> List[Tuple[str, str]]:
+    """
+    Load the stories of a directory.
+
+    Args:
+        stories_dir: The directory of the ``.md`` and ``.txt`` story files
+
+    Returns:
+        The (file name, content) of every story, sorted by file name
+    """
+    stories = []
+    for path in sorted(Path(stories_dir).iterdir()):
+        if path.suffix in (".md", ".txt"):
+            stories.append((path.name, path.read_text(encoding="utf-8")))
+    return stories
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """
+    Compute a percentile by linear interpolation.
+
+    Args:
+        values: The values
+        fraction: The percentile as a fraction, e.g. 0.95
+
+    Returns:
+        The percentile, or 0.0 without values
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(values: Sequence[float]) -> Dict[str, float]:
+    """
+    Summarize a series of durations.
+
+    Args:
+        values: The durations in seconds
+
+    Returns:
+        The count, mean, p50, p95, p99 and max of the durations
+    """
+    return {
+        "count": len(values),
+        "mean": statistics.fmean(values) if values else 0.0,
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": max(values) if values else 0.0,
+    }
+
+
+def peak_rss_bytes() -> int:
+    """
+    Get the peak resident set size of the process.
+
+    Returns:
+        The peak RSS in bytes
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def git_commit() -> Optional[str]:
+    """
+    Get the commit of the working tree, to tell benchmark results apart.
+
+    Returns:
+        The commit hash, or None outside of a git checkout
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True, timeout=5
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+class Benchmark:
+    """Benchmark of the calculation pipeline with the fake provider."""
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        seed: Optional[int] = 0,
+        max_step_concurrency: Optional[int] = None,
+    ):
+        """
+        Initialize the benchmark.
+
+        Args:
+            logger: The logger passed to the calculators
+            latency: Mean simulated latency of the LLM calls in seconds
+            jitter: Standard deviation of the simulated latency in seconds
+            seed: Seed of the simulated latencies
+            max_step_concurrency: Maximum number of steps of a story running at the same time
+        """
+        self.logger = logger
+        self.latency = latency
+        self.jitter = jitter
+        self.seed = seed
+        self.max_step_concurrency = max_step_concurrency
+
+    def build_calculator(
+        self, callbacks: Optional[List[BCPCallbackHandler]] = None
+    ) -> BCPCalculator:
+        """
+        Build a calculator answered by the fake provider, without caches.
+
+        Args:
+            callbacks: Handlers notified of the calculations
+
+        Returns:
+            The calculator
+        """
+        prompt_handler = PromptHandler(self.logger, provider_name="fake")
+        prompt_handler.provider = FakeProvider(
+            self.logger, latency=self.latency, jitter=self.jitter, seed=self.seed
+        )
+        return BCPCalculator(
+            self.logger,
+            provider_name="fake",
+            prompt_handler=prompt_handler,
+            max_concurrency=self.max_step_concurrency,
+            callbacks=callbacks,
+        )
+
+    def run_sequential(self, stories: List[Tuple[str, str]], repeat: int = 1) -> Dict[str, Any]:
+        """
+        Calculate every story one after the other.
+
+        Args:
+            stories: The (name, content) of the stories
+            repeat: Number of times each story is calculated
+
+        Returns:
+            The latency of every story and the wall time, LLM time and overhead of every step
+        """
+        timer = StepTimer()
+        calculator = self.build_calculator(callbacks=[timer])
+        # Warm up the templates and the model outside of the measurements
+        calculator.calculate_bcp(stories[0][1])
+        timer.steps.clear()
+
+        latencies: Dict[str, List[float]] = {}
+        for _ in range(repeat):
+            for name, content in stories:
+                started = time.perf_counter()
+                calculator.calculate_bcp(content)
+                latencies.setdefault(name, []).append(time.perf_counter() - started)
+
+        return {
+            "stories": {name: summarize(values) for name, values in latencies.items()},
+            "latency": summarize([value for values in latencies.values() for value in values]),
+            "steps": {
+                step_name: {series: summarize(values) for series, values in step.items()}
+                for step_name, step in timer.steps.items()
+            },
+        }
+
+    def run_concurrent(
+        self, stories: List[Tuple[str, str]], concurrency: int, repeat: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Calculate the stories on a pool of threads, one calculator per thread.
+
+        Args:
+            stories: The (name, content) of the stories
+            concurrency: Number of stories calculated at the same time
+            repeat: Number of times each story is calculated
+
+        Returns:
+            The throughput in stories per second and the latency of the calculations
+        """
+        local = threading.local()
+
+        def calculate(content: str) -> float:
+            if not hasattr(local, "calculator"):
+                local.calculator = self.build_calculator()
+            started = time.perf_counter()
+            local.calculator.calculate_bcp(content)
+            return time.perf_counter() - started
+
+        contents = [content for _ in range(repeat) for _, content in stories]
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            started = time.perf_counter()
+            latencies = list(executor.map(calculate, contents))
+            wall_time = time.perf_counter() - started
+
+        return {
+            "concurrency": concurrency,
+            "stories": len(contents),
+            "wall_time": wall_time,
+            "throughput": len(contents) / wall_time if wall_time else 0.0,
+            "latency": summarize(latencies),
+        }
+
+    def run(
+        self,
+        stories: List[Tuple[str, str]],
+        concurrency_levels: Sequence[int] = (1, 4, 8),
+        repeat: int = 1,
+        trace_memory: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Run the whole benchmark.
+
+        Args:
+            stories: The (name, content) of the stories
+            concurrency_levels: The numbers of concurrent stories to measure the throughput at
+            repeat: Number of times each story is calculated in each phase
+            trace_memory: Also measure the peak Python heap with tracemalloc (slows the run down)
+
+        Returns:
+            The benchmark results, with the run metadata, the sequential latencies, the
+            throughput at every concurrency level and the peak memory
+        """
+        if not stories:
+            raise ValueError("No stories to benchmark")
+
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        sequential = self.run_sequential(stories, repeat)
+        throughput = [self.run_concurrent(stories, level, repeat) for level in concurrency_levels]
+        memory = {"peak_rss_bytes": peak_rss_bytes()}
+        if trace_memory:
+            memory["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        return {
+            "metadata": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "stories": len(stories),
+                "repeat": repeat,
+                "latency": self.latency,
+                "jitter": self.jitter,
+                "seed": self.seed,
+                "max_step_concurrency": self.max_step_concurrency,
+                "duration": time.perf_counter() - started,
+            },
+            "sequential": sequential,
+            "throughput": throughput,
+            "memory": memory,
+        }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Compare the headline figures of two benchmark results.
+
+    Args:
+        baseline: The results of the reference run
+        current: The results of the new run
+
+    Returns:
+        One entry per figure with both values and the relative change
+    """
+
+    def figures(results: Dict[str, Any]) -> Dict[str, float]:
+        values = {
+            "sequential latency p50": results["sequential"]["latency"]["p50"],
+            "sequential latency p95": results["sequential"]["latency"]["p95"],
+            "peak rss bytes": results["memory"]["peak_rss_bytes"],
+        }
+        for step_name, step in results["sequential"]["steps"].items():
+            values[f"{step_name} overhead mean"] = step["overhead"]["mean"]
+        for level in results["throughput"]:
+            values[f"throughput at {level['concurrency']}"] = level["throughput"]
+        return values
+
+    baseline_figures, current_figures = figures(baseline), figures(current)
+    comparison = []
+    for name, value in current_figures.items():
+        if name not in baseline_figures:
+            continue
+        reference = baseline_figures[name]
+        comparison.append(
+            {
+                "figure": name,
+                "baseline": reference,
+                "current": value,
+                "change": (value - reference) / reference if reference else None,
+            }
+        )
+    return comparison
+
+
+def save_results(results: Dict[str, Any], output_file: str) -> None:
+    """
+    Save benchmark results as JSON.
+
+    Args:
+        results: The benchmark results
+        output_file: The path of the JSON file
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
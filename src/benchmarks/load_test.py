@@ -0,0 +1,418 @@
+"""
+Load test of the BCP Calculator HTTP API.
+
+Drives a mix of ``/calculate`` submissions and ``/status`` polls at a target
+rate against one API server process, usually started here with the fake
+provider, and reports the submission and completion latencies, throughput,
+error rates and the memory and threads of the server over time.
+"""
+
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from .benchmark import git_commit, summarize
+
+OPERATIONS = ("calculate", "status")
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """
+    Parse a traffic mix such as ``calculate=1,status=4``.
+
+    Args:
+        value: Comma-separated operation=weight pairs
+
+    Returns:
+        The weight of every operation
+
+    Raises:
+        ValueError: If an operation is unknown or no weight is positive
+    """
+    mix = {}
+    for part in value.split(","):
+        if not part.strip():
+            continue
+        operation, _, weight = part.partition("=")
+        operation = operation.strip()
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation in traffic mix: {operation}")
+        mix[operation] = float(weight or 1)
+    if not any(weight > 0 for weight in mix.values()):
+        raise ValueError(f"Traffic mix has no positive weight: {value}")
+    return mix
+
+
+def process_stats(pid: int) -> Optional[Dict[str, int]]:
+    """
+    Read the resident memory and thread count of a process.
+
+    Args:
+        pid: The process id
+
+    Returns:
+        The RSS in bytes and the number of threads, or None where /proc is not available
+    """
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return {
+            "rss_bytes": int(fields["VmRSS"].split()[0]) * 1024,
+            "threads": int(fields["Threads"]),
+        }
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def free_port() -> int:
+    """Get a free local TCP port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class ApiServer:
+    """
+    API server process started with ``run_api_server.py`` for the duration of a load test.
+
+    Result and step caches are disabled so every submission runs the whole
+    pipeline, and jobs go to a throwaway SQLite job store.
+    """
+
+    def __init__(
+        self,
+        port: Optional[int] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        env: Optional[Dict[str, str]] = None,
+        startup_timeout: float = 30.0,
+    ):
+        """
+        Initialize the server.
+
+        Args:
+            port: Port to bind the server to (default: a free port)
+            latency: Mean simulated latency of the fake provider in seconds
+            jitter: Standard deviation of the simulated latency in seconds
+            env: Extra environment variables of the server, e.g. BCP_API_WORKERS
+            startup_timeout: Seconds to wait for the server to answer
+        """
+        self.port = port or free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.latency = latency
+        self.jitter = jitter
+        self.env = dict(env or {})
+        self.startup_timeout = startup_timeout
+        self.process: Optional[subprocess.Popen] = None
+        self._job_dir: Optional[tempfile.TemporaryDirectory] = None
+
+    @property
+    def pid(self) -> Optional[int]:
+        """The process id of the running server."""
+        return self.process.pid if self.process else None
+
+    def start(self) -> None:
+        """
+        Start the server and wait until it answers.
+
+        Raises:
+            RuntimeError: If the server exits or does not answer in time
+        """
+        self._job_dir = tempfile.TemporaryDirectory(prefix="bcp-load-test-")
+        env = {
+            **os.environ,
+            "BCP_FAKE_LATENCY": str(self.latency),
+            "BCP_FAKE_LATENCY_JITTER": str(self.jitter),
+            "BCP_RESULT_CACHE": "false",
+            "BCP_STEP_CACHE": "false",
+            "BCP_JOB_DB_PATH": os.path.join(self._job_dir.name, "jobs.sqlite"),
+            **self.env,
+        }
+        env.pop("API_HOST", None)
+        env.pop("API_PORT", None)
+        self.process = subprocess.Popen(
+            [sys.executable, str(REPO_ROOT / "run_api_server.py"), "--port", str(self.port)],
+            cwd=str(REPO_ROOT),
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"API server exited with code {self.process.returncode}")
+            try:
+                if httpx.get(f"{self.url}/", timeout=1.0).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
+        self.stop()
+        raise RuntimeError(f"API server did not answer within {self.startup_timeout}s")
+
+    def stop(self) -> None:
+        """Stop the server and remove its job store."""
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if self._job_dir:
+            self._job_dir.cleanup()
+            self._job_dir = None
+
+    def __enter__(self) -> "ApiServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+class LoadTest:
+    """Open-loop load test of the calculation endpoints."""
+
+    def __init__(
+        self,
+        base_url: str,
+        stories: List[Tuple[str, str]],
+        rate: float,
+        duration: float,
+        mix: Optional[Dict[str, float]] = None,
+        provider: str = "fake",
+        pid: Optional[int] = None,
+        wait: float = 10.0,
+        drain_timeout: float = 60.0,
+        request_timeout: float = 30.0,
+        sample_interval: float = 1.0,
+        seed: Optional[int] = 0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        Initialize the load test.
+
+        Args:
+            base_url: The URL of the API server
+            stories: The (name, content) of the stories submitted in turn
+            rate: Target number of requests per second
+            duration: Seconds during which requests are sent
+            mix: Weight of every operation (default: one status poll per submission)
+            provider: The provider requested for the calculations
+            pid: Process id of the server, to sample its memory and threads
+            wait: Longest long-poll of the completion tracking, in seconds
+            drain_timeout: Seconds to wait for the submitted jobs after the last request
+            request_timeout: Timeout of every request, in seconds
+            sample_interval: Seconds between two samples of the server process
+            seed: Seed of the operation draws
+            transport: Optional httpx transport, e.g. to test an app in-process
+        """
+        if not stories:
+            raise ValueError("No stories to submit")
+        if rate <= 0:
+            raise ValueError("The request rate must be positive")
+        self.base_url = base_url
+        self.stories = stories
+        self.rate = rate
+        self.duration = duration
+        self.mix = mix or {"calculate": 1.0, "status": 1.0}
+        self.provider = provider
+        self.pid = pid
+        self.wait = wait
+        self.drain_timeout = drain_timeout
+        self.request_timeout = request_timeout
+        self.sample_interval = sample_interval
+        self.seed = seed
+        self.transport = transport
+
+    async def run_async(self) -> Dict[str, Any]:
+        """
+        Run the load test on the current event loop.
+
+        Returns:
+            The load test results
+        """
+        rng = random.Random(self.seed)
+        operations = list(self.mix)
+        weights = [self.mix[operation] for operation in operations]
+        requests: Dict[str, Dict[str, Any]] = {
+            operation: {"latencies": [], "status_codes": {}, "errors": 0}
+            for operation in OPERATIONS
+        }
+        completions: Dict[str, Any] = {"latencies": [], "completed": 0, "failed": 0, "timed_out": 0}
+        job_ids: List[str] = []
+        trackers: List[asyncio.Task] = []
+        samples: List[Dict[str, Any]] = []
+        started = time.perf_counter()
+
+        def record(operation: str, latency: float, status_code: Optional[int]) -> None:
+            stats = requests[operation]
+            key = str(status_code) if status_code is not None else "exception"
+            stats["status_codes"][key] = stats["status_codes"].get(key, 0) + 1
+            if status_code is None or status_code >= 400:
+                stats["errors"] += 1
+            else:
+                stats["latencies"].append(latency)
+
+        async def track(client: httpx.AsyncClient, job_id: str, submitted: float) -> None:
+            deadline = submitted + self.duration + self.drain_timeout
+            while time.perf_counter() < deadline:
+                try:
+                    response = await client.get(
+                        f"/status/{job_id}",
+                        params={"wait": self.wait},
+                        timeout=self.request_timeout + self.wait,
+                    )
+                    job = response.json() if response.status_code == 200 else {}
+                except (httpx.HTTPError, ValueError):
+                    job = {}
+                if job.get("status") in ("completed", "failed"):
+                    completions["latencies"].append(time.perf_counter() - submitted)
+                    completions[job["status"]] += 1
+                    return
+                if not job:
+                    await asyncio.sleep(min(self.wait, 0.5))
+            completions["timed_out"] += 1
+
+        async def submit(client: httpx.AsyncClient, index: int) -> None:
+            _, content = self.stories[index % len(self.stories)]
+            request_started = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/calculate", json={"content": content, "provider": self.provider}
+                )
+            except httpx.HTTPError:
+                record("calculate", time.perf_counter() - request_started, None)
+                return
+            record("calculate", time.perf_counter() - request_started, response.status_code)
+            if response.status_code == 200:
+                job_id = response.json()["job_id"]
+                job_ids.append(job_id)
+                trackers.append(asyncio.create_task(track(client, job_id, request_started)))
+
+        async def poll(client: httpx.AsyncClient) -> None:
+            request_started = time.perf_counter()
+            try:
+                response = await client.get(f"/status/{rng.choice(job_ids)}")
+            except httpx.HTTPError:
+                record("status", time.perf_counter() - request_started, None)
+                return
+            record("status", time.perf_counter() - request_started, response.status_code)
+
+        async def sample() -> None:
+            while True:
+                stats = process_stats(self.pid) if self.pid else None
+                samples.append(
+                    {
+                        "time": time.perf_counter() - started,
+                        "in_flight_jobs": sum(1 for task in trackers if not task.done()),
+                        **(stats or {}),
+                    }
+                )
+                await asyncio.sleep(self.sample_interval)
+
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+        async with httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.request_timeout,
+            limits=limits,
+            transport=self.transport,
+        ) as client:
+            sampler = asyncio.create_task(sample())
+            senders: List[asyncio.Task] = []
+            submissions = 0
+            total = max(1, int(self.rate * self.duration))
+            for index in range(total):
+                # Open loop: requests leave on schedule whether or not the earlier ones finished
+                delay = started + index / self.rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                operation = rng.choices(operations, weights)[0]
+                if operation == "status" and job_ids:
+                    senders.append(asyncio.create_task(poll(client)))
+                else:
+                    senders.append(asyncio.create_task(submit(client, submissions)))
+                    submissions += 1
+            send_time = time.perf_counter() - started
+
+            await asyncio.gather(*senders)
+            await asyncio.gather(*trackers)
+            wall_time = time.perf_counter() - started
+            sampler.cancel()
+            stats = process_stats(self.pid) if self.pid else None
+            samples.append({"time": wall_time, "in_flight_jobs": 0, **(stats or {})})
+
+        request_count = sum(sum(stats["status_codes"].values()) for stats in requests.values())
+        return {
+            "metadata": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "commit": git_commit(),
+                "base_url": self.base_url,
+                "provider": self.provider,
+                "rate": self.rate,
+                "duration": self.duration,
+                "mix": self.mix,
+                "stories": len(self.stories),
+                "seed": self.seed,
+            },
+            "requests": {
+                operation: {
+                    "count": sum(stats["status_codes"].values()),
+                    "errors": stats["errors"],
+                    "error_rate": (
+                        stats["errors"] / sum(stats["status_codes"].values())
+                        if stats["status_codes"]
+                        else 0.0
+                    ),
+                    "status_codes": stats["status_codes"],
+                    "latency": summarize(stats["latencies"]),
+                }
+                for operation, stats in requests.items()
+            },
+            "completion": {
+                "submitted": len(job_ids),
+                "completed": completions["completed"],
+                "failed": completions["failed"],
+                "timed_out": completions["timed_out"],
+                "latency": summarize(completions["latencies"]),
+            },
+            "throughput": {
+                "achieved_rate": request_count / send_time if send_time else 0.0,
+                "requests_per_second": request_count / wall_time if wall_time else 0.0,
+                "completed_jobs_per_second": (
+                    completions["completed"] / wall_time if wall_time else 0.0
+                ),
+                "wall_time": wall_time,
+            },
+            "process": {
+                "peak_rss_bytes": max(
+                    (s["rss_bytes"] for s in samples if "rss_bytes" in s), default=None
+                ),
+                "max_threads": max((s["threads"] for s in samples if "threads" in s), default=None),
+                "samples": samples,
+            },
+        }
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run the load test.
+
+        Returns:
+            The request latencies and error rates per operation, the completion
+            latency of the jobs, the throughput and the samples of the server process
+        """
+        return asyncio.run(self.run_async())
@@ -0,0 +1,14 @@
+"""
+Provider comparison for the BCP Calculator.
+
+The runner streams the results of every (story, provider) pair as they
+complete; the report step builds the tables and charts from them.
+"""
+
+from .runner import ComparisonRunner, read_results, summary_row
+
+__all__ = [
+    "ComparisonRunner",
+    "read_results",
+    "summary_row",
+]
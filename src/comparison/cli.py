@@ -0,0 +1,148 @@
+"""
+Command line interface of the provider comparison.
+"""
+
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from ..bcp import open_cassette, setup_logger
+from .runner import ComparisonRunner
+
+
+def parse_arguments(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Run BCP provider comparison on test stories.")
+    parser.add_argument(
+        "--stories-dir",
+        type=str,
+        default="tests/data",
+        help="Directory containing user story files (default: tests/data)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default="tests/results",
+        help="Directory to save results (default: tests/results)",
+    )
+    parser.add_argument(
+        "--providers",
+        type=str,
+        default="openai,claude",
+        help="Comma-separated providers to compare (default: openai,claude)",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=4,
+        help="Maximum number of (story, provider) pairs calculated at the same time (default: 4)",
+    )
+    parser.add_argument(
+        "--provider-concurrency",
+        type=int,
+        help=(
+            "Maximum number of pairs of one provider calculated at the same time"
+            " (default: no limit)"
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=(
+            "Keep the results of a previous run in the output directory and only"
+            " calculate the missing pairs"
+        ),
+    )
+    parser.add_argument(
+        "--log-level",
+        type=str,
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        default="INFO",
+        help="Set the logging level (default: INFO)",
+    )
+    parser.add_argument(
+        "--format",
+        type=str,
+        choices=["json", "csv", "excel"],
+        default="excel",
+        help="Output format for comparison (default: excel)",
+    )
+    parser.add_argument(
+        "--skip-report",
+        action="store_true",
+        help="Only stream the pair results, without building the report and charts",
+    )
+    parser.add_argument(
+        "--report-only",
+        action="store_true",
+        help="Only build the report and charts from the results already in the output directory",
+    )
+    parser.add_argument(
+        "--no-charts", action="store_true", help="Build the Excel report without the charts"
+    )
+    parser.add_argument(
+        "--cassette",
+        type=str,
+        help="Cassette file to record the LLM responses to and replay them from",
+    )
+    parser.add_argument(
+        "--cassette-mode",
+        type=str,
+        choices=["record", "replay", "auto"],
+        default="auto",
+        help=(
+            "Record every response, only replay recorded ones, or replay and record the"
+            " missing ones (default: auto)"
+        ),
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Main entry point for the comparison."""
+    load_dotenv()
+    args = parse_arguments(argv)
+    logger = setup_logger(getattr(logging, args.log_level))
+
+    if not args.report_only:
+        story_dir = Path(args.stories_dir)
+        if not story_dir.exists():
+            logger.error(f"Stories directory '{story_dir}' does not exist")
+            sys.exit(1)
+        story_files = sorted(story_dir.glob("*.md"))
+        if not story_files:
+            logger.error(f"No story files found in {args.stories_dir}")
+            sys.exit(1)
+
+        cassette = open_cassette(args.cassette, args.cassette_mode) if args.cassette else None
+        runner = ComparisonRunner(
+            logger,
+            providers=[p.strip() for p in args.providers.split(",") if p.strip()],
+            output_dir=args.output_dir,
+            max_concurrency=args.max_concurrency,
+            provider_concurrency=args.provider_concurrency,
+            cassette=cassette,
+        )
+        counts = runner.run(story_files, resume=args.resume)
+        logger.info(
+            f"Comparison completed: {counts['calculated']} pairs calculated, "
+            f"{counts['failed']} failed, {counts['skipped']} skipped"
+        )
+        logger.info(f"Pair results saved to {runner.results_path} and {runner.summary_path}")
+
+    if not args.skip_report:
+        from .report import generate_comparison, load_results
+        from .runner import RESULTS_FILE
+
+        results = load_results(os.path.join(args.output_dir, RESULTS_FILE))
+        if not results:
+            logger.error(f"No comparison results found in {args.output_dir}")
+            sys.exit(1)
+        generate_comparison(
+            results, args.output_dir, args.format, logger, charts=not args.no_charts
+        )
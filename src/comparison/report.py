@@ -0,0 +1,167 @@
+"""
+Provider comparison report.
+
+Builds the JSON, CSV or Excel report and the charts of a comparison from its
+JSON Lines results. This is a separate step from the runner, so the runner
+never waits on pandas or matplotlib and a report can be rebuilt from partial
+results at any time.
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, List
+
+from .runner import read_results, summary_row
+
+METRICS = [
+    "Total BCP",
+    "Business Rules",
+    "UI Elements",
+    "External Integrations",
+    "Processing Time (s)",
+]
+
+
+def load_results(path: str) -> List[Dict[str, Any]]:
+    """
+    Load the results of a comparison, keeping the last result of every pair.
+
+    Args:
+        path: The JSON Lines file of the comparison
+
+    Returns:
+        The result of every (story, provider) pair, ordered by story file and provider
+    """
+    latest: Dict[Any, Dict[str, Any]] = {}
+    for result in read_results(path):
+        latest[(result.get("story_file"), result.get("provider"))] = result
+    return [latest[pair] for pair in sorted(latest, key=lambda pair: (str(pair[0]), str(pair[1])))]
+
+
+def generate_comparison(
+    results: List[Dict[str, Any]],
+    output_dir: str,
+    output_format: str,
+    logger: logging.Logger,
+    charts: bool = True,
+) -> str:
+    """
+    Generate a comparison report from the results.
+
+    Args:
+        results: List of result dictionaries
+        output_dir: Directory to save output files
+        output_format: Output format (json, csv, or excel)
+        logger: Logger instance
+        charts: Whether to also draw the comparison charts of an Excel report
+
+    Returns:
+        The path of the report
+    """
+    import pandas as pd
+
+    os.makedirs(output_dir, exist_ok=True)
+    comparison_data = [summary_row(result) for result in results]
+    df = pd.DataFrame(comparison_data)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    if output_format == "json":
+        output_file = os.path.join(output_dir, f"comparison_results_{timestamp}.json")
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(comparison_data, f, indent=2)
+    elif output_format == "csv":
+        output_file = os.path.join(output_dir, f"comparison_results_{timestamp}.csv")
+        df.to_csv(output_file, index=False)
+    elif output_format == "excel":
+        output_file = os.path.join(output_dir, f"comparison_results_{timestamp}.xlsx")
+        providers = list(dict.fromkeys(df["Provider"])) if not df.empty else []
+
+        if len(providers) >= 2:
+            # Compare every provider with the first one
+            pivot_df = df.pivot_table(
+                index="File", columns="Provider", values=METRICS, aggfunc="mean"
+            )
+            baseline = providers[0]
+            diff_df = pd.DataFrame(index=pivot_df.index)
+            for provider in providers[1:]:
+                for metric in METRICS:
+                    if (metric, provider) in pivot_df.columns and (
+                        metric,
+                        baseline,
+                    ) in pivot_df.columns:
+                        diff_df[f"{metric} Diff ({provider} - {baseline})"] = (
+                            pivot_df[metric, provider] - pivot_df[metric, baseline]
+                        )
+                        diff_df[f"{metric} % Diff ({provider} vs {baseline})"] = (
+                            (pivot_df[metric, provider] / pivot_df[metric, baseline]) - 1
+                        ) * 100
+
+            with pd.ExcelWriter(output_file) as writer:
+                df.to_excel(writer, sheet_name="Raw Data", index=False)
+                pivot_df.to_excel(writer, sheet_name="Provider Comparison")
+                diff_df.to_excel(writer, sheet_name="Differences")
+
+            if charts:
+                create_comparison_charts(df, output_dir, timestamp)
+        else:
+            df.to_excel(output_file, index=False)
+    else:
+        raise ValueError(f"Unsupported output format: {output_format}")
+
+    logger.info(f"Comparison report saved to {output_file}")
+    return output_file
+
+
+def create_comparison_charts(df: Any, output_dir: str, timestamp: str) -> None:
+    """
+    Create charts comparing provider results.
+
+    Args:
+        df: DataFrame with comparison data
+        output_dir: Directory to save charts
+        timestamp: Timestamp for file naming
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    charts_dir = os.path.join(output_dir, "charts")
+    os.makedirs(charts_dir, exist_ok=True)
+
+    # 1. Total BCP comparison by story
+    pivot_total = df.pivot_table(
+        index="File", columns="Provider", values="Total BCP", aggfunc="mean"
+    )
+    pivot_total.plot(kind="bar", figsize=(12, 8))
+    plt.title("Total BCP Comparison by Story")
+    plt.xlabel("Story")
+    plt.ylabel("Total BCP")
+    plt.tight_layout()
+    plt.savefig(os.path.join(charts_dir, f"total_bcp_comparison_{timestamp}.png"))
+    plt.close("all")
+
+    # 2. Processing time comparison
+    pivot_time = df.pivot_table(
+        index="File", columns="Provider", values="Processing Time (s)", aggfunc="mean"
+    )
+    pivot_time.plot(kind="bar", figsize=(12, 8))
+    plt.title("Processing Time Comparison by Story")
+    plt.xlabel("Story")
+    plt.ylabel("Time (seconds)")
+    plt.tight_layout()
+    plt.savefig(os.path.join(charts_dir, f"processing_time_comparison_{timestamp}.png"))
+    plt.close("all")
+
+    # 3. Component breakdown comparison (average across all stories)
+    components = ["Business Rules", "UI Elements", "External Integrations"]
+    provider_components = df.groupby("Provider")[components].mean()
+    provider_components.plot(kind="bar", figsize=(10, 6))
+    plt.title("Average Component Scores by Provider")
+    plt.xlabel("Provider")
+    plt.ylabel("Average Score")
+    plt.tight_layout()
+    plt.savefig(os.path.join(charts_dir, f"component_comparison_{timestamp}.png"))
+    plt.close("all")
@@ -0,0 +1,218 @@
+"""
+Provider comparison runner.
+
+Calculates every story with every provider on a pool of threads and streams
+each (story, provider) pair to JSON Lines and CSV files as soon as it
+completes, so partial data survives an interrupted run and a new run can
+resume where the previous one stopped. The JSON Lines file is a batch output
+of ``bcp.batch`` keyed by ``provider/story file``.
+"""
+
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..bcp import BCPCalculator
+from ..bcp.batch import JsonlBatchOutput, run_windowed
+from ..bcp.cassette import Cassette
+
+RESULTS_FILE = "comparison.jsonl"
+SUMMARY_FILE = "comparison.csv"
+
+SUMMARY_COLUMNS = [
+    "Story",
+    "File",
+    "Provider",
+    "Total BCP",
+    "Business Rules",
+    "UI Elements",
+    "External Integrations",
+    "Processing Time (s)",
+    "Error",
+]
+
+
+def summary_row(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Flatten the result of a (story, provider) pair into a summary row.
+
+    Args:
+        result: The BCP result, with its ``provider``, ``story_file`` and ``processing_time``
+
+    Returns:
+        The row with the columns of ``SUMMARY_COLUMNS``
+    """
+    components = result.get("breakdown", {})
+    return {
+        "Story": result.get("story_name", "Unknown"),
+        "File": result.get("story_file", "unknown"),
+        "Provider": result.get("provider", "unknown"),
+        "Total BCP": result.get("total_bcp", 0),
+        "Business Rules": components.get("Business Rules", 0),
+        "UI Elements": components.get("UI Elements", 0),
+        "External Integrations": components.get("External Integrations", 0),
+        "Processing Time (s)": result.get("processing_time", 0),
+        "Error": result.get("error", ""),
+    }
+
+
+def pair_key(story_file: str, provider: str) -> str:
+    """Get the name of a (story, provider) pair in the results file."""
+    return f"{provider}/{story_file}"
+
+
+def read_results(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read the pair results of a comparison, skipping a line left incomplete by an interrupted run.
+
+    Args:
+        path: The JSON Lines file of the comparison
+
+    Yields:
+        The result of every pair, in completion order
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)["result"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue
+
+
+class ComparisonRunner:
+    """Runner calculating every story with every provider concurrently."""
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        providers: List[str],
+        output_dir: str,
+        max_concurrency: int = 4,
+        provider_concurrency: Optional[int] = None,
+        cassette: Optional[Cassette] = None,
+    ):
+        """
+        Initialize the runner.
+
+        Args:
+            logger: The logger passed to the calculators
+            providers: The names of the providers to compare
+            output_dir: Directory of the JSON Lines and CSV outputs
+            max_concurrency: Maximum number of pairs calculated at the same time
+            provider_concurrency: Maximum number of pairs of one provider calculated at
+                the same time (default: no limit besides max_concurrency)
+            cassette: Optional cassette recording or replaying the LLM responses
+        """
+        self.logger = logger
+        self.providers = list(dict.fromkeys(providers))
+        self.output_dir = output_dir
+        self.results_path = os.path.join(output_dir, RESULTS_FILE)
+        self.summary_path = os.path.join(output_dir, SUMMARY_FILE)
+        self.max_concurrency = max(1, max_concurrency)
+        self.provider_slots = {
+            provider: threading.BoundedSemaphore(provider_concurrency or self.max_concurrency)
+            for provider in self.providers
+        }
+        self.cassette = cassette
+        self._calculators: Dict[str, BCPCalculator] = {}
+        self._lock = threading.Lock()
+
+    def _get_calculator(self, provider: str) -> BCPCalculator:
+        """Get the calculator of a provider, shared by every story."""
+        with self._lock:
+            if provider not in self._calculators:
+                self._calculators[provider] = BCPCalculator(
+                    self.logger, provider_name=provider, cassette=self.cassette
+                )
+            return self._calculators[provider]
+
+    def process_pair(self, story_path: Path, provider: str) -> Dict[str, Any]:
+        """
+        Calculate a story with a provider.
+
+        Args:
+            story_path: Path to the story file
+            provider: The provider name
+
+        Returns:
+            The BCP result with the provider, story file and processing time, or an error entry
+        """
+        with self.provider_slots[provider]:
+            self.logger.info(f"Processing {story_path.name} with {provider}")
+            started = time.perf_counter()
+            try:
+                result = self._get_calculator(provider).calculate_bcp(
+                    story_path.read_text(encoding="utf-8")
+                )
+            except Exception as e:
+                self.logger.error(f"Error processing {story_path.name} with {provider}: {str(e)}")
+                result = {"story_name": story_path.name, "error": str(e)}
+            processing_time = time.perf_counter() - started
+        self.logger.info(
+            f"Completed {story_path.name} with {provider} in {processing_time:.2f} seconds"
+        )
+        return {
+            **result,
+            "provider": provider,
+            "story_file": story_path.name,
+            "processing_time": processing_time,
+        }
+
+    def _open_outputs(self, resume: bool) -> JsonlBatchOutput:
+        """Open the results, then start the summary with the successful results kept."""
+        output = JsonlBatchOutput(self.results_path, resume=resume)
+        with open(self.summary_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS)
+            writer.writeheader()
+            for name in output:
+                if output.is_done(name):
+                    writer.writerow(summary_row(output[name]))
+        return output
+
+    def _append(self, output: JsonlBatchOutput, result: Dict[str, Any]) -> None:
+        """Append the result of a pair to the JSON Lines and CSV outputs."""
+        output.append(pair_key(result["story_file"], result["provider"]), result)
+        with self._lock:
+            with open(self.summary_path, "a", encoding="utf-8", newline="") as f:
+                csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS).writerow(summary_row(result))
+
+    def run(self, story_paths: List[Path], resume: bool = False) -> Dict[str, int]:
+        """
+        Calculate every story with every provider, streaming the results to the outputs.
+
+        Args:
+            story_paths: The story files
+            resume: Keep the outputs of a previous run and only calculate the pairs
+                they hold no successful result for
+
+        Returns:
+            The number of pairs calculated, failed and skipped
+        """
+        output = self._open_outputs(resume)
+        pairs = [
+            (path, provider)
+            for path in story_paths
+            for provider in self.providers
+            if not output.is_done(pair_key(path.name, provider))
+        ]
+        counts = {
+            "calculated": 0,
+            "failed": 0,
+            "skipped": len(story_paths) * len(self.providers) - len(pairs),
+        }
+        if counts["skipped"]:
+            self.logger.info(f"Resuming comparison: {counts['skipped']} pairs already done")
+
+        def on_result(pair: Tuple[Path, str], result: Dict[str, Any]) -> None:
+            self._append(output, result)
+            counts["failed" if "error" in result else "calculated"] += 1
+
+        run_windowed(pairs, lambda pair: self.process_pair(*pair), self.max_concurrency, on_result)
+        return counts
@@ -9,12 +9,21 @@ of user stories using a series of predefined prompts and multiple LLM providers.
 import argparse
 import json
 import logging
-import sys
 import os
-from typing import Dict, Any
+import sys
+from typing import Any, Dict, Optional
+
 from dotenv import load_dotenv
 
-from bcp import BCPCalculator, setup_logger
+from bcp import (
+    BCPCalculator,
+    Cassette,
+    get_result_cache,
+    get_step_cache,
+    open_cassette,
+    setup_logger,
+)
+
 
 def parse_arguments():
     """Parse command line arguments."""
@@ -48,9 +57,29 @@ def parse_arguments():
     parser.add_argument(
         "--provider",
         type=str,
-        choices=["openai", "claude", "flow-openai", "flow-bedrock"],
+        choices=["openai", "claude", "flow-openai", "flow-bedrock", "fake"],
         default="openai",
-        help="LLM provider to use (default: openai)"
+        help="LLM provider to use (default: openai)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore cached results and step responses and always call the LLM",
+    )
+    parser.add_argument(
+        "--cassette",
+        type=str,
+        help="Cassette file to record the LLM responses to and replay them from",
+    )
+    parser.add_argument(
+        "--cassette-mode",
+        type=str,
+        choices=["record", "replay", "auto"],
+        default="auto",
+        help=(
+            "Record every response, only replay recorded ones, or replay and record the"
+            " missing ones (default: auto)"
+        ),
     )
     return parser.parse_args()
 
@@ -60,7 +89,7 @@ def read_story_file(file_path: str, logger: logging.Logger) -> str:
     if not os.path.isfile(file_path):
         logger.error(f"Story file not found: {file_path}")
         sys.exit(1)
-    
+
     # Read story content
     try:
         with open(file_path, 'r', encoding='utf-8') as file:
@@ -69,18 +98,34 @@ def read_story_file(file_path: str, logger: logging.Logger) -> str:
         logger.error(f"Error reading story file: {str(e)}")
         sys.exit(1)
 
-def calculate_bcp_for_story(story_content: str, provider: str, logger: logging.Logger) -> Dict[str, Any]:
+
+def calculate_bcp_for_story(
+    story_content: str,
+    provider: str,
+    logger: logging.Logger,
+    use_cache: bool = True,
+    cassette: Optional[Cassette] = None,
+) -> Dict[str, Any]:
     """Calculate BCP for a given story."""
     try:
         # Initialize BCP calculator with selected provider
-        calculator = BCPCalculator(logger, provider_name=provider)
-        
+        result_cache = get_result_cache() if use_cache else None
+        step_cache = get_step_cache() if use_cache else None
+        calculator = BCPCalculator(
+            logger,
+            provider_name=provider,
+            result_cache=result_cache,
+            step_cache=step_cache,
+            cassette=cassette,
+        )
+
         # Calculate BCP
         return calculator.calculate_bcp(story_content)
     except Exception as e:
         logger.error(f"Error calculating BCP: {str(e)}")
         sys.exit(1)
 
+
 def save_or_print_results(results: Dict[str, Any], output_format: str, output_file: str = None, logger: logging.Logger = None) -> None:
     """Save results to file or print to stdout."""
     # Format results based on specified format
@@ -104,20 +149,31 @@ def main():
     """Main entry point for the BCP Calculator CLI."""
     # Load environment variables
     load_dotenv()
-    
+
     # Parse command line arguments
     args = parse_arguments()
-    
+
     # Setup logging
     log_level = getattr(logging, args.log_level)
     logger = setup_logger(log_level)
-    
+
     # Read story content
     story_content = read_story_file(args.story_file, logger)
-    
+
+    # Open the cassette of recorded LLM responses, if any
+    cassette = None
+    if args.cassette:
+        try:
+            cassette = open_cassette(args.cassette, args.cassette_mode)
+        except FileNotFoundError as e:
+            logger.error(str(e))
+            sys.exit(1)
+
     # Calculate BCP
-    results = calculate_bcp_for_story(story_content, args.provider, logger)
-    
+    results = calculate_bcp_for_story(
+        story_content, args.provider, logger, use_cache=not args.no_cache, cassette=cassette
+    )
+
     # Output results
     save_or_print_results(results, args.format, args.output_file, logger)
 
@@ -130,11 +186,11 @@ def format_results_json(results: Dict[str, Any]) -> str:
         "components": results.get("breakdown", {}),
         "steps": {}
     }
-    
+
     # Extract maturity and invest scores
     maturity_score = 0
     invest_score = 0
-    
+
     # Add step results with extracted data
     for step_name, step_result in results["steps"].items():
         if isinstance(step_result, dict):
@@ -146,7 +202,7 @@ def format_results_json(results: Dict[str, Any]) -> str:
                 "raw_response": step_result.get("raw_response", "")
             }
             json_output["steps"][step_name] = step_data
-            
+
             # Capture maturity and invest scores
             if step_name == "Story Maturity Complexity":
                 maturity_score = step_result.get("score", 0)
@@ -154,36 +210,58 @@ def format_results_json(results: Dict[str, Any]) -> str:
                 invest_score = step_result.get("score", 0)
         else:
             json_output["steps"][step_name] = {"raw_response": str(step_result)}
-    
+
     # Add maturity and invest scores to root
     json_output["score"] = {
         "maturity": maturity_score,
         "invest": invest_score
     }
-    
+
+    # Add token usage and cost when the calculation reported it
+    if results.get("usage"):
+        json_output["usage"] = results["usage"]
+
     return json.dumps(json_output, indent=2, ensure_ascii=False)
 
 def format_results_text(results: Dict[str, Any]) -> str:
     """Format the results as text (legacy format)."""
     output = []
-    
+
     # Add step results
     for step_name, step_result in results["steps"].items():
         output.append(f"=== {step_name} ===")
         output.append(str(step_result))
         output.append("")
-    
+
     # Add final BCP
     output.append("=== FINAL BUSINESS COMPLEXITY POINTS ===")
     output.append(f"Total BCP: {results['total_bcp']}")
     output.append("")
-    
+
     # Add breakdown
     output.append("=== BCP BREAKDOWN ===")
     for component, score in results["breakdown"].items():
         output.append(f"{component}: {score}")
-    
+
+    # Add token usage
+    usage = results.get("usage")
+    if usage:
+        output.append("")
+        output.append("=== TOKEN USAGE ===")
+        if usage.get("cached"):
+            output.append("Result served from the result cache, no LLM call made")
+        for step_name, step_usage in usage["steps"].items():
+            output.append(
+                f"{step_name}: {step_usage['input_tokens']} in / {step_usage['output_tokens']} out "
+                f"({step_usage['cached_tokens']} cached), {step_usage['llm_time']:.2f}s"
+            )
+        total = usage["total"]
+        cost = f"${total['cost']:.4f}" if total.get("cost") is not None else "unknown cost"
+        output.append(
+            f"Total: {total['total_tokens']} tokens, {cost} ({usage['provider']}/{usage['model']})"
+        )
+
     return "\n".join(output)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
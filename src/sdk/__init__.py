@@ -4,6 +4,7 @@ SDK for the BCP Calculator.
 This package provides a Python SDK for the BCP Calculator.
 """
 
+from .batch import JsonlBatchOutput
 from .client import BCPClient
 
-__version__ = "0.1.0"
\ No newline at end of file
+__version__ = "0.1.0"
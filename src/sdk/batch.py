@@ -0,0 +1,10 @@
+"""
+Streaming batch output for the BCP Calculator SDK.
+
+The output is shared with the provider comparison and lives in ``bcp.batch``;
+it is re-exported here for the SDK users.
+"""
+
+from bcp.batch import JsonlBatchOutput
+
+__all__ = ["JsonlBatchOutput"]
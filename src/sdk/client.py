@@ -4,37 +4,101 @@ BCP Calculator SDK Client.
 This module provides a Python client for the BCP Calculator.
 """
 
-from typing import Dict, Any, Optional, Union, List
-import os
+import json
 import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-import json
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Union
+
 from dotenv import load_dotenv
 
-from bcp import BCPCalculator, setup_logger
+from bcp import (
+    BCPCalculator,
+    BCPCallbackHandler,
+    RateLimiter,
+    get_result_cache,
+    get_step_cache,
+    open_cassette,
+    rate_limit_scope,
+    setup_logger,
+)
+from bcp.batch import run_windowed
+
+from .batch import JsonlBatchOutput
 
 
 class BCPClient:
     """Python SDK for the BCP Calculator."""
-    
-    def __init__(self, 
-                log_level: str = "INFO",
-                provider: str = "openai"):
+
+    def __init__(
+        self,
+        log_level: str = "INFO",
+        provider: str = "openai",
+        use_cache: bool = True,
+        callbacks: Optional[List[BCPCallbackHandler]] = None,
+        cassette: Optional[Union[str, Path]] = None,
+        cassette_mode: str = "auto",
+    ):
         """
         Initialize the BCP client.
-        
+
         Args:
             log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
             provider: LLM provider to use (openai or claude)
+            use_cache: Whether to reuse cached results of identical stories and prompts
+            callbacks: Optional handlers notified of the progress of every calculation
+            cassette: Optional cassette file to record the LLM responses to and replay them from
+            cassette_mode: Cassette mode: 'record' every response, only 'replay' recorded ones,
+                or 'auto' to replay recorded responses and record the missing ones
         """
         # Load environment variables if not already loaded
         load_dotenv()
-        
+
         self.log_level = getattr(logging, log_level.upper())
         self.provider = provider
         self.logger = setup_logger(self.log_level)
-        self.calculator = BCPCalculator(self.logger, provider_name=self.provider)
-        
+        self.result_cache = get_result_cache() if use_cache else None
+        self.step_cache = get_step_cache() if use_cache else None
+        self.callbacks = list(callbacks or [])
+        self.cassette = open_cassette(str(cassette), cassette_mode) if cassette else None
+        self._calculators: Dict[str, BCPCalculator] = {}
+        self._calculators_lock = threading.Lock()
+        self.calculator = self._get_calculator(self.provider)
+
+    def _get_calculator(self, provider: str) -> BCPCalculator:
+        """Get the calculator of a provider, building it on first use and reusing it afterwards."""
+        with self._calculators_lock:
+            if provider not in self._calculators:
+                self._calculators[provider] = self._build_calculator(provider)
+            return self._calculators[provider]
+
+    def _build_calculator(self, provider: str) -> BCPCalculator:
+        """Build a calculator for a provider with the client caches and callbacks."""
+        return BCPCalculator(
+            self.logger,
+            provider_name=provider,
+            result_cache=self.result_cache,
+            step_cache=self.step_cache,
+            callbacks=self.callbacks,
+            cassette=self.cassette,
+        )
+
+    def add_callback(self, handler: BCPCallbackHandler) -> None:
+        """
+        Add a handler notified of the progress of the next calculations.
+
+        Args:
+            handler: The callback handler
+        """
+        self.callbacks.append(handler)
+        with self._calculators_lock:
+            for calculator in self._calculators.values():
+                calculator.callbacks.append(handler)
+
     def calculate(self, story_content: str) -> Dict[str, Any]:
         """
         Calculate BCP for a user story.
@@ -46,7 +110,19 @@ class BCPClient:
             A dictionary containing the BCP calculation results
         """
         return self.calculator.calculate_bcp(story_content)
-        
+
+    async def acalculate(self, story_content: str) -> Dict[str, Any]:
+        """
+        Calculate BCP for a user story without blocking the event loop.
+
+        Args:
+            story_content: The user story content
+
+        Returns:
+            A dictionary containing the BCP calculation results
+        """
+        return await self.calculator.acalculate_bcp(story_content)
+
     def calculate_file(self, file_path: Union[str, Path]) -> Dict[str, Any]:
         """
         Calculate BCP for a user story file.
@@ -60,79 +136,166 @@ class BCPClient:
         path = Path(file_path)
         if not path.exists():
             raise FileNotFoundError(f"Story file not found: {file_path}")
-            
+
         with open(path, 'r', encoding='utf-8') as f:
             story_content = f.read()
-            
+
         return self.calculate(story_content)
-        
-    def batch_calculate(self, stories_dir: Union[str, Path], 
-                        output_path: Optional[Union[str, Path]] = None,
-                        file_pattern: str = "*.md") -> Dict[str, Dict[str, Any]]:
+
+    def batch_calculate(
+        self,
+        stories_dir: Union[str, Path],
+        output_path: Optional[Union[str, Path]] = None,
+        file_pattern: str = "*.md",
+        max_concurrency: Optional[int] = None,
+        requests_per_minute: Optional[float] = None,
+        resume: bool = False,
+    ) -> Mapping[str, Dict[str, Any]]:
         """
         Calculate BCP for multiple user story files in a directory.
-        
+
+        With a ``.jsonl`` output path, every result is appended to the file as soon
+        as its story finishes and the returned mapping reads the results back from
+        the file, so memory does not grow with the size of the batch.
+
         Args:
             stories_dir: Directory containing user story files
-            output_path: Optional path to save the batch results
+            output_path: Optional path to save the batch results, streamed as JSON Lines
+                if it ends with ``.jsonl`` and written as one JSON object otherwise
             file_pattern: Glob pattern for matching story files (default: *.md)
-            
+            max_concurrency: Maximum number of stories calculated at the same time
+                (default: BCP_BATCH_CONCURRENCY environment variable or 1)
+            requests_per_minute: Optional cap on the LLM requests per minute sent by the
+                batch. The batch has its own limiter in front of the process-wide limit
+                of the provider, so both apply and other calculations are not affected
+            resume: Keep the results of a ``.jsonl`` output and only calculate the
+                stories it holds no successful result for
+
         Returns:
-            A dictionary mapping file names to their BCP calculation results
+            A mapping of file names to their BCP calculation results, in file name order
+
+        Raises:
+            NotADirectoryError: If the stories directory does not exist
+            ValueError: If resume is requested without a ``.jsonl`` output path
         """
         dir_path = Path(stories_dir)
         if not dir_path.is_dir():
             raise NotADirectoryError(f"Not a directory: {stories_dir}")
-            
-        results = {}
-        for file_path in dir_path.glob(file_pattern):
-            self.logger.info(f"Processing {file_path.name}")
-            try:
-                results[file_path.name] = self.calculate_file(file_path)
-            except Exception as e:
-                self.logger.error(f"Error processing {file_path.name}: {str(e)}")
-                results[file_path.name] = {"error": str(e)}
-                
+        streamed = output_path is not None and Path(output_path).suffix == ".jsonl"
+        if resume and not streamed:
+            raise ValueError("Resuming a batch requires a .jsonl output path")
+
+        max_concurrency = max(
+            1, max_concurrency or int(os.environ.get("BCP_BATCH_CONCURRENCY", "1"))
+        )
+        file_paths = sorted(dir_path.glob(file_pattern), key=lambda path: path.name)
+
+        if streamed:
+            output = JsonlBatchOutput(output_path, resume=resume)
+            pending = [path for path in file_paths if not output.is_done(path.name)]
+            if resume:
+                self.logger.info(
+                    f"Resuming batch: {len(file_paths) - len(pending)} stories already done"
+                )
+            with self._batch_rate_limit(requests_per_minute):
+                self._run_batch(pending, max_concurrency, output.append)
+            return output
+
+        collected: Dict[str, Dict[str, Any]] = {}
+        with self._batch_rate_limit(requests_per_minute):
+            self._run_batch(file_paths, max_concurrency, collected.__setitem__)
+        results = {path.name: collected[path.name] for path in file_paths}
+
         # Save results if output path is provided
         if output_path:
             out_path = Path(output_path)
             out_path.parent.mkdir(parents=True, exist_ok=True)
             with open(out_path, 'w', encoding='utf-8') as f:
                 json.dump(results, f, indent=2)
-                
+
         return results
-        
+
+    @contextmanager
+    def _batch_rate_limit(self, requests_per_minute: Optional[float]) -> Iterator[None]:
+        """
+        Cap the LLM requests per minute of the calculations of a batch.
+
+        The batch gets its own limiter, waited for before the process-wide limiter
+        of the provider, which is left unchanged for the other callers.
+
+        Args:
+            requests_per_minute: The cap, or None for no batch cap
+        """
+        if requests_per_minute is None:
+            yield
+            return
+        with rate_limit_scope(RateLimiter(requests_per_minute)):
+            yield
+
+    def _run_batch(
+        self,
+        file_paths: List[Path],
+        max_concurrency: int,
+        on_result: Callable[[str, Dict[str, Any]], None],
+    ) -> None:
+        """
+        Calculate story files on a pool of threads, handing over each result as soon as it is ready.
+
+        Only a few stories beyond the running ones are queued at a time, so
+        finished results are never held back by slower stories.
+
+        Args:
+            file_paths: The story files
+            max_concurrency: Maximum number of stories calculated at the same time
+            on_result: Called with the file name and the result (or ``error`` entry) of every story
+        """
+
+        def calculate_story(file_path: Path) -> Dict[str, Any]:
+            self.logger.info(f"Processing {file_path.name}")
+            try:
+                return self.calculate_file(file_path)
+            except Exception as e:
+                self.logger.error(f"Error processing {file_path.name}: {str(e)}")
+                return {"error": str(e)}
+
+        # The calculator is shared by the workers: each story runs its own steps
+        run_windowed(
+            file_paths,
+            calculate_story,
+            max_concurrency,
+            lambda path, result: on_result(path.name, result),
+        )
+
     def compare_providers(self, 
                           story_content: str,
                           providers: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
         """
         Compare BCP calculations between different providers.
-        
+
+        The providers run at the same time, each with the calculator the client
+        keeps for it, so a comparison takes about as long as the slowest provider.
+
         Args:
             story_content: The user story content
             providers: List of providers to compare (defaults to ["openai", "claude"])
-            
+
         Returns:
-            A dictionary mapping providers to their BCP calculation results
+            A dictionary mapping providers to their BCP calculation results, in the order
+            of ``providers``, each with the ``wall_time`` of the calculation in seconds
         """
         if providers is None:
             providers = ["openai", "claude"]
-            
-        results = {}
-        original_provider = self.provider
-        
-        for provider in providers:
+
+        def calculate_with(provider: str) -> Dict[str, Any]:
             self.logger.info(f"Using provider: {provider}")
-            self.provider = provider
-            self.calculator = BCPCalculator(self.logger, provider_name=provider)
+            started = time.perf_counter()
             try:
-                results[provider] = self.calculate(story_content)
+                result = self._get_calculator(provider).calculate_bcp(story_content)
             except Exception as e:
                 self.logger.error(f"Error with provider {provider}: {str(e)}")
-                results[provider] = {"error": str(e)}
-                
-        # Restore original provider
-        self.provider = original_provider
-        self.calculator = BCPCalculator(self.logger, provider_name=original_provider)
-        
-        return results
\ No newline at end of file
+                result = {"error": str(e)}
+            return {**result, "wall_time": time.perf_counter() - started}
+
+        providers = list(dict.fromkeys(providers))
+        with ThreadPoolExecutor(max_workers=max(1, len(providers))) as executor:
+            return dict(zip(providers, executor.map(calculate_with, providers)))
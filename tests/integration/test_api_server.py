@@ -1,15 +1,18 @@
 import logging
+import threading
 import pytest
 from fastapi.testclient import TestClient
 
-from src.api.server import app, process_bcp_calculation, jobs
-from bcp.logger import setup_logger
+from src.api import server
+from src.api.server import app, process_bcp_calculation
+from src.api.job_queue import JobQueue
+from src.api.job_store import SQLiteJobStore
 
 @pytest.fixture(autouse=True)
-def clear_jobs():
-    jobs.clear()
-    yield
-    jobs.clear()
+def job_store(tmp_path, monkeypatch):
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite"))
+    monkeypatch.setattr("src.api.server.job_store", store)
+    yield store
 
 
 def test_root():
@@ -25,7 +28,7 @@ def test_calculate_and_status(monkeypatch):
 
     # Stub calculation to be deterministic and fast
     def fake_process(job_id: str, story_content: str, provider: str):
-        jobs[job_id] = {"status": "completed", "result": {"story_name": "X", "total_bcp": 1, "breakdown": {}}}
+        server.job_store.update(job_id, status="completed", result={"story_name": "X", "total_bcp": 1, "breakdown": {}})
 
     monkeypatch.setattr("src.api.server.process_bcp_calculation", fake_process)
 
@@ -33,9 +36,289 @@ def test_calculate_and_status(monkeypatch):
     assert resp.status_code == 200
     job_id = resp.json()["job_id"]
 
-    # Immediately check status
+    # Wait for the queued job to run
+    from src.api.server import job_queue
+    assert job_queue.wait_idle(timeout=5)
     status = client.get(f"/status/{job_id}")
     assert status.status_code == 200
     data = status.json()
     assert data["status"] == "completed"
     assert data["result"]["total_bcp"] == 1
+
+
+def test_calculate_rejects_when_queue_full(monkeypatch):
+    client = TestClient(app)
+    release = threading.Event()
+    queue = JobQueue(logging.getLogger("test"), workers=1, max_depth=1)
+    monkeypatch.setattr("src.api.server.job_queue", queue)
+
+    def blocking_process(job_id: str, story_content: str, provider: str):
+        release.wait(timeout=5)
+        server.job_store.update(job_id, status="completed", result={"total_bcp": 1})
+
+    monkeypatch.setattr("src.api.server.process_bcp_calculation", blocking_process)
+
+    try:
+        running = client.post("/calculate", json={"content": "A"}).json()["job_id"]
+        # Wait for the worker to take the first job so the next one stays queued
+        for _ in range(100):
+            if queue.stats()["in_flight"]:
+                break
+            threading.Event().wait(0.01)
+        queued = client.post("/calculate", json={"content": "B"}).json()["job_id"]
+
+        rejected = client.post("/calculate", json={"content": "C"})
+        assert rejected.status_code == 429
+        assert int(rejected.headers["Retry-After"]) >= 1
+
+        data = client.get(f"/status/{queued}").json()
+        assert data["status"] == "pending"
+        assert data["queue_position"] == 1
+        assert data["queue_depth"] == 1
+        assert data["wait_time"] >= 0
+        assert client.get(f"/status/{running}").json()["queue_position"] is None
+    finally:
+        release.set()
+        assert queue.wait_idle(timeout=5)
+
+
+def test_status_unknown_job():
+    client = TestClient(app)
+    assert client.get("/status/missing").status_code == 404
+
+
+def test_batch_dedupes_and_pages_results(monkeypatch):
+    client = TestClient(app)
+    calls = []
+
+    def fake_process(job_id: str, story_content: str, provider: str):
+        calls.append(story_content)
+        if story_content == "bad":
+            server.job_store.update(job_id, status="failed", error="boom")
+        else:
+            server.job_store.update(job_id, status="completed", result={"story_name": story_content, "total_bcp": len(story_content), "breakdown": {}})
+
+    monkeypatch.setattr("src.api.server.process_bcp_calculation", fake_process)
+
+    resp = client.post("/calculate/batch", json={"stories": ["A", "BB", "A", "bad"], "provider": "openai"})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["total"] == 4
+    assert data["unique"] == 3
+    assert server.job_queue.wait_idle(timeout=5)
+    assert sorted(calls) == ["A", "BB", "bad"]
+
+    # The last job finalizes the batch, so the TTL applies without any polling
+    record = server.job_store.get(data["batch_id"])
+    assert record["status"] == "completed"
+    assert record["finished_at"] is not None
+    assert (record["completed"], record["failed"]) == (2, 1)
+
+    status = client.get(f"/batches/{data['batch_id']}").json()
+    assert status["status"] == "completed"
+    assert status["counts"] == {"completed": 3, "failed": 1}
+    assert [item["total_bcp"] for item in status["items"]] == [1, 2, 1, None]
+    assert status["items"][0]["job_id"] == status["items"][2]["job_id"]
+    assert status["items"][3]["error"] == "boom"
+    assert all(item["result"] is None for item in status["items"])
+
+    page = client.get(f"/batches/{data['batch_id']}/results", params={"offset": 1, "limit": 2}).json()
+    assert page["next_offset"] == 3
+    assert [item["index"] for item in page["items"]] == [1, 2]
+    assert page["items"][0]["result"]["story_name"] == "BB"
+
+    last = client.get(f"/batches/{data['batch_id']}/results", params={"offset": 3}).json()
+    assert last["next_offset"] is None
+    assert last["items"][0]["status"] == "failed"
+
+
+def test_batch_larger_than_the_queue_runs_from_the_backlog(monkeypatch):
+    client = TestClient(app)
+    queue = JobQueue(logging.getLogger("test"), workers=2, max_depth=1, max_backlog=200)
+    monkeypatch.setattr("src.api.server.job_queue", queue)
+
+    def fake_process(job_id: str, story_content: str, provider: str):
+        server.job_store.update(job_id, status="completed", result={"total_bcp": 1})
+
+    monkeypatch.setattr("src.api.server.process_bcp_calculation", fake_process)
+
+    stories = [f"story {i}" for i in range(150)]
+    resp = client.post("/calculate/batch", json={"stories": stories})
+    assert resp.status_code == 200
+    # Single jobs keep their own queue slots while the batch runs
+    assert client.post("/calculate", json={"content": "single"}).status_code == 200
+    assert queue.wait_idle(timeout=10)
+
+    record = server.job_store.get(resp.json()["batch_id"])
+    assert record["status"] == "completed"
+    assert record["completed"] == 150
+
+
+def test_batch_larger_than_the_backlog_is_rejected(monkeypatch):
+    client = TestClient(app)
+    queue = JobQueue(logging.getLogger("test"), workers=1, max_depth=1, max_backlog=2)
+    monkeypatch.setattr("src.api.server.job_queue", queue)
+    monkeypatch.setattr(
+        "src.api.server.process_bcp_calculation",
+        lambda job_id, story_content, provider: server.job_store.update(job_id, status="completed"),
+    )
+
+    # The same story twice is calculated once, so it fits
+    assert client.post("/calculate/batch", json={"stories": ["A", "A"]}).status_code == 200
+    assert queue.wait_idle(timeout=5)
+
+    resp = client.post("/calculate/batch", json={"stories": ["A", "B", "C"]})
+    assert resp.status_code == 413
+    assert "Retry-After" not in resp.headers
+    assert server.job_store.count() == 2
+    assert client.get("/batches/unknown").status_code == 404
+
+
+def test_job_events_stream_and_long_poll(monkeypatch):
+    from src.api.calculator_pool import CalculatorPool
+    from src.bcp.bcp_calculator import BCPCalculator
+
+    class FakePromptHandler:
+        def process_prompt(self, prompt_file, variables):
+            if prompt_file == "step6_flow_bcp_business_rule.jinja2":
+                return [{"Rule": "X", "Score": 2}]
+            return {}
+
+    pool = CalculatorPool(
+        logging.getLogger("test"), size=1,
+        factory=lambda provider: BCPCalculator(logging.getLogger("test"), prompt_handler=FakePromptHandler())
+    )
+    monkeypatch.setattr("src.api.server.calculator_pool", pool)
+    client = TestClient(app)
+
+    job_id = client.post("/calculate", json={"content": "A\nB"}).json()["job_id"]
+
+    # Long-poll until the job finishes
+    data = client.get(f"/status/{job_id}", params={"wait": 5}).json()
+    if data["status"] != "completed":
+        data = client.get(f"/status/{job_id}", params={"wait": 5}).json()
+    assert data["status"] == "completed"
+    assert data["result"]["total_bcp"] == 2
+
+    with client.stream("GET", f"/jobs/{job_id}/events") as resp:
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        body = "".join(resp.iter_text())
+    names = [line.split(": ", 1)[1] for line in body.splitlines() if line.startswith("event: ")]
+    assert names[0] == "job_started"
+    assert names[-1] == "job_completed"
+    assert names.count("step_started") == names.count("step_completed") == 7
+    assert '"step": "Business Rules Complexity"' in body
+
+    # Resuming after the last seen event only returns the rest of the stream
+    with client.stream("GET", f"/jobs/{job_id}/events", headers={"Last-Event-ID": str(len(names) - 1)}) as resp:
+        body = "".join(resp.iter_text())
+    assert [line for line in body.splitlines() if line.startswith("event: ")] == ["event: job_completed"]
+
+    assert client.get("/jobs/missing/events").status_code == 404
+
+
+def test_metrics_endpoint(monkeypatch):
+    from src.api.calculator_pool import CalculatorPool
+    from src.bcp.bcp_calculator import BCPCalculator
+    from src.bcp.callbacks import emit_active
+
+    class FakePromptHandler:
+        def process_prompt(self, prompt_file, variables):
+            usage = {"input_tokens": 10, "output_tokens": 2, "cached_tokens": 0, "total_tokens": 12}
+            emit_active("on_llm_end", prompt_file, 5, None, 0.2, usage)
+            emit_active("on_parse_result", prompt_file, "raw", False)
+            return {}
+
+    pool = CalculatorPool(
+        logging.getLogger("test"), size=1,
+        factory=lambda provider: BCPCalculator(logging.getLogger("test"), prompt_handler=FakePromptHandler())
+    )
+    monkeypatch.setattr("src.api.server.calculator_pool", pool)
+    client = TestClient(app)
+
+    client.post("/calculate", json={"content": "A\nB", "provider": "metrics-test"})
+    assert server.job_queue.wait_idle(timeout=5)
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = resp.text
+    assert '# TYPE bcp_step_duration_seconds histogram' in text
+    assert 'bcp_step_duration_seconds_count{step="Break Elements",provider="metrics-test"} 1' in text
+    assert 'bcp_llm_calls_total{step="Break Elements",provider="metrics-test"} 1' in text
+    assert 'bcp_parse_fallbacks_total{step="Break Elements",provider="metrics-test"} 1' in text
+    assert 'bcp_llm_tokens_total{step="Break Elements",provider="metrics-test",type="input"} 10' in text
+    assert "bcp_queue_depth 0" in text
+    assert "bcp_jobs_in_flight 0" in text
+
+
+
+def test_job_spans_continue_the_request_trace(monkeypatch):
+    from src.api.calculator_pool import CalculatorPool
+    from src.bcp.bcp_calculator import BCPCalculator
+    from src.bcp.tracing import SpanExporter, Tracer
+
+    class MemoryExporter(SpanExporter):
+        def __init__(self):
+            self.spans = []
+        def export(self, span):
+            self.spans.append(span)
+
+    class FakePromptHandler:
+        def process_prompt(self, prompt_file, variables):
+            return {}
+
+    exporter = MemoryExporter()
+    monkeypatch.setattr("src.bcp.tracing._tracer", Tracer([exporter]))
+    pool = CalculatorPool(
+        logging.getLogger("test"), size=1,
+        factory=lambda provider: BCPCalculator(logging.getLogger("test"), prompt_handler=FakePromptHandler())
+    )
+    monkeypatch.setattr("src.api.server.calculator_pool", pool)
+    client = TestClient(app)
+
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    resp = client.post("/calculate", json={"content": "A\nB"}, headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"})
+    assert resp.headers["traceparent"].startswith(f"00-{trace_id}-")
+    assert server.job_queue.wait_idle(timeout=5)
+
+    spans = {span.name: span for span in exporter.spans}
+    request, job, calculate = spans["http.request"], spans["bcp.job"], spans["bcp.calculate"]
+    assert request.parent_id == "00f067aa0ba902b7"
+    assert job.parent_id == request.span_id
+    assert calculate.parent_id == job.span_id
+    assert {span.trace_id for span in exporter.spans} == {trace_id}
+
+
+def test_importing_server_creates_no_job_database(tmp_path):
+    import os
+    import subprocess
+    import sys
+
+    cache_dir = tmp_path / "cache"
+    env = {**os.environ, "BCP_CACHE_DIR": str(cache_dir)}
+    env.pop("BCP_JOB_DB_PATH", None)
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    subprocess.run([sys.executable, "-c", "import src.api.server"], cwd=root, env=env, check=True)
+    assert not (cache_dir / "jobs.sqlite").exists()
+
+
+def test_batch_status_is_read_only(monkeypatch):
+    client = TestClient(app)
+    release = threading.Event()
+
+    def fake_process(job_id: str, story_content: str, provider: str):
+        release.wait(5)
+        server.job_store.update(job_id, status="completed", result={"total_bcp": 1})
+
+    monkeypatch.setattr("src.api.server.process_bcp_calculation", fake_process)
+    batch_id = client.post("/calculate/batch", json={"stories": ["A", "B"]}).json()["batch_id"]
+    updates = []
+    server.job_store.update = lambda *a, **kw: updates.append(a)
+    try:
+        assert client.get(f"/batches/{batch_id}").json()["status"] in ("pending", "processing")
+    finally:
+        del server.job_store.update
+        release.set()
+    assert updates == []
+    assert server.job_queue.wait_idle(timeout=5)
@@ -123,3 +123,250 @@ def test_bcp_required_step_error_halts(logger):
     result = calc.calculate_bcp(story)
     assert "error" in result
     assert result["steps"]["External Integrations Complexity"]["error"].startswith("LLM error")
+
+
+def test_plan_waves_groups_independent_steps(logger):
+    calc = BCPCalculator(logger=logger, prompt_handler=FakePromptHandler({}))
+    waves = [[step["name"] for step in wave] for wave in calc.plan_waves()]
+    assert waves == [
+        ["Non Functional Detector", "Story Maturity Complexity", "Story INVEST Maturity", "Break Elements"],
+        ["External Integrations Complexity", "UI Elements Complexity", "Business Rules Complexity"],
+    ]
+
+
+def test_bcp_steps_run_concurrently_within_bound(logger):
+    import threading
+    import time
+
+    class SlowPromptHandler(FakePromptHandler):
+        def __init__(self, responses):
+            super().__init__(responses)
+            self.lock = threading.Lock()
+            self.active = 0
+            self.peak = 0
+        def process_prompt(self, prompt_file, variables):
+            with self.lock:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            time.sleep(0.05)
+            with self.lock:
+                self.active -= 1
+            return super().process_prompt(prompt_file, variables)
+
+    fake = SlowPromptHandler({"step6_flow_bcp_business_rule.jinja2": [{"Rule": "X", "Score": 2}]})
+    calc = BCPCalculator(logger=logger, prompt_handler=fake, max_concurrency=3)
+    result = calc.calculate_bcp("A\nB")
+    assert fake.peak == 3
+    assert result["total_bcp"] == 2
+    # Step results keep the declared step order regardless of completion order
+    assert list(result["steps"]) == [step["name"] for step in calc.steps]
+
+
+def test_bcp_break_elements_error_skips_dependent_steps(logger):
+    class ErrorPromptHandler(FakePromptHandler):
+        def process_prompt(self, prompt_file, variables):
+            if prompt_file == "step3_flow_bcp_break_elements.jinja2":
+                raise RuntimeError("LLM error")
+            return super().process_prompt(prompt_file, variables)
+
+    fake = ErrorPromptHandler({})
+    calc = BCPCalculator(logger=logger, prompt_handler=fake)
+    result = calc.calculate_bcp("A\nB")
+    assert "error" in result
+    assert "External Integrations Complexity" not in result["steps"]
+    assert all(not f.startswith(("step4", "step5", "step6")) for f, _ in fake.calls)
+
+
+def test_acalculate_bcp_matches_sync(logger):
+    import asyncio
+
+    class AsyncFakePromptHandler(FakePromptHandler):
+        async def aprocess_prompt(self, prompt_file, variables):
+            await asyncio.sleep(0)
+            return self.process_prompt(prompt_file, variables)
+
+    responses = {
+        "step3_flow_bcp_break_elements.jinja2": {"Integrations (Boundaries)": ["Payments API"]},
+        "step4_flow_bcp_boundaries.jinja2": [{"Boundary": "Payments API", "Size": "M"}],
+        "step5_flow_bcp_interface_elements.jinja2": {"Static": 1, "Dynamic": 1},
+        "step6_flow_bcp_business_rule.jinja2": [{"Rule": "X", "Score": 2}],
+    }
+    calc = BCPCalculator(logger=logger, prompt_handler=AsyncFakePromptHandler(responses))
+    story = "A\nB"
+    assert asyncio.run(calc.acalculate_bcp(story)) == calc.calculate_bcp(story)
+
+
+def test_callbacks_receive_step_events(logger):
+    import asyncio
+    import threading
+    from bcp.callbacks import BCPCallbackHandler
+
+    class Recorder(BCPCallbackHandler):
+        def __init__(self):
+            self.lock = threading.Lock()
+            self.events = []
+        def on_step_start(self, step_name, story_name):
+            with self.lock:
+                self.events.append(("start", step_name))
+        def on_step_end(self, step_name, story_name, response, error, duration):
+            assert duration >= 0
+            with self.lock:
+                self.events.append(("end", step_name, error is None))
+
+    class BrokenHandler(BCPCallbackHandler):
+        def on_step_start(self, step_name, story_name):
+            raise RuntimeError("handler bug")
+
+    class AsyncFakePromptHandler(FakePromptHandler):
+        async def aprocess_prompt(self, prompt_file, variables):
+            return self.process_prompt(prompt_file, variables)
+
+    fake = AsyncFakePromptHandler({"step6_flow_bcp_business_rule.jinja2": [{"Rule": "X", "Score": 2}]})
+    constructor_recorder = Recorder()
+    calc = BCPCalculator(logger=logger, prompt_handler=fake, callbacks=[constructor_recorder, BrokenHandler()])
+
+    call_recorder = Recorder()
+    result = calc.calculate_bcp("A\nB", callbacks=[call_recorder])
+    assert result["total_bcp"] == 2
+    step_names = [step["name"] for step in calc.steps]
+    for recorder in (constructor_recorder, call_recorder):
+        assert sorted(e[1] for e in recorder.events if e[0] == "start") == sorted(step_names)
+        assert all(e[2] for e in recorder.events if e[0] == "end")
+        # Every step ends after it starts, and dependent steps start after Break Elements ends
+        for name in step_names:
+            assert recorder.events.index(("start", name)) < recorder.events.index(("end", name, True))
+        assert recorder.events.index(("end", "Break Elements", True)) < recorder.events.index(("start", "UI Elements Complexity"))
+
+    async_recorder = Recorder()
+    asyncio.run(calc.acalculate_bcp("A\nB", callbacks=[async_recorder]))
+    assert len(async_recorder.events) == 2 * len(step_names)
+
+
+def test_registered_callbacks_receive_pipeline_events(logger):
+    from bcp.callbacks import BCPCallbackHandler, register_callback, unregister_callback
+
+    class Recorder(BCPCallbackHandler):
+        def __init__(self):
+            self.events = []
+        def on_pipeline_start(self, story_name):
+            self.events.append(("start", story_name))
+        def on_pipeline_end(self, story_name, results, duration):
+            self.events.append(("end", story_name, results["total_bcp"]))
+
+    recorder = Recorder()
+    register_callback(recorder)
+    try:
+        fake = FakePromptHandler({"step6_flow_bcp_business_rule.jinja2": [{"Rule": "X", "Score": 2}]})
+        BCPCalculator(logger=logger, prompt_handler=fake).calculate_bcp("A\nB")
+    finally:
+        unregister_callback(recorder)
+    assert recorder.events == [("start", "A"), ("end", "A", 2)]
+
+
+def test_results_include_usage_per_step(logger):
+    from types import SimpleNamespace
+    from bcp.callbacks import emit_active
+
+    class UsageFakePromptHandler(FakePromptHandler):
+        provider = SimpleNamespace(model_name="gpt-4o-mini")
+        def process_prompt(self, prompt_file, variables):
+            usage = {"input_tokens": 1000, "output_tokens": 100, "cached_tokens": 0, "total_tokens": 1100}
+            emit_active("on_llm_end", prompt_file, 10, None, 0.5, usage)
+            return super().process_prompt(prompt_file, variables)
+
+    fake = UsageFakePromptHandler({"step6_flow_bcp_business_rule.jinja2": [{"Rule": "X", "Score": 2}]})
+    result = BCPCalculator(logger=logger, provider_name="flow", prompt_handler=fake).calculate_bcp("A\nB")
+
+    usage = result["usage"]
+    assert usage["provider"] == "flow"
+    assert usage["model"] == "gpt-4o-mini"
+    assert set(usage["steps"]) == {step["name"] for step in BCPCalculator(logger=logger, prompt_handler=fake).steps}
+    assert usage["steps"]["Break Elements"]["calls"] == 1
+    assert usage["total"]["input_tokens"] == 1000 * len(usage["steps"])
+    assert usage["total"]["cost"] == pytest.approx(len(usage["steps"]) * (1000 * 0.15 + 100 * 0.60) / 1_000_000)
+
+
+def test_result_cache_hit_reports_no_llm_spend(logger):
+    from types import SimpleNamespace
+    from bcp.cache import PersistentCache
+    from bcp.callbacks import emit_active
+    from bcp.usage import rollup_usage
+
+    class UsageFakePromptHandler(FakePromptHandler):
+        provider = SimpleNamespace(model_name="gpt-4o-mini", get_params=lambda: {"provider": "Fake"})
+        def template_hashes(self, prompt_files):
+            return {f: "hash" for f in prompt_files}
+        def process_prompt(self, prompt_file, variables):
+            usage = {"input_tokens": 1000, "output_tokens": 100, "cached_tokens": 0, "total_tokens": 1100}
+            emit_active("on_llm_end", prompt_file, 10, None, 0.5, usage)
+            return super().process_prompt(prompt_file, variables)
+
+    fake = UsageFakePromptHandler({"step6_flow_bcp_business_rule.jinja2": [{"Rule": "X", "Score": 2}]})
+    calc = BCPCalculator(logger=logger, provider_name="flow", prompt_handler=fake, result_cache=PersistentCache())
+    first = calc.calculate_bcp("A\nB")
+    second = calc.calculate_bcp("A\nB")
+
+    assert first["usage"]["total"]["cost"] > 0
+    assert second["usage"]["cached"] is True
+    assert second["usage"]["total"]["cost"] == 0
+    assert second["usage"]["total"]["total_tokens"] == 0
+    assert second["total_bcp"] == first["total_bcp"]
+    rollup = rollup_usage([first, second])
+    assert rollup["flow/gpt-4o-mini"]["stories"] == 1
+    assert rollup["flow/gpt-4o-mini"]["cost"] == first["usage"]["total"]["cost"]
+    # The stored result keeps the usage of the original calculation
+    assert calc.calculate_bcp("A\nB")["usage"]["cached"] is True
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_required_step_error_skips_pending_siblings(logger, use_async):
+    import asyncio
+
+    class ErrorPromptHandler(FakePromptHandler):
+        def process_prompt(self, prompt_file, variables):
+            if prompt_file == "step4_flow_bcp_boundaries.jinja2":
+                super().process_prompt(prompt_file, variables)
+                raise RuntimeError("LLM error")
+            return super().process_prompt(prompt_file, variables)
+        async def aprocess_prompt(self, prompt_file, variables):
+            return self.process_prompt(prompt_file, variables)
+
+    fake = ErrorPromptHandler({"step3_flow_bcp_break_elements.jinja2": {"Integrations (Boundaries)": ["Payments API"], "User View": "Login"}})
+    calc = BCPCalculator(logger=logger, prompt_handler=fake, max_concurrency=1)
+    story = "A\nB"
+    result = asyncio.run(calc.acalculate_bcp(story)) if use_async else calc.calculate_bcp(story)
+
+    # Steps 5 and 6 were waiting behind step 4, so they never call the LLM
+    assert "error" in result
+    assert all(not f.startswith(("step5", "step6")) for f, _ in fake.calls)
+    assert "UI Elements Complexity" not in result["steps"]
+    assert "UI Elements Complexity" not in result["usage"]["steps"]
+
+
+def test_required_step_error_returns_the_finished_siblings(logger):
+    import threading
+
+    # Steps 4-6 all send their prompt before step 4 fails
+    started = threading.Barrier(3, timeout=5)
+
+    class ErrorPromptHandler(FakePromptHandler):
+        def process_prompt(self, prompt_file, variables):
+            if prompt_file.startswith(("step4", "step5", "step6")):
+                started.wait()
+            if prompt_file == "step4_flow_bcp_boundaries.jinja2":
+                raise RuntimeError("LLM error")
+            return super().process_prompt(prompt_file, variables)
+
+    responses = {
+        "step3_flow_bcp_break_elements.jinja2": {"Integrations (Boundaries)": ["Payments API"], "User View": "Login"},
+        "step5_flow_bcp_interface_elements.jinja2": {"Static": 5, "Dynamic": 0},
+        "step6_flow_bcp_business_rule.jinja2": [{"Rule": "X", "Score": 2}],
+    }
+    calc = BCPCalculator(logger=logger, prompt_handler=ErrorPromptHandler(responses), max_concurrency=3)
+    result = calc.calculate_bcp("A\nB")
+
+    # Steps 5 and 6 ran alongside step 4: their paid responses are kept, without a BCP
+    assert result["error"].startswith("Failed to calculate BCP")
+    assert result["steps"]["UI Elements Complexity"] == {"Static": 5, "Dynamic": 0}
+    assert result["steps"]["Business Rules Complexity"] == [{"Rule": "X", "Score": 2}]
+    assert result["total_bcp"] == 0
@@ -0,0 +1,34 @@
+import logging
+
+from src.benchmarks.benchmark import Benchmark, compare_results, load_stories, percentile, save_results
+
+
+def test_percentile_interpolates():
+    assert percentile([], 0.5) == 0.0
+    assert percentile([3.0, 1.0, 2.0], 0.5) == 2.0
+    assert percentile([1.0, 2.0], 0.95) == 1.95
+
+
+def test_benchmark_reports_latency_overhead_throughput_and_memory(tmp_path):
+    stories = load_stories("tests/data")[:2]
+    assert len(stories) == 2
+
+    results = Benchmark(logging.getLogger("test"), latency=0.001, seed=1).run(stories, concurrency_levels=[1, 2])
+
+    assert results["metadata"]["stories"] == 2
+    assert set(results["sequential"]["stories"]) == {name for name, _ in stories}
+    steps = results["sequential"]["steps"]
+    assert len(steps) == 7
+    for step in steps.values():
+        assert step["duration"]["count"] == 2
+        assert step["llm_time"]["mean"] >= 0.001
+        assert step["overhead"]["mean"] >= 0
+    assert [level["concurrency"] for level in results["throughput"]] == [1, 2]
+    assert all(level["throughput"] > 0 for level in results["throughput"])
+    assert results["memory"]["peak_rss_bytes"] > 0
+
+    output = tmp_path / "bench.json"
+    save_results(results, str(output))
+    assert output.exists()
+    comparison = {entry["figure"]: entry for entry in compare_results(results, results)}
+    assert comparison["throughput at 2"]["change"] == 0
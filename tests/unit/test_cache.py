@@ -0,0 +1,94 @@
+import logging
+import time
+import pytest
+
+from bcp.bcp_calculator import BCPCalculator
+from bcp.cache import PersistentCache, make_cache_key
+from bcp.logger import setup_logger
+
+
+@pytest.fixture
+def logger():
+    return setup_logger(logging.DEBUG)
+
+
+def test_make_cache_key_is_order_independent():
+    assert make_cache_key(a=1, b={"x": 1, "y": 2}) == make_cache_key(b={"y": 2, "x": 1}, a=1)
+    assert make_cache_key(a=1) != make_cache_key(a=2)
+
+
+def test_memory_cache_lru_eviction_and_stats():
+    cache = PersistentCache(max_memory_entries=2)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}  # "a" becomes most recently used
+    cache.set("c", {"v": 3})           # evicts "b"
+    assert cache.get("b") is None
+    assert cache.get("c") == {"v": 3}
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+
+
+def test_get_returns_a_copy():
+    cache = PersistentCache()
+    cache.set("a", {"v": [1]})
+    cache.get("a")["v"].append(2)
+    assert cache.get("a") == {"v": [1]}
+
+
+def test_ttl_expires_entries(tmp_path):
+    cache = PersistentCache(path=str(tmp_path / "cache.sqlite"), ttl=0.05)
+    cache.set("a", 1)
+    time.sleep(0.1)
+    assert cache.get("a") is None
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    PersistentCache(path=path).set("a", {"total_bcp": 3})
+    other = PersistentCache(path=path)
+    assert other.get("a") == {"total_bcp": 3}
+    assert other.stats()["disk_hits"] == 1
+    # Namespaces sharing a database do not see each other's entries
+    assert PersistentCache(path=path, namespace="steps").get("a") is None
+
+
+def test_disk_tier_size_eviction(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = PersistentCache(path=path, max_memory_entries=1, max_disk_entries=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    fresh = PersistentCache(path=path)
+    assert fresh.get("a") is None
+    assert fresh.get("b") == "b"
+    assert fresh.get("c") == "c"
+
+
+def test_calculator_reuses_cached_result(logger):
+    class FakeProvider:
+        def get_params(self):
+            return {"provider": "Fake", "model_name": "m"}
+
+    class CountingPromptHandler:
+        def __init__(self):
+            self.provider = FakeProvider()
+            self.calls = 0
+        def template_hashes(self, prompt_files):
+            return {f: "hash" for f in prompt_files}
+        def process_prompt(self, prompt_file, variables):
+            self.calls += 1
+            if prompt_file == "step6_flow_bcp_business_rule.jinja2":
+                return [{"Rule": "X", "Score": 2}]
+            return {}
+
+    handler = CountingPromptHandler()
+    calc = BCPCalculator(logger=logger, prompt_handler=handler, result_cache=PersistentCache())
+    first = calc.calculate_bcp("A\nB")
+    calls = handler.calls
+    second = calc.calculate_bcp("A\nB")
+    assert {k: v for k, v in second.items() if k != "usage"} == {k: v for k, v in first.items() if k != "usage"}
+    assert handler.calls == calls
+    calc.calculate_bcp("A\nC")
+    assert handler.calls == 2 * calls
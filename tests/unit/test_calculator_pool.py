@@ -0,0 +1,56 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.api.calculator_pool import CalculatorPool
+
+
+class FakeCalculator:
+    def __init__(self, provider):
+        self.provider = provider
+
+
+def test_pool_reuses_calculators():
+    built = []
+    pool = CalculatorPool(logging.getLogger("test"), size=2, factory=lambda p: built.append(p) or FakeCalculator(p))
+    for _ in range(5):
+        with pool.acquire("openai") as calc:
+            assert calc.provider == "openai"
+    assert built == ["openai"]
+    assert pool.stats() == {"openai": {"created": 1, "idle": 1}}
+
+
+def test_pool_is_bounded_per_provider():
+    active = []
+    peak = []
+    lock = threading.Lock()
+    pool = CalculatorPool(logging.getLogger("test"), size=2, factory=FakeCalculator)
+
+    def job(_):
+        with pool.acquire("claude") as calc:
+            with lock:
+                active.append(calc)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.remove(calc)
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        list(executor.map(job, range(12)))
+    assert max(peak) == 2
+    assert pool.stats()["claude"]["created"] == 2
+
+
+def test_pool_factory_failure_does_not_leak_slots():
+    def factory(provider):
+        raise ValueError(f"Unsupported provider: {provider}")
+
+    pool = CalculatorPool(logging.getLogger("test"), size=1, factory=factory)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            with pool.acquire("nope"):
+                pass
+    assert pool.stats()["nope"]["created"] == 0
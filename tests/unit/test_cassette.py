@@ -0,0 +1,102 @@
+import asyncio
+import json
+import logging
+
+import pytest
+
+from bcp.bcp_calculator import BCPCalculator
+from bcp.cassette import Cassette, CassetteMissError, CassetteProvider, open_cassette
+from bcp.llm_providers import FakeProvider, get_provider
+from bcp.logger import setup_logger
+
+
+@pytest.fixture
+def logger():
+    return setup_logger(logging.WARNING)
+
+
+class CountingProvider(FakeProvider):
+    def __init__(self, logger, **kwargs):
+        super().__init__(logger, **kwargs)
+        self.calls = 0
+
+    def invoke_with_usage(self, prompt):
+        self.calls += 1
+        return super().invoke_with_usage(prompt)
+
+    async def ainvoke_with_usage(self, prompt):
+        self.calls += 1
+        return await super().ainvoke_with_usage(prompt)
+
+
+def test_cassette_records_then_replays_offline(logger, tmp_path):
+    path = tmp_path / "cassette.jsonl"
+    recorder = CountingProvider(logger)
+    calculator = BCPCalculator(logger, provider_name="fake", cassette=Cassette(str(path), "record"))
+    calculator.prompt_handler.provider = CassetteProvider(recorder, calculator.prompt_handler.provider.cassette)
+    recorded = calculator.calculate_bcp("As a user, I want to log in")
+    assert recorder.calls == 7
+    assert len(path.read_text().splitlines()) == 7
+
+    replayer = CountingProvider(logger)
+    calculator.prompt_handler.provider = CassetteProvider(replayer, Cassette(str(path), "replay"))
+    replayed = calculator.calculate_bcp("As a user, I want to log in")
+    assert replayer.calls == 0
+    assert replayed["steps"] == recorded["steps"]
+    assert replayed["usage"]["total"]["total_tokens"] == recorded["usage"]["total"]["total_tokens"]
+
+    missed = calculator.calculate_bcp("As an admin, I want to delete users")
+    assert "No recorded response" in missed["error"]
+    assert replayer.calls == 0
+
+
+def test_cassette_auto_mode_records_only_missing_prompts(logger, tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    inner = CountingProvider(logger)
+    provider = CassetteProvider(inner, Cassette(path, "auto"))
+    prompt = "You are a user story formatting assistant. Story A"
+
+    first = provider.invoke(prompt)
+    assert asyncio.run(provider.ainvoke(prompt)) == first
+    assert inner.calls == 1
+
+    provider.invoke(prompt + " changed")
+    assert inner.calls == 2
+    assert len(Cassette(path, "replay")) == 2
+
+
+def test_cassette_keys_on_provider_parameters(logger, tmp_path):
+    cassette = Cassette(str(tmp_path / "cassette.jsonl"), "auto")
+    prompt = "Evaluate the maturity of the story"
+    CassetteProvider(FakeProvider(logger), cassette).invoke(prompt)
+
+    other = CassetteProvider(FakeProvider(logger, responses={"step1_flow_story_maturity_complexity.jinja2": "{}"}),
+                             Cassette(cassette.path, "replay"))
+    with pytest.raises(CassetteMissError):
+        other.invoke(prompt)
+
+
+def test_cassette_skips_truncated_lines(tmp_path):
+    path = tmp_path / "cassette.jsonl"
+    path.write_text(json.dumps({"key": "a", "response": "ok"}) + "\n" + '{"key": "b", "resp')
+    cassette = Cassette(str(path), "replay")
+    assert len(cassette) == 1
+    assert cassette.get("a")["response"] == "ok"
+
+
+def test_cassette_replay_requires_existing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        Cassette(str(tmp_path / "missing.jsonl"), "replay")
+    with pytest.raises(ValueError):
+        Cassette(str(tmp_path / "cassette.jsonl"), "rewind")
+
+
+def test_get_provider_wraps_with_configured_cassette(logger, tmp_path, monkeypatch):
+    assert isinstance(get_provider("fake", logger), FakeProvider)
+
+    monkeypatch.setenv("BCP_CASSETTE_PATH", str(tmp_path / "env.jsonl"))
+    provider = get_provider("fake", logger)
+    assert isinstance(provider, CassetteProvider)
+    assert provider.cassette is open_cassette(str(tmp_path / "env.jsonl"), "auto")
+    assert provider.get_params() == provider.provider.get_params()
+    assert provider.model_name == "fake"
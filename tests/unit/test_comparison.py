@@ -0,0 +1,84 @@
+import csv
+import json
+import logging
+
+import pytest
+
+from src.comparison.cli import main
+from src.comparison.runner import ComparisonRunner, read_results, summary_row
+
+
+def write_stories(directory, count):
+    paths = []
+    for index in range(count):
+        path = directory / f"story{index}.md"
+        path.write_text(f"As a user, I want feature {index}")
+        paths.append(path)
+    return paths
+
+
+def test_runner_streams_every_pair(tmp_path):
+    stories = write_stories(tmp_path, 3)
+    output_dir = tmp_path / "results"
+    runner = ComparisonRunner(logging.getLogger("test"), ["fake", "unknown"], str(output_dir), max_concurrency=4)
+
+    counts = runner.run(stories)
+
+    assert counts == {"calculated": 3, "failed": 3, "skipped": 0}
+    results = list(read_results(runner.results_path))
+    assert len(results) == 6
+    assert {(r["story_file"], r["provider"]) for r in results} == \
+        {(path.name, provider) for path in stories for provider in ("fake", "unknown")}
+    assert all(r["total_bcp"] == 19 for r in results if r["provider"] == "fake")
+    assert all("Unsupported provider" in r["error"] for r in results if r["provider"] == "unknown")
+    with open(runner.summary_path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 6
+    assert {row["Total BCP"] for row in rows if row["Provider"] == "fake"} == {"19"}
+
+
+def test_runner_resumes_after_interruption(tmp_path):
+    stories = write_stories(tmp_path, 2)
+    output_dir = tmp_path / "results"
+    runner = ComparisonRunner(logging.getLogger("test"), ["fake", "unknown"], str(output_dir))
+    runner.run(stories)
+    with open(runner.results_path, "a", encoding="utf-8") as f:
+        f.write('{"story_file": "story9.md", "provi')
+
+    counts = runner.run(stories, resume=True)
+
+    # The failed pairs are calculated again, the successful ones are kept
+    assert counts == {"calculated": 0, "failed": 2, "skipped": 2}
+    lines = open(runner.results_path, encoding="utf-8").read().splitlines()
+    assert len(lines) == 6
+    assert all(json.loads(line) for line in lines)
+    # The summary keeps the successful pairs and the retried ones once
+    with open(runner.summary_path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 4
+
+    assert runner.run(stories) == {"calculated": 2, "failed": 2, "skipped": 0}
+    assert len(list(read_results(runner.results_path))) == 4
+
+
+def test_summary_row():
+    row = summary_row({
+        "story_name": "Story",
+        "story_file": "story.md",
+        "provider": "fake",
+        "total_bcp": 7,
+        "breakdown": {"Business Rules": 3, "UI Elements": 4},
+        "processing_time": 1.5,
+    })
+    assert row["Total BCP"] == 7
+    assert row["UI Elements"] == 4
+    assert row["External Integrations"] == 0
+    assert row["Error"] == ""
+
+
+def test_cli_rejects_missing_stories_directory(tmp_path, caplog):
+    with pytest.raises(SystemExit) as exc_info:
+        main(["--stories-dir", str(tmp_path / "missing"), "--output-dir", str(tmp_path / "results")])
+
+    assert exc_info.value.code == 1
+    assert "does not exist" in caplog.text
@@ -0,0 +1,61 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bcp.flow_auth import FlowTokenCache
+
+
+class CountingTokenCache(FlowTokenCache):
+    """Token cache whose fetches are counted instead of hitting the auth engine."""
+
+    def __init__(self, lifetime, delay=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.lifetime = lifetime
+        self.delay = delay
+        self.fetches = 0
+        self.fetch_lock = threading.Lock()
+
+    def _fetch_token(self, base_url, client_id, client_secret):
+        time.sleep(self.delay)
+        with self.fetch_lock:
+            self.fetches += 1
+            return f"token-{self.fetches}", self.lifetime
+
+
+def test_concurrent_misses_fetch_once():
+    cache = CountingTokenCache(lifetime=3600, delay=0.05, refresh_margin=60)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        tokens = list(executor.map(lambda _: cache.get_token("http://flow", "id", "secret"), range(16)))
+    assert set(tokens) == {"token-1"}
+    assert cache.fetches == 1
+
+
+def test_tokens_are_keyed_by_client_tenant_and_url():
+    cache = CountingTokenCache(lifetime=3600, refresh_margin=60)
+    cache.get_token("http://flow", "id", "secret")
+    cache.get_token("http://flow", "id", "secret", tenant="other")
+    cache.get_token("http://other", "id", "secret")
+    cache.get_token("http://flow", "id", "secret")
+    assert cache.fetches == 3
+
+
+def test_token_near_expiry_is_refreshed_in_background():
+    cache = CountingTokenCache(lifetime=30, refresh_margin=60)
+    assert cache.get_token("http://flow", "id", "secret") == "token-1"
+    # Inside the refresh margin: the current token is served while a refresh runs
+    assert cache.get_token("http://flow", "id", "secret") == "token-1"
+    for _ in range(100):
+        if cache.fetches == 2:
+            break
+        time.sleep(0.01)
+    assert cache.get_token("http://flow", "id", "secret") == "token-2"
+
+
+def test_rejected_token_is_replaced_once():
+    cache = CountingTokenCache(lifetime=3600, refresh_margin=60)
+    stale = cache.get_token("http://flow", "id", "secret")
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        tokens = list(executor.map(
+            lambda _: cache.get_token("http://flow", "id", "secret", rejected_token=stale), range(8)))
+    assert set(tokens) == {"token-2"}
+    assert cache.fetches == 2
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from bcp import transport
+from bcp.llm_providers import FlowBedrockChatModel, FlowChatModel
+
+
+class StubFlowHandler(BaseHTTPRequestHandler):
+    """Minimal Flow API stub recording the client ports of every request."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append((self.path, self.client_address[1], body))
+        if self.headers.get("Authorization") in self.server.rejected:
+            self.send_response(401)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        if self.path.endswith("/bedrock/invoke"):
+            data = {"content": [{"type": "text", "text": "bedrock says hi"}]}
+        else:
+            data = {"choices": [{"message": {"content": "flow says hi"}}]}
+        payload = json.dumps(data).encode()
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up (read timeout)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubFlowHandler)
+    server.requests = []
+    server.delay = 0
+    server.rejected = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    transport.close_http_clients()
+    yield server
+    server.shutdown()
+    server.server_close()
+    transport.close_http_clients()
+
+
+def _chat_model(server, cls=FlowChatModel):
+    return cls(
+        base_url=f"http://127.0.0.1:{server.server_port}",
+        flow_tenant="tenant",
+        flow_agent="agent",
+        model_name=None,
+        temperature=None,
+        max_tokens=None,
+        api_key="token",
+        **({"top_p": None, "top_k": None, "anthropic_version": None, "stop_sequences": None} if cls is FlowBedrockChatModel else {}),
+    )
+
+
+def test_flow_requests_reuse_pooled_connection(stub_server):
+    model = _chat_model(stub_server)
+    assert model.invoke("hello").content == "flow says hi"
+    assert model.invoke("hello again").content == "flow says hi"
+    ports = {port for _, port, _ in stub_server.requests}
+    assert len(stub_server.requests) == 2
+    assert len(ports) == 1
+
+
+def test_flow_bedrock_async_generate(stub_server):
+    model = _chat_model(stub_server, FlowBedrockChatModel)
+    result = asyncio.run(model.ainvoke("hello"))
+    assert result.content == "bedrock says hi"
+    path, _, body = stub_server.requests[0]
+    assert path == "/ai-orchestration-api/v1/bedrock/invoke"
+    assert body["messages"][0]["content"][0]["text"] == "hello"
+
+
+def test_flow_read_timeout(stub_server, monkeypatch):
+    monkeypatch.setenv("BCP_HTTP_READ_TIMEOUT", "0.2")
+    transport.close_http_clients()
+    stub_server.delay = 1
+    model = _chat_model(stub_server)
+    started = time.monotonic()
+    with pytest.raises(RuntimeError, match="Error calling Flow API"):
+        model.invoke("hello")
+    assert time.monotonic() - started < 1
+
+
+def test_flow_retries_once_with_fresh_token_on_401(stub_server):
+    issued = []
+
+    def token_source(rejected_token=None):
+        issued.append(rejected_token)
+        return "fresh" if rejected_token else "stale"
+
+    stub_server.rejected = {"Bearer stale"}
+    model = _chat_model(stub_server).model_copy(update={"api_key": None, "token_source": token_source})
+    assert model.invoke("hello").content == "flow says hi"
+    assert issued == [None, "stale"]
+    assert len(stub_server.requests) == 2
+
+
+def test_flow_async_generate_fetches_token_off_the_event_loop(stub_server):
+    threads = []
+
+    def token_source(rejected_token=None):
+        threads.append(threading.get_ident())
+        return "token"
+
+    async def invoke():
+        model = _chat_model(stub_server).model_copy(update={"api_key": None, "token_source": token_source})
+        result = await model.ainvoke("hello")
+        return result, threading.get_ident()
+
+    result, loop_thread = asyncio.run(invoke())
+    assert result.content == "flow says hi"
+    assert threads and loop_thread not in threads
+
+
+def test_flow_base_model_requires_the_api_mapping(stub_server):
+    from bcp.providers.flow_provider import FlowBaseChatModel
+
+    with pytest.raises(TypeError):
+        _chat_model(stub_server, cls=FlowBaseChatModel)
@@ -0,0 +1,52 @@
+import json
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "src")
+
+# Seconds importing the package may take in a fresh interpreter. Importing the
+# LLM client libraries alone takes longer, so an eager import breaks the budget
+IMPORT_BUDGET = 1.0
+
+HEAVY_MODULES = ["langchain_openai", "langchain_anthropic", "langchain_core", "httpx"]
+
+
+def run_fresh(code: str) -> dict:
+    """Run code in a fresh interpreter and return the JSON it prints."""
+    script = f"import json, sys, time\nsys.path.insert(0, {os.path.abspath(SRC_DIR)!r})\n{code}"
+    output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def loaded(modules):
+    return "[m for m in {!r} if m in sys.modules]".format(modules)
+
+
+def test_package_import_is_within_budget_and_loads_no_llm_client():
+    result = run_fresh(
+        "started = time.perf_counter()\n"
+        "from bcp import BCPCalculator, Cassette, get_provider, setup_logger\n"
+        f"print(json.dumps({{'seconds': time.perf_counter() - started, 'loaded': {loaded(HEAVY_MODULES)}}}))"
+    )
+    assert result["loaded"] == []
+    assert result["seconds"] < IMPORT_BUDGET
+
+
+def test_provider_only_loads_its_client():
+    result = run_fresh(
+        "import logging\n"
+        "from bcp import get_provider\n"
+        "get_provider('fake', logging.getLogger('test'))\n"
+        f"print(json.dumps({{'loaded': {loaded(['langchain_openai', 'langchain_anthropic'])}}}))"
+    )
+    assert result["loaded"] == []
+
+
+def test_provider_classes_stay_importable():
+    import bcp
+    from bcp import llm_providers
+
+    assert bcp.ClaudeProvider is llm_providers.ClaudeProvider
+    assert issubclass(llm_providers.FlowProvider, bcp.LLMProvider)
+    assert "FakeProvider" in dir(llm_providers)
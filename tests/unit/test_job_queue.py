@@ -0,0 +1,119 @@
+import logging
+import threading
+import time
+
+import pytest
+
+from src.api.job_queue import JobQueue, QueueFullError, parse_provider_limits
+
+
+def make_queue(**kwargs):
+    return JobQueue(logging.getLogger("test"), **kwargs)
+
+
+def test_runs_jobs_in_submission_order():
+    queue = make_queue(workers=1)
+    done = []
+    for i in range(5):
+        queue.submit(str(i), "openai", lambda i=i: done.append(i))
+    assert queue.wait_idle(timeout=5)
+    assert done == [0, 1, 2, 3, 4]
+    assert queue.stats()["queue_depth"] == 0
+
+
+def test_provider_limit_caps_concurrency_without_blocking_others():
+    queue = make_queue(workers=4, provider_limits={"openai": 1})
+    lock = threading.Lock()
+    running = {"openai": 0, "claude": 0}
+    peak = {"openai": 0, "claude": 0}
+
+    def job(provider):
+        with lock:
+            running[provider] += 1
+            peak[provider] = max(peak[provider], running[provider])
+        time.sleep(0.05)
+        with lock:
+            running[provider] -= 1
+
+    for i in range(3):
+        queue.submit(f"o{i}", "OpenAI", lambda: job("openai"))
+    for i in range(3):
+        queue.submit(f"c{i}", "claude", lambda: job("claude"))
+    assert queue.wait_idle(timeout=5)
+    assert peak["openai"] == 1
+    assert peak["claude"] > 1
+
+
+def test_full_queue_raises_with_retry_after():
+    queue = make_queue(workers=1, max_depth=1)
+    release = threading.Event()
+    queue.submit("running", "openai", lambda: release.wait(timeout=5))
+    while not queue.stats()["in_flight"]:
+        time.sleep(0.01)
+    assert queue.submit("waiting", "openai", lambda: None) == 1
+    assert queue.position("waiting") == 1
+
+    with pytest.raises(QueueFullError) as excinfo:
+        queue.submit("rejected", "openai", lambda: None)
+    assert excinfo.value.retry_after >= 1
+
+    release.set()
+    assert queue.wait_idle(timeout=5)
+    assert queue.position("waiting") is None
+
+
+def test_failing_job_does_not_stop_worker():
+    queue = make_queue(workers=1)
+    done = []
+
+    def boom():
+        raise RuntimeError("boom")
+
+    queue.submit("a", "openai", boom)
+    queue.submit("b", "openai", lambda: done.append("b"))
+    assert queue.wait_idle(timeout=5)
+    assert done == ["b"]
+
+
+def test_parse_provider_limits():
+    assert parse_provider_limits("") == {}
+    assert parse_provider_limits("OpenAI=2, claude=1") == {"openai": 2, "claude": 1}
+
+
+def test_jobs_run_in_the_context_of_their_submitter():
+    import contextvars
+
+    request_id = contextvars.ContextVar("request_id", default=None)
+    queue = make_queue(workers=1)
+    seen = []
+
+    token = request_id.set("req-1")
+    try:
+        queue.submit("job", "openai", lambda: seen.append(request_id.get()))
+    finally:
+        request_id.reset(token)
+    queue.submit("other", "openai", lambda: seen.append(request_id.get()))
+
+    assert queue.wait_idle(timeout=5)
+    assert seen == ["req-1", None]
+
+
+def test_batch_backlog_runs_after_single_jobs():
+    queue = make_queue(workers=1, max_depth=1, max_backlog=3)
+    release = threading.Event()
+    done = []
+    queue.submit("running", "openai", lambda: release.wait(timeout=5))
+    while not queue.stats()["in_flight"]:
+        time.sleep(0.01)
+    queue.submit_batch([(f"b{i}", "openai", lambda i=i: done.append(f"b{i}")) for i in range(3)])
+    assert queue.submit("single", "openai", lambda: done.append("single")) == 1
+    assert queue.position("b0") == 2
+    assert queue.stats()["backlog_depth"] == 3
+
+    # The backlog takes the whole batch or none of it
+    with pytest.raises(QueueFullError):
+        queue.submit_batch([("extra", "openai", lambda: None)])
+
+    release.set()
+    assert queue.wait_idle(timeout=5)
+    assert done == ["single", "b0", "b1", "b2"]
@@ -0,0 +1,119 @@
+import multiprocessing
+import threading
+
+import pytest
+
+from src.api.job_store import JobStore, MemoryJobStore, SQLiteJobStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def factory(**kwargs):
+        if request.param == "memory":
+            return MemoryJobStore(**kwargs)
+        return SQLiteJobStore(str(tmp_path / "jobs.sqlite"), **kwargs)
+    return factory
+
+
+def test_create_update_get(make_store):
+    store = make_store()
+    store.create("a", status="pending", result=None)
+    store.update("a", status="processing", started_at=1.0)
+    store.update("a", status="completed", result={"total_bcp": 3})
+
+    job = store.get("a")
+    assert job["status"] == "completed"
+    assert job["started_at"] == 1.0
+    assert job["result"] == {"total_bcp": 3}
+    assert job["finished_at"] is not None
+    assert store.get("missing") is None
+    assert store.count() == 1
+    assert store.count("completed") == 1
+    assert store.count("pending") == 0
+
+
+def test_get_returns_copy(make_store):
+    store = make_store()
+    store.create("a", status="completed", result={"total_bcp": 3})
+    store.get("a")["result"]["total_bcp"] = 99
+    assert store.get("a")["result"]["total_bcp"] == 3
+
+
+def test_finished_jobs_expire(make_store):
+    store = make_store(ttl=60)
+    store.create("old", status="completed", result={}, finished_at=0.0)
+    store.create("running", status="processing")
+    assert store.get("old") is None
+    assert store.purge_expired() in (0, 1)
+    assert store.count() == 1
+    assert store.get("running")["status"] == "processing"
+
+
+def test_large_results_keep_summary(make_store):
+    store = make_store(max_result_bytes=200)
+    result = {"story_name": "S", "total_bcp": 5, "breakdown": {"UI": 5}, "steps": {"x": "y" * 500}}
+    store.create("a", status="pending")
+    store.update("a", status="completed", result=result)
+    assert store.get("a")["result"] == {"story_name": "S", "total_bcp": 5, "breakdown": {"UI": 5}, "truncated": True}
+
+
+def test_delete_and_clear(make_store):
+    store = make_store()
+    store.create("a", status="pending")
+    store.create("b", status="pending")
+    store.delete("a")
+    assert store.get("a") is None
+    store.clear()
+    assert store.count() == 0
+
+
+def test_sqlite_concurrent_updates_keep_all_fields(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite"))
+    store.create("a", status="processing")
+
+    def write(i):
+        store.update("a", **{f"field_{i}": i})
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    job = store.get("a")
+    assert all(job[f"field_{i}"] == i for i in range(20))
+
+
+def _complete_job(path, job_id):
+    SQLiteJobStore(path).update(job_id, status="completed", result={"total_bcp": 1})
+
+
+def test_sqlite_shared_between_processes(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    store = SQLiteJobStore(path)
+    store.create("a", status="pending")
+    process = multiprocessing.get_context("spawn").Process(target=_complete_job, args=(path, "a"))
+    process.start()
+    process.join(timeout=30)
+    assert process.exitcode == 0
+    assert store.get("a")["status"] == "completed"
+
+
+def test_events_are_sequenced(make_store):
+    store = make_store()
+    store.create("a", status="processing")
+    assert store.append_event("a", {"event": "step_started", "step": "S"}) == 1
+    assert store.append_event("a", {"event": "step_completed", "step": "S", "output": {"x": 1}}) == 2
+    assert [e["id"] for e in store.get_events("a")] == [1, 2]
+    assert store.get_events("a", after=1) == [{"event": "step_completed", "step": "S", "output": {"x": 1}, "id": 2}]
+    assert store.get_events("missing") == []
+    store.delete("a")
+    assert store.get_events("a") == []
+
+
+def test_incomplete_store_cannot_be_instantiated():
+    class PartialStore(JobStore):
+        def create(self, job_id, **fields):
+            pass
+
+    with pytest.raises(TypeError):
+        PartialStore()
@@ -36,3 +36,80 @@ def test_get_provider_flow_mapping(logger, monkeypatch):
     assert constructed["flow"] is True
     p = get_provider("flow-bedrock", logger)
     assert constructed["bedrock"] is True
+
+
+def test_provider_builds_model_once_across_threads(logger):
+    from concurrent.futures import ThreadPoolExecutor
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    from bcp.llm_providers import LLMProvider
+
+    class CountingProvider(LLMProvider):
+        builds = 0
+        def get_model(self):
+            CountingProvider.builds += 1
+            return FakeListChatModel(responses=["ok"])
+
+    provider = CountingProvider(logger)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        responses = list(executor.map(provider.invoke, ["p"] * 16))
+    assert responses == ["ok"] * 16
+    assert CountingProvider.builds == 1
+    assert provider._get_built_model() is provider._get_built_model()
+
+
+def test_openai_models_share_the_pooled_client(logger, monkeypatch):
+    from bcp import transport
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    model = OpenAIProvider(logger)._get_built_model()
+    other = OpenAIProvider(logger)._get_built_model()
+    assert model.http_client is transport.get_http_client()
+    assert other.http_client is model.http_client
+
+
+def test_claude_models_share_the_pooled_client(logger, monkeypatch):
+    from bcp import transport
+
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    model = ClaudeProvider(logger)._get_built_model()
+    other = ClaudeProvider(logger)._get_built_model()
+    assert model._client._client is transport.get_http_client()
+    assert other._client._client is model._client._client
+    # The timeouts of the pooled client apply
+    assert model._client.timeout == transport.http_timeout()
+
+
+def test_fake_provider_answers_every_step(logger, monkeypatch):
+    import asyncio
+    from bcp.bcp_calculator import BCPCalculator
+    from bcp.llm_providers import FakeProvider
+
+    monkeypatch.setenv("BCP_FAKE_LATENCY", "0.01")
+    provider = get_provider("fake", logger)
+    assert isinstance(provider, FakeProvider)
+    assert provider.latency == 0.01
+
+    calc = BCPCalculator(logger=logger, provider_name="fake")
+    result = calc.calculate_bcp("Password Reset\nAs a user I want to reset my password.")
+    assert result["breakdown"] == {"External Integrations": 5, "UI Elements": 11, "Business Rules": 3}
+    assert result["total_bcp"] == 19
+    assert result["steps"]["Story INVEST Maturity"]["score"] == 4
+    assert result["usage"]["total"]["calls"] == 7
+    assert result["usage"]["total"]["input_tokens"] > 0
+    async_result = asyncio.run(calc.acalculate_bcp("Password Reset\nAs a user I want to reset my password."))
+    assert async_result["steps"] == result["steps"]
+
+
+def test_fake_provider_latency_distribution(logger):
+    from bcp.llm_providers import FakeProvider
+
+    assert FakeProvider(logger).get_model().delay() == 0.0
+    assert FakeProvider(logger, latency=0.5).get_model().delay() == 0.5
+    delays = [FakeProvider(logger, latency=1.0, jitter=0.5, seed=7).get_model().delay() for _ in range(2)]
+    assert delays[0] == delays[1] > 0
+    model = FakeProvider(logger, latency=1.0, jitter=0.5, seed=1).get_model()
+    samples = [model.delay() for _ in range(2000)]
+    assert abs(sum(samples) / len(samples) - 1.0) < 0.1
+
+    with pytest.raises(ValueError):
+        FakeProvider(logger).invoke("An unrelated prompt")
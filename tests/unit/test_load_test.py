@@ -0,0 +1,58 @@
+import logging
+import os
+
+import httpx
+import pytest
+
+from src.api.calculator_pool import CalculatorPool
+from src.api.job_store import MemoryJobStore
+from src.api.server import app
+from src.bcp.bcp_calculator import BCPCalculator
+from src.benchmarks.load_test import LoadTest, parse_mix, process_stats
+
+
+def test_parse_mix():
+    assert parse_mix("calculate=1,status=4") == {"calculate": 1.0, "status": 4.0}
+    assert parse_mix("calculate") == {"calculate": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("delete=1")
+    with pytest.raises(ValueError):
+        parse_mix("calculate=0")
+
+
+def test_process_stats_of_current_process():
+    stats = process_stats(os.getpid())
+    if stats is None:
+        pytest.skip("/proc is not available")
+    assert stats["rss_bytes"] > 0
+    assert stats["threads"] >= 1
+
+
+def test_load_test_against_app(monkeypatch):
+    logger = logging.getLogger("test")
+    pool = CalculatorPool(logger, size=2, factory=lambda provider: BCPCalculator(logger, provider_name="fake"))
+    monkeypatch.setattr("src.api.server.calculator_pool", pool)
+    monkeypatch.setattr("src.api.server.job_store", MemoryJobStore())
+    monkeypatch.setattr("src.api.server.poll_interval", 0.01)
+
+    load_test = LoadTest(
+        "http://test",
+        [("story.md", "As a user, I want to log in")],
+        rate=40,
+        duration=0.5,
+        mix={"calculate": 1, "status": 1},
+        pid=os.getpid(),
+        wait=1.0,
+        drain_timeout=10.0,
+        sample_interval=0.1,
+        transport=httpx.ASGITransport(app=app)
+    )
+    results = load_test.run()
+
+    assert results["requests"]["calculate"]["count"] + results["requests"]["status"]["count"] == 20
+    assert results["requests"]["calculate"]["errors"] == 0
+    assert results["requests"]["status"]["error_rate"] == 0.0
+    completion = results["completion"]
+    assert completion["completed"] == completion["submitted"] > 0
+    assert completion["latency"]["p99"] >= completion["latency"]["p50"] > 0
+    assert results["process"]["samples"]
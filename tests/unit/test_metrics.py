@@ -0,0 +1,69 @@
+import pytest
+
+from bcp.cache import PersistentCache
+from bcp.callbacks import callback_scope, emit, emit_active
+from bcp.metrics import BCPMetrics, Counter, Gauge, Histogram, MetricsRegistry
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("jobs_total", "Jobs", ("provider",)))
+    gauge = registry.register(Gauge("depth", "Depth"))
+    histogram = registry.register(Histogram("latency_seconds", "Latency", ("step",), buckets=(1.0, 5.0)))
+    registry.add_collector(lambda: gauge.set(3))
+
+    counter.inc(provider="openai")
+    counter.inc(2, provider='we"ird')
+    histogram.observe(0.5, step="A")
+    histogram.observe(2.0, step="A")
+
+    lines = registry.render().splitlines()
+    assert "# TYPE jobs_total counter" in lines
+    assert 'jobs_total{provider="openai"} 1' in lines
+    assert 'jobs_total{provider="we\\"ird"} 2' in lines
+    assert "depth 3" in lines
+    assert 'latency_seconds_bucket{step="A",le="1"} 1' in lines
+    assert 'latency_seconds_bucket{step="A",le="5"} 2' in lines
+    assert 'latency_seconds_bucket{step="A",le="+Inf"} 2' in lines
+    assert 'latency_seconds_count{step="A"} 2' in lines
+    assert 'latency_seconds_sum{step="A"} 2.5' in lines
+
+
+def test_metric_rejects_wrong_labels():
+    with pytest.raises(ValueError):
+        Counter("c", "C", ("provider",)).inc(step="A")
+
+
+def test_handler_records_calculation_events():
+    metrics = BCPMetrics()
+    handler = metrics.handler("OpenAI")
+    assert metrics.handler("openai") is handler
+
+    emit([handler], "on_step_end", "Step A", "Story", None, RuntimeError("boom"), 1.5)
+    usage = {"input_tokens": 100, "output_tokens": 20, "cached_tokens": 0, "total_tokens": 120}
+    with callback_scope([handler], "Step A"):
+        emit_active("on_llm_end", "a.jinja2", 10, None, 1.0, usage)
+        emit_active("on_llm_end", "a.jinja2", 0, RuntimeError("timeout"), 2.0, usage)
+        emit_active("on_llm_retry", "token_rejected")
+        emit_active("on_parse_result", "a.jinja2", "raw", False)
+        emit_active("on_parse_result", "a.jinja2", {}, True)
+
+    assert metrics.step_errors.get(step="Step A", provider="openai") == 1
+    assert metrics.llm_calls.get(step="Step A", provider="openai") == 2
+    assert metrics.llm_errors.get(step="Step A", provider="openai") == 1
+    assert metrics.llm_retries.get(provider="openai", reason="token_rejected") == 1
+    assert metrics.parse_fallbacks.get(step="Step A", provider="openai") == 1
+    assert metrics.tokens.get(step="Step A", provider="openai", type="input") == 200
+    assert metrics.tokens.get(step="Step A", provider="openai", type="cached") is None
+
+
+def test_cache_hit_ratio_is_collected(monkeypatch):
+    cache = PersistentCache()
+    cache.set("k", 1)
+    cache.get("k")
+    cache.get("missing")
+    monkeypatch.setattr("bcp.metrics.active_caches", lambda: {"steps": cache})
+
+    text = BCPMetrics().render()
+    assert 'bcp_cache_lookups_total{cache="steps",result="hit"} 1' in text
+    assert 'bcp_cache_hit_ratio{cache="steps"} 0.5' in text
@@ -63,3 +63,79 @@ def test_extract_json_variants(logger):
     assert handler._extract_json_from_response(s3) == '{"total":3}'
     s4 = "no json"
     assert handler._extract_json_from_response(s4) is None
+
+
+def test_aprocess_prompt_codeblock_json(logger, monkeypatch):
+    import asyncio
+
+    class AsyncFakeProvider(FakeProvider):
+        async def ainvoke(self, prompt: str) -> str:
+            return self.response_text
+
+    handler = PromptHandler(logger, provider_name="openai")
+    handler.provider = AsyncFakeProvider("""```json\n{\n  \"total\": 5\n}\n```""")
+    monkeypatch.setattr(handler, "load_prompt", lambda f: "Total? {{ x }}")
+    out = asyncio.run(handler.aprocess_prompt("any", {"x": 1}))
+    assert out == {"total": 5}
+
+
+def test_process_prompt_step_cache(logger, monkeypatch):
+    from bcp.cache import PersistentCache
+
+    class CountingProvider(FakeProvider):
+        calls = 0
+        def get_params(self):
+            return {"provider": "Counting"}
+        def invoke(self, prompt: str) -> str:
+            CountingProvider.calls += 1
+            return self.response_text
+
+    cache = PersistentCache()
+    handler = PromptHandler(logger, provider_name="openai", step_cache=cache)
+    handler.provider = CountingProvider('{"total": 7}')
+    monkeypatch.setattr(handler, "load_prompt", lambda f: "Total? {{ x }}")
+    assert handler.process_prompt("any", {"x": 1}) == {"total": 7}
+    assert handler.process_prompt("other", {"x": 1}) == {"total": 7}
+    assert CountingProvider.calls == 1
+    handler.process_prompt("any", {"x": 2})
+    assert CountingProvider.calls == 2
+
+    # Unparsed responses are never cached
+    handler.provider = CountingProvider("No JSON here")
+    handler.process_prompt("any", {"x": 3})
+    handler.process_prompt("any", {"x": 3})
+    assert CountingProvider.calls == 4
+
+
+def test_process_prompt_notifies_active_callbacks(logger, monkeypatch):
+    from bcp.callbacks import BCPCallbackHandler, callback_scope
+
+    class Recorder(BCPCallbackHandler):
+        def __init__(self):
+            self.events = []
+        def on_prompt_rendered(self, step_name, prompt_file, prompt_size):
+            self.events.append(("rendered", step_name, prompt_size))
+        def on_llm_start(self, step_name, prompt_file, prompt_size):
+            self.events.append(("llm_start", step_name, prompt_size))
+        def on_llm_end(self, step_name, prompt_file, response_size, error, duration, usage):
+            self.events.append(("llm_end", step_name, response_size, error, usage["total_tokens"]))
+        def on_parse_result(self, step_name, prompt_file, parsed, success):
+            self.events.append(("parsed", step_name, success))
+
+    handler = PromptHandler(logger, provider_name="openai")
+    handler.provider = FakeProvider("No JSON here")
+    monkeypatch.setattr(handler, "load_prompt", lambda f: "Hello {{ x }}")
+
+    recorder = Recorder()
+    with callback_scope([recorder], "Step A"):
+        handler.process_prompt("any", {"x": "World"})
+    assert recorder.events == [
+        ("rendered", "Step A", 11),
+        ("llm_start", "Step A", 11),
+        ("llm_end", "Step A", 12, None, 0),
+        ("parsed", "Step A", False),
+    ]
+
+    # Outside of a scope nothing is notified
+    handler.process_prompt("any", {"x": "World"})
+    assert len(recorder.events) == 4
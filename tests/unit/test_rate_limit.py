@@ -0,0 +1,66 @@
+import asyncio
+import logging
+
+import pytest
+
+from bcp import rate_limit
+from bcp.llm_providers import get_provider
+from bcp.rate_limit import (
+    RateLimiter,
+    get_rate_limiter,
+    parse_rate_limits,
+    rate_limit_scope,
+    scoped_rate_limiters,
+    set_rate_limit,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_limiters(monkeypatch):
+    monkeypatch.setattr(rate_limit, "_rate_limiters", {})
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(600)
+    delays = [limiter.reserve() for _ in range(3)]
+    assert delays[0] == 0.0
+    assert delays[1] == pytest.approx(0.1, abs=0.01)
+    assert delays[2] == pytest.approx(0.2, abs=0.01)
+
+    limiter.set_rate(None)
+    assert limiter.reserve() == 0.0
+    with pytest.raises(ValueError):
+        limiter.set_rate(0)
+
+
+def test_rate_limiter_waits_in_threads_and_event_loops():
+    limiter = RateLimiter(1200)
+    assert limiter.acquire() == 0.0
+    assert limiter.acquire() > 0.0
+    assert asyncio.run(limiter.aacquire()) > 0.0
+
+
+def test_rate_limiters_are_shared_per_provider(monkeypatch):
+    assert parse_rate_limits("openai=500, Flow-OpenAI=60") == {"openai": 500.0, "flow-openai": 60.0}
+
+    monkeypatch.setenv("BCP_PROVIDER_RPM", "fake=120")
+    limiter = get_rate_limiter("FAKE")
+    assert limiter.requests_per_minute == 120
+    assert get_rate_limiter("openai").requests_per_minute is None
+
+    provider = get_provider("fake", logging.getLogger("test"))
+    assert provider.rate_limiter is limiter
+    set_rate_limit("fake", 30)
+    assert provider.rate_limiter.requests_per_minute == 30
+
+
+def test_scoped_limiters_apply_in_front_of_the_provider_limiter():
+    provider = get_provider("fake", logging.getLogger("test"))
+    assert provider._rate_limiters() == (provider.rate_limiter,)
+
+    batch = RateLimiter(600)
+    with rate_limit_scope(batch):
+        assert scoped_rate_limiters() == (batch,)
+        assert provider._rate_limiters() == (batch, provider.rate_limiter)
+    assert scoped_rate_limiters() == ()
+    assert provider.rate_limiter.requests_per_minute is None
@@ -0,0 +1,178 @@
+import threading
+import time
+
+import pytest
+
+from bcp import rate_limit
+from bcp.bcp_calculator import BCPCalculator
+from bcp.llm_providers import FakeProvider
+from sdk.client import BCPClient
+
+
+def write_stories(directory, count):
+    for index in range(count):
+        (directory / f"story{index:02d}.md").write_text(f"As a user, I want feature {index}")
+
+
+def test_batch_calculate_runs_stories_concurrently_in_order(tmp_path, monkeypatch):
+    monkeypatch.setenv("BCP_FAKE_LATENCY", "0.05")
+    monkeypatch.setattr(rate_limit, "_rate_limiters", {})
+    write_stories(tmp_path, 6)
+    client = BCPClient(log_level="ERROR", provider="fake", use_cache=False)
+
+    started = time.perf_counter()
+    sequential = client.batch_calculate(tmp_path)
+    sequential_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    concurrent = client.batch_calculate(tmp_path, max_concurrency=6)
+    concurrent_time = time.perf_counter() - started
+
+    assert list(concurrent) == [f"story{index:02d}.md" for index in range(6)]
+    assert {name: result["total_bcp"] for name, result in concurrent.items()} == \
+        {name: result["total_bcp"] for name, result in sequential.items()}
+    assert concurrent_time < sequential_time / 2
+
+
+def test_batch_calculate_isolates_failures(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limit, "_rate_limiters", {})
+    write_stories(tmp_path, 3)
+    (tmp_path / "story01.md").write_text("FAIL")
+    client = BCPClient(log_level="ERROR", provider="fake", use_cache=False)
+    calculate = client.calculate
+
+    def failing_calculate(story_content):
+        if story_content == "FAIL":
+            raise RuntimeError("boom")
+        return calculate(story_content)
+
+    monkeypatch.setattr(client, "calculate", failing_calculate)
+    results = client.batch_calculate(tmp_path, output_path=tmp_path / "out" / "results.json", max_concurrency=3)
+
+    assert results["story01.md"] == {"error": "boom"}
+    assert results["story00.md"]["total_bcp"] == results["story02.md"]["total_bcp"] == 19
+    assert (tmp_path / "out" / "results.json").exists()
+
+
+def test_batch_calculate_applies_rate_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limit, "_rate_limiters", {})
+    write_stories(tmp_path, 1)
+    client = BCPClient(log_level="ERROR", provider="fake", use_cache=False)
+
+    started = time.perf_counter()
+    client.batch_calculate(tmp_path, max_concurrency=2, requests_per_minute=600)
+
+    # 7 LLM calls spaced 0.1s apart
+    assert time.perf_counter() - started >= 0.55
+    # The batch has its own limiter and leaves the process-wide one alone
+    assert rate_limit.get_rate_limiter("fake").requests_per_minute is None
+
+    rate_limit.set_rate_limit("fake", 300)
+    started = time.perf_counter()
+    client.batch_calculate(tmp_path, requests_per_minute=6000)
+    # The stricter provider limit still applies behind the batch limiter
+    assert time.perf_counter() - started >= 1.1
+    assert rate_limit.get_rate_limiter("fake").requests_per_minute == 300
+
+
+def test_batch_rate_limit_does_not_throttle_other_calculations(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limit, "_rate_limiters", {})
+    write_stories(tmp_path, 1)
+    client = BCPClient(log_level="ERROR", provider="fake", use_cache=False)
+
+    # 7 LLM calls spaced 0.3s apart
+    batch = threading.Thread(
+        target=client.batch_calculate, args=(tmp_path,), kwargs={"requests_per_minute": 200}
+    )
+    batch.start()
+    try:
+        time.sleep(0.1)
+        started = time.perf_counter()
+        result = client.calculate("As a user, I want another feature")
+        assert "error" not in result
+        # The calls made outside the batch do not wait for its slots
+        assert time.perf_counter() - started < 1
+    finally:
+        batch.join()
+
+
+def test_batch_calculate_streams_jsonl_and_resumes(tmp_path, monkeypatch):
+    monkeypatch.setattr(rate_limit, "_rate_limiters", {})
+    stories = tmp_path / "stories"
+    stories.mkdir()
+    write_stories(stories, 4)
+    output_path = tmp_path / "out" / "results.jsonl"
+    client = BCPClient(log_level="ERROR", provider="fake", use_cache=False)
+    calculate = client.calculate
+    calculated = []
+    failing = {"As a user, I want feature 1"}
+
+    def flaky_calculate(story_content):
+        calculated.append(story_content)
+        if story_content in failing:
+            raise RuntimeError("timeout")
+        return calculate(story_content)
+
+    monkeypatch.setattr(client, "calculate", flaky_calculate)
+    results = client.batch_calculate(stories, output_path=output_path, max_concurrency=2)
+    assert list(results) == ["story00.md", "story01.md", "story02.md", "story03.md"]
+    assert results["story01.md"] == {"error": "timeout"}
+    assert results["story03.md"]["total_bcp"] == 19
+    assert len(output_path.read_text().splitlines()) == 4
+
+    # A crash mid-write leaves a truncated line and an index missing the last result
+    index_path = output_path.with_name("results.jsonl.index")
+    index_lines = index_path.read_text().splitlines()
+    index_path.write_text("\n".join(index_lines[:-1]) + "\n")
+    with open(output_path, "a", encoding="utf-8") as f:
+        f.write('{"file": "story04.md", "resu')
+
+    calculated.clear()
+    failing.clear()
+    resumed = client.batch_calculate(stories, output_path=output_path, max_concurrency=2, resume=True)
+    assert calculated == ["As a user, I want feature 1"]
+    assert [resumed[name]["total_bcp"] for name in resumed] == [19, 19, 19, 19]
+    assert all(line.endswith("}") for line in output_path.read_text().splitlines())
+    assert len(index_path.read_text().splitlines()) == 5
+
+
+def test_batch_calculate_resume_requires_jsonl(tmp_path):
+    client = BCPClient(log_level="ERROR", provider="fake", use_cache=False)
+    with pytest.raises(ValueError):
+        client.batch_calculate(tmp_path, output_path=tmp_path / "results.json", resume=True)
+
+
+def test_compare_providers_runs_in_parallel_and_reuses_calculators(monkeypatch):
+    monkeypatch.setattr(rate_limit, "_rate_limiters", {})
+    built = []
+    client = BCPClient(log_level="ERROR", provider="fake", use_cache=False)
+
+    def build_calculator(provider):
+        built.append(provider)
+        calculator = BCPCalculator(client.logger, provider_name="fake")
+        calculator.prompt_handler.provider = FakeProvider(client.logger, latency=0.02)
+        return calculator
+
+    monkeypatch.setattr(client, "_build_calculator", build_calculator)
+    providers = ["a", "b", "c", "d"]
+
+    started = time.perf_counter()
+    results = client.compare_providers("As a user, I want to log in", providers)
+    elapsed = time.perf_counter() - started
+
+    assert list(results) == providers
+    assert all(result["total_bcp"] == 19 for result in results.values())
+    assert all(result["wall_time"] > 0 for result in results.values())
+    assert elapsed < sum(result["wall_time"] for result in results.values()) * 0.6
+
+    client.compare_providers("As a user, I want to log in", ["b", "a"])
+    assert sorted(built) == providers
+    assert client.provider == "fake"
+
+
+def test_compare_providers_isolates_provider_errors():
+    client = BCPClient(log_level="ERROR", provider="fake", use_cache=False)
+    results = client.compare_providers("As a user, I want to log in", ["fake", "unknown"])
+    assert results["fake"]["total_bcp"] == 19
+    assert "Unsupported provider" in results["unknown"]["error"]
+    assert results["unknown"]["wall_time"] >= 0
@@ -0,0 +1,52 @@
+import os
+import time
+
+from bcp.templates import PROMPTS_DIR, PromptTemplates, get_prompt_templates
+
+
+def _write(path, content, mtime):
+    path.write_text(content, encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+def test_precompile_and_hashes_cover_all_prompts():
+    templates = PromptTemplates(PROMPTS_DIR)
+    names = templates.precompile()
+    assert len(names) == 7
+    hashes = templates.template_hashes()
+    assert sorted(hashes) == names
+    assert all(len(h) == 64 for h in hashes.values())
+
+
+def test_compile_reuses_loader_template_for_known_source():
+    templates = PromptTemplates(PROMPTS_DIR)
+    name = templates.list_templates()[0]
+    source = templates.get_source(name)
+    assert templates.compile(source) is templates.get_template(name)
+    inline = templates.compile("Hello {{ name }}")
+    assert templates.compile("Hello {{ name }}") is inline
+    assert inline.render(name="World") == "Hello World"
+
+
+def test_hot_reload_on_mtime_change(tmp_path):
+    path = tmp_path / "t.jinja2"
+    now = time.time()
+    _write(path, "v1 {{ x }}", now - 10)
+    templates = PromptTemplates(str(tmp_path))
+    first_hash = templates.template_hash("t.jinja2")
+    assert templates.get_template("t.jinja2").render(x=1) == "v1 1"
+
+    _write(path, "v2 {{ x }}", now)
+    assert templates.get_source("t.jinja2") == "v2 {{ x }}"
+    assert templates.template_hash("t.jinja2") != first_hash
+    assert templates.get_template("t.jinja2").render(x=1) == "v2 1"
+
+
+def test_bytecode_cache_writes_compiled_templates(tmp_path):
+    cache_dir = tmp_path / "bytecode"
+    PromptTemplates(PROMPTS_DIR, bytecode_cache_dir=str(cache_dir)).precompile()
+    assert len(os.listdir(cache_dir)) == 7
+
+
+def test_get_prompt_templates_is_shared():
+    assert get_prompt_templates() is get_prompt_templates(PROMPTS_DIR)
@@ -0,0 +1,127 @@
+import asyncio
+import io
+import json
+import logging
+
+import pytest
+
+from bcp.bcp_calculator import BCPCalculator
+from bcp.tracing import (
+    ConsoleSpanExporter,
+    FileSpanExporter,
+    OTLPSpanExporter,
+    SpanExporter,
+    Tracer,
+    current_span,
+    current_traceparent,
+    remote_parent,
+    start_span,
+)
+
+
+class MemoryExporter(SpanExporter):
+    def __init__(self):
+        self.spans = []
+    def export(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = MemoryExporter()
+    monkeypatch.setattr("bcp.tracing._tracer", Tracer([exporter]))
+    return exporter
+
+
+def test_spans_nest_and_record_errors(exporter):
+    with start_span("outer", story="A") as outer:
+        with start_span("inner") as inner:
+            assert current_span() is inner
+            assert current_traceparent() == f"00-{outer.trace_id}-{inner.span_id}-01"
+        with pytest.raises(ValueError):
+            with start_span("failing"):
+                raise ValueError("bad")
+    assert current_span() is None
+
+    inner, failing, outer = exporter.spans
+    assert inner.parent_id == failing.parent_id == outer.span_id
+    assert inner.trace_id == outer.trace_id
+    assert outer.parent_id is None and outer.attributes == {"story": "A"}
+    assert failing.error == "ValueError: bad"
+    assert outer.end_time >= inner.end_time
+
+
+def test_disabled_tracer_yields_no_span(monkeypatch):
+    monkeypatch.setattr("bcp.tracing._tracer", Tracer())
+    with start_span("noop") as span:
+        assert span is None
+        assert current_traceparent() is None
+
+
+def test_remote_parent_continues_the_callers_trace(exporter):
+    with remote_parent("00-" + "a" * 32 + "-" + "b" * 16 + "-01"):
+        with start_span("request"):
+            pass
+    with remote_parent("garbage"):
+        with start_span("root"):
+            pass
+    request, root = exporter.spans
+    assert (request.trace_id, request.parent_id) == ("a" * 32, "b" * 16)
+    assert root.parent_id is None and root.trace_id != "a" * 32
+
+
+def test_calculation_spans_cover_every_step(exporter):
+    class FakePromptHandler:
+        def process_prompt(self, prompt_file, variables):
+            with start_span("bcp.prompt", prompt_file=prompt_file):
+                return {}
+        async def aprocess_prompt(self, prompt_file, variables):
+            return self.process_prompt(prompt_file, variables)
+
+    calc = BCPCalculator(logger=logging.getLogger("test"), prompt_handler=FakePromptHandler())
+    for run in (lambda: calc.calculate_bcp("A\nB"), lambda: asyncio.run(calc.acalculate_bcp("A\nB"))):
+        exporter.spans.clear()
+        run()
+        spans = {span.span_id: span for span in exporter.spans}
+        calculate = next(span for span in exporter.spans if span.name == "bcp.calculate")
+        steps = [span for span in exporter.spans if span.name == "bcp.step"]
+        assert len(steps) == len(calc.steps)
+        assert all(step.parent_id == calculate.span_id for step in steps)
+        prompts = [span for span in exporter.spans if span.name == "bcp.prompt"]
+        assert prompts and all(spans[prompt.parent_id].name == "bcp.step" for prompt in prompts)
+        assert {span.trace_id for span in exporter.spans} == {calculate.trace_id}
+
+
+def test_file_and_console_exporters_write_json_lines(tmp_path):
+    stream = io.StringIO()
+    path = tmp_path / "traces" / "spans.jsonl"
+    tracer = Tracer([FileSpanExporter(str(path)), ConsoleSpanExporter(stream)])
+    with tracer.span("a", n=1):
+        with tracer.span("b"):
+            pass
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["name"] for r in records] == ["b", "a"]
+    assert records[0]["parent_id"] == records[1]["span_id"]
+    assert records[1]["attributes"] == {"n": 1}
+    assert [json.loads(line)["name"] for line in stream.getvalue().splitlines()] == ["b", "a"]
+
+
+def test_otlp_payload():
+    tracer = Tracer([MemoryExporter()])
+    with tracer.span("parent"):
+        with pytest.raises(RuntimeError):
+            with tracer.span("child", step="A", size=3, ok=True):
+                raise RuntimeError("boom")
+    child, parent = tracer.exporters[0].spans
+
+    payload = OTLPSpanExporter("http://collector/v1/traces").payload([child, parent])
+    resource_spans = payload["resourceSpans"][0]
+    assert resource_spans["resource"]["attributes"][0]["value"] == {"stringValue": "bcp-calculator"}
+    otlp_child, otlp_parent = resource_spans["scopeSpans"][0]["spans"]
+    assert otlp_child["parentSpanId"] == parent.span_id
+    assert "parentSpanId" not in otlp_parent
+    assert otlp_child["status"] == {"code": 2, "message": "RuntimeError: boom"}
+    assert {"key": "size", "value": {"intValue": "3"}} in otlp_child["attributes"]
+    assert {"key": "ok", "value": {"boolValue": True}} in otlp_child["attributes"]
+    assert int(otlp_child["endTimeUnixNano"]) >= int(otlp_child["startTimeUnixNano"])
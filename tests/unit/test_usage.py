@@ -0,0 +1,72 @@
+import json
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from bcp.usage import (
+    find_prices,
+    flow_usage_metadata,
+    get_price_table,
+    rollup_usage,
+    summarize_usage,
+    usage_cost,
+    usage_from_message,
+)
+
+
+def test_flow_usage_metadata_openai_format():
+    metadata = flow_usage_metadata({
+        "prompt_tokens": 120,
+        "completion_tokens": 30,
+        "total_tokens": 150,
+        "prompt_tokens_details": {"cached_tokens": 100},
+    })
+    usage = usage_from_message(AIMessage(content="x", usage_metadata=metadata))
+    assert usage == {"input_tokens": 120, "output_tokens": 30, "cached_tokens": 100, "total_tokens": 150}
+
+
+def test_flow_usage_metadata_anthropic_format():
+    metadata = flow_usage_metadata({"input_tokens": 20, "output_tokens": 5, "cache_read_input_tokens": 80})
+    usage = usage_from_message(AIMessage(content="x", usage_metadata=metadata))
+    assert usage == {"input_tokens": 100, "output_tokens": 5, "cached_tokens": 80, "total_tokens": 105}
+
+
+def test_usage_from_message_without_usage():
+    assert flow_usage_metadata(None) is None
+    assert usage_from_message(AIMessage(content="x"))["total_tokens"] == 0
+
+
+def test_find_prices_prefers_exact_then_longest_prefix():
+    table = get_price_table()
+    assert find_prices("gpt-4o-2024-05-13", table)["input"] == 5.00
+    assert find_prices("gpt-4o-mini-2024-07-18", table)["input"] == 0.15
+    assert find_prices("unknown-model", table) is None
+    assert find_prices(None, table) is None
+
+
+def test_price_table_override(monkeypatch, tmp_path):
+    path = tmp_path / "prices.json"
+    path.write_text(json.dumps({"my-model": {"input": 1.0, "output": 2.0}}))
+    monkeypatch.setenv("BCP_PRICE_TABLE", str(path))
+    assert get_price_table()["my-model"] == {"input": 1.0, "output": 2.0}
+    monkeypatch.setenv("BCP_PRICE_TABLE", '{"gpt-4o": {"input": 9.0, "output": 9.0}}')
+    assert get_price_table()["gpt-4o"]["input"] == 9.0
+
+
+def test_usage_cost_bills_cached_tokens_at_cached_price():
+    prices = {"input": 2.0, "cached_input": 1.0, "output": 10.0}
+    usage = {"input_tokens": 1_000_000, "cached_tokens": 500_000, "output_tokens": 100_000}
+    assert usage_cost(usage, prices) == pytest.approx(0.5 * 2.0 + 0.5 * 1.0 + 0.1 * 10.0)
+    assert usage_cost(usage, None) is None
+
+
+def test_rollup_usage_per_provider_and_model():
+    step = {"input_tokens": 1000, "output_tokens": 200, "cached_tokens": 0, "total_tokens": 1200, "calls": 1, "llm_time": 1.0}
+    story = {"usage": summarize_usage({"Step": step}, "openai", "gpt-4o", table={"gpt-4o": {"input": 2.5, "output": 10.0}})}
+    unpriced = {"usage": summarize_usage({"Step": step}, "flow", "other", table={})}
+
+    rollup = rollup_usage([story, story, unpriced, {"total_bcp": 3}])
+    assert rollup["openai/gpt-4o"]["stories"] == 2
+    assert rollup["openai/gpt-4o"]["total_tokens"] == 2400
+    assert rollup["openai/gpt-4o"]["cost"] == pytest.approx(2 * 0.0045)
+    assert rollup["flow/other"]["cost"] is None